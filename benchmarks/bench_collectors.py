@@ -0,0 +1,104 @@
+#!/usr/bin/env python3
+"""
+Benchmark: collectors nativos (/proc, statvfs) vs subprocesos (df, free, top).
+
+Uso:
+    python3 benchmarks/bench_collectors.py [--runs 20]
+"""
+
+import argparse
+import os
+import re
+import shutil
+import subprocess
+import sys
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "src"))
+from collectors import read_disk_usage, read_memory_usage, read_cpu_times
+
+DISK_PATH = os.environ.get("DISK_PATH", "/")
+
+
+# Ruta antigua: subprocess + parsing de salida legible
+
+def parse_df(output):
+    return int(output.splitlines()[1].split()[4].strip("%"))
+
+
+def parse_free(output):
+    mem_line = output.splitlines()[1].split()
+    return round((int(mem_line[6]) / int(mem_line[1])) * 100, 1)
+
+
+def parse_top(output):
+    for line in output.splitlines():
+        if "Cpu(s)" in line:
+            return float(re.search(r'(\d+\.?\d*)\s*id', line).group(1))
+
+
+def subprocess_disk():
+    result = subprocess.run(["df", "-h", DISK_PATH], capture_output=True, text=True, timeout=5)
+    return parse_df(result.stdout)
+
+
+def subprocess_memory():
+    result = subprocess.run(["free", "-m"], capture_output=True, text=True, timeout=5)
+    return parse_free(result.stdout)
+
+
+def subprocess_cpu():
+    result = subprocess.run(["top", "-bn1"], capture_output=True, text=True, timeout=5)
+    return parse_top(result.stdout)
+
+
+# Ruta nueva: lectura directa en el proceso
+
+def native_disk():
+    return read_disk_usage(DISK_PATH).use_percent
+
+
+def native_memory():
+    return read_memory_usage().available_percent
+
+
+def native_cpu():
+    # Solo la lectura de contadores: el intervalo de muestreo es un sleep
+    return read_cpu_times()
+
+
+BENCHMARKS = [
+    ("disk", "df", subprocess_disk, native_disk),
+    ("memory", "free", subprocess_memory, native_memory),
+    ("cpu", "top", subprocess_cpu, native_cpu),
+]
+
+
+def measure(func, runs):
+    """Devuelve la mediana en milisegundos de `runs` ejecuciones."""
+    timings = []
+    for _ in range(runs):
+        start = time.perf_counter()
+        func()
+        timings.append((time.perf_counter() - start) * 1000)
+    timings.sort()
+    return timings[len(timings) // 2]
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--runs", type=int, default=20)
+    args = parser.parse_args()
+
+    print(f"{'collector':<10} {'subprocess (ms)':>16} {'nativo (ms)':>12} {'speedup':>9}")
+    for name, command, legacy, native in BENCHMARKS:
+        native_ms = measure(native, args.runs)
+        if shutil.which(command) is None:
+            print(f"{name:<10} {command + ' no disponible':>16} {native_ms:>12.3f} {'-':>9}")
+            continue
+        legacy_ms = measure(legacy, args.runs)
+        print(f"{name:<10} {legacy_ms:>16.3f} {native_ms:>12.3f} {legacy_ms / native_ms:>8.0f}x")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,387 @@
+#!/usr/bin/env python3
+"""
+Suite de benchmarks: parsing de collectors, gestión de estado,
+construcción de alertas y ciclo completo del exporter.
+
+El parsing se mide contra salidas grabadas (benchmarks/fixtures/) de
+df, free, top y /proc, así los resultados son comparables entre
+máquinas. Nada sale a la red: send_alert y el POST a Discord se
+sustituyen por funciones vacías.
+
+Uso:
+    python3 benchmarks/bench_suite.py run [--output results.json] [--filter cpu]
+    python3 benchmarks/bench_suite.py compare baseline.json results.json [--threshold 0.2]
+    python3 benchmarks/bench_suite.py startup [--budget-ms 200] [--import-budget-ms 100]
+
+`compare` sale con código 1 si algún benchmark es más lento que la
+baseline por encima del threshold (por defecto un 20%).
+
+`startup` mide el arranque en frío de cada script de cron (un proceso
+nuevo por medida, con -X importtime) y sale con código 1 si alguno
+supera el presupuesto o carga un módulo del camino de alertas.
+"""
+
+import argparse
+import atexit
+import json
+import logging
+import os
+import platform
+import shutil
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+import timeit
+
+BENCH_DIR = os.path.dirname(os.path.abspath(__file__))
+FIXTURES = os.path.join(BENCH_DIR, "fixtures")
+
+sys.path.insert(0, BENCH_DIR)
+sys.path.insert(0, os.path.join(BENCH_DIR, "..", "src"))
+
+# Sin handlers de consola: los checks no deben escribir logs mientras se mide
+logging.getLogger().addHandler(logging.NullHandler())
+
+from bench_collectors import parse_df, parse_free, parse_top
+import collectors
+
+# Repeticiones de cada benchmark (cada una de ~0.2s o más)
+REPEAT = int(os.environ.get("BENCH_REPEAT", "5"))
+
+SRC_DIR = os.path.join(BENCH_DIR, "..", "src")
+
+# Scripts de cron cuyo arranque en frío se mide con `startup`
+STARTUP_MODULES = ("cpu_check", "memory_check", "disk_check", "load_check")
+
+# Presupuestos (ms) de arranque: proceso completo e imports del script
+STARTUP_BUDGET_MS = float(os.environ.get("STARTUP_BUDGET_MS", "200"))
+STARTUP_IMPORT_BUDGET_MS = float(os.environ.get("STARTUP_IMPORT_BUDGET_MS", "100"))
+
+# Módulos que solo deben cargarse cuando una transición alerta
+ALERT_PATH_MODULES = ("notifier", "result_sink", "requests")
+
+
+def fixture(name):
+    with open(os.path.join(FIXTURES, name)) as f:
+        return f.read()
+
+
+# Benchmarks: cada función prepara el escenario y devuelve lo que se mide
+
+def bench_parse_df():
+    output = fixture("df.txt")
+    return lambda: parse_df(output)
+
+
+def bench_parse_free():
+    output = fixture("free.txt")
+    return lambda: parse_free(output)
+
+
+def bench_parse_top():
+    output = fixture("top.txt")
+    return lambda: parse_top(output)
+
+
+def bench_parse_meminfo():
+    text = fixture("meminfo")
+    return lambda: collectors.memory_usage_from_meminfo(collectors.parse_meminfo(text))
+
+
+def bench_parse_stat():
+    before, after = fixture("stat_before"), fixture("stat_after")
+    return lambda: collectors.cpu_percentages(
+        collectors.parse_cpu_times(before), collectors.parse_cpu_times(after)
+    )
+
+
+def bench_parse_stat_per_core():
+    before, after = fixture("stat_before"), fixture("stat_after")
+
+    def run():
+        _, cpus, old = collectors.parse_per_cpu_times(before)
+        _, _, new = collectors.parse_per_cpu_times(after)
+        return collectors.per_core_percentages(cpus, old, new).busy()
+    return run
+
+
+def bench_parse_mounts():
+    text = fixture("mounts")
+    return lambda: collectors.filter_mounts(collectors.parse_mounts(text))
+
+
+def bench_parse_diskstats():
+    text = fixture("diskstats")
+    exclude = collectors._split_patterns(collectors.DISKSTATS_EXCLUDE)
+    return lambda: collectors.parse_diskstats(text, exclude)
+
+
+def bench_parse_net_dev():
+    text = fixture("net_dev")
+    return lambda: collectors.parse_net_dev(text)
+
+
+def bench_handle_state_change():
+    import base_check
+    from state_store import FileStateBackend
+
+    state_dir = tempfile.mkdtemp(prefix="bench-state-")
+    atexit.register(shutil.rmtree, state_dir, ignore_errors=True)
+    base_check.send_alert = lambda **kwargs: None
+
+    check = base_check.BaseCheck("bench")
+    check.state_backend = FileStateBackend(state_dir)
+
+    # Alterna estados: la mitad de las llamadas son transiciones con alerta
+    states = ("OK", "OK", "WARNING", "WARNING", "CRITICAL", "OK")
+    counter = iter(range(10**12))
+
+    def run():
+        state = states[next(counter) % len(states)]
+        return check.handle_state_change(state, "Uso de disco", "85% en /")
+    return run
+
+
+def bench_send_discord():
+    import notifier
+
+    class FakeResponse:
+        status_code = 204
+
+    n = notifier.Notifier(spool=None)
+    n.spool = None
+    n.enabled = True
+    n.discord_webhook = "http://localhost/webhook"
+    n.session.post = lambda *args, **kwargs: FakeResponse()
+
+    return lambda: n.send_discord(
+        "CRITICAL: Uso de disco", "Uso de disco: 95% en / (inodos 3%)", "CRITICAL"
+    )
+
+
+def bench_exporter_cycle():
+    import metrics_exporter
+
+    # Mismo pool que main(): incluye la auto-instrumentación
+    pool = metrics_exporter.make_pool()
+    # Primer ciclo fuera de la medida (el sampler de CPU espera su ventana)
+    pool.collect()
+
+    def run():
+        pool.collect()
+        return metrics_exporter.update_metrics(pool)
+    return run
+
+
+BENCHMARKS = {
+    "parse_df": bench_parse_df,
+    "parse_free": bench_parse_free,
+    "parse_top": bench_parse_top,
+    "parse_meminfo": bench_parse_meminfo,
+    "parse_stat": bench_parse_stat,
+    "parse_stat_per_core": bench_parse_stat_per_core,
+    "parse_mounts": bench_parse_mounts,
+    "parse_diskstats": bench_parse_diskstats,
+    "parse_net_dev": bench_parse_net_dev,
+    "handle_state_change": bench_handle_state_change,
+    "send_discord": bench_send_discord,
+    "exporter_cycle": bench_exporter_cycle,
+}
+
+
+def measure(func, repeat=REPEAT):
+    """
+    Mide una función con timeit (número de iteraciones automático).
+
+    Returns:
+        Diccionario con la mediana y el mínimo por operación en µs
+    """
+    timer = timeit.Timer(func)
+    number, _ = timer.autorange()
+    per_op = [t / number * 1e6 for t in timer.repeat(repeat=repeat, number=number)]
+    median = statistics.median(per_op)
+    return {
+        "median_us": round(median, 3),
+        "min_us": round(min(per_op), 3),
+        "ops_per_sec": round(1e6 / median, 1) if median else None,
+        "iterations": number,
+        "repeat": repeat,
+    }
+
+
+def run(names, output=None):
+    results = {
+        "meta": {
+            "timestamp": time.strftime("%Y-%m-%dT%H:%M:%S"),
+            "python": platform.python_version(),
+            "platform": platform.platform(),
+            "cpus": os.cpu_count(),
+        },
+        "benchmarks": {},
+    }
+
+    print(f"{'benchmark':<22} {'mediana (µs)':>14} {'min (µs)':>12} {'ops/s':>12}")
+    for name in names:
+        result = measure(BENCHMARKS[name]())
+        results["benchmarks"][name] = result
+        print(f"{name:<22} {result['median_us']:>14.3f} {result['min_us']:>12.3f} "
+              f"{result['ops_per_sec']:>12.0f}")
+
+    if output:
+        with open(output, "w") as f:
+            json.dump(results, f, indent=2)
+        print(f"\nResultados guardados en {output}")
+    return results
+
+
+def compare(baseline, current, threshold=0.2):
+    """
+    Compara dos resultados y devuelve los benchmarks que empeoran.
+
+    Args:
+        baseline: Resultados de referencia (dict cargado del JSON)
+        current: Resultados nuevos
+        threshold: Empeoramiento relativo tolerado (0.2 = 20%)
+
+    Returns:
+        Lista de nombres con regresión
+    """
+    regressions = []
+    print(f"{'benchmark':<22} {'baseline (µs)':>14} {'actual (µs)':>12} {'cambio':>9}")
+    for name, result in current["benchmarks"].items():
+        base = baseline["benchmarks"].get(name)
+        if base is None:
+            print(f"{name:<22} {'-':>14} {result['median_us']:>12.3f} {'nuevo':>9}")
+            continue
+
+        change = result["median_us"] / base["median_us"] - 1 if base["median_us"] else 0.0
+        flag = ""
+        if change > threshold:
+            regressions.append(name)
+            flag = "  REGRESIÓN"
+        print(f"{name:<22} {base['median_us']:>14.3f} {result['median_us']:>12.3f} "
+              f"{change:>+8.1%}{flag}")
+    return regressions
+
+
+def parse_importtime(stderr):
+    """
+    Parsea la salida de -X importtime.
+
+    Returns:
+        Módulo -> tiempo acumulado en µs
+    """
+    cumulative = {}
+    for line in stderr.splitlines():
+        if not line.startswith("import time:"):
+            continue
+        # "import time:   self [us] | cumulative | nombre (indentado)"
+        _, cumulative_us, name = line.split("|")
+        if cumulative_us.strip().isdigit():
+            cumulative[name.strip()] = int(cumulative_us)
+    return cumulative
+
+
+def measure_startup(module, repeat=REPEAT):
+    """
+    Arranca `repeat` procesos que solo importan el script.
+
+    Returns:
+        Diccionario con la mediana del proceso completo y de los
+        imports del script (ms) y los módulos del camino de alertas
+        que se cargaron
+    """
+    wall, imports, loaded = [], [], set()
+    code = f"import {module}"
+    for _ in range(repeat):
+        start = time.perf_counter()
+        result = subprocess.run(
+            [sys.executable, "-X", "importtime", "-c", code],
+            cwd=SRC_DIR, capture_output=True, text=True, check=True
+        )
+        wall.append((time.perf_counter() - start) * 1000)
+        cumulative = parse_importtime(result.stderr)
+        imports.append(cumulative.get(module, 0) / 1000)
+        loaded.update(name for name in ALERT_PATH_MODULES if name in cumulative)
+    return {
+        "wall_ms": round(statistics.median(wall), 1),
+        "import_ms": round(statistics.median(imports), 1),
+        "alert_modules": sorted(loaded),
+    }
+
+
+def startup(modules, budget_ms=STARTUP_BUDGET_MS, import_budget_ms=STARTUP_IMPORT_BUDGET_MS):
+    """
+    Mide el arranque en frío de los scripts de cron.
+
+    Returns:
+        Lista de scripts que superan el presupuesto o cargan el
+        camino de alertas
+    """
+    failures = []
+    print(f"{'script':<16} {'proceso (ms)':>13} {'imports (ms)':>13}")
+    for module in modules:
+        result = measure_startup(module)
+        problems = []
+        if result["wall_ms"] > budget_ms:
+            problems.append(f"proceso > {budget_ms:g} ms")
+        if result["import_ms"] > import_budget_ms:
+            problems.append(f"imports > {import_budget_ms:g} ms")
+        if result["alert_modules"]:
+            problems.append(f"carga {', '.join(result['alert_modules'])}")
+        if problems:
+            failures.append(module)
+        flag = f"  FUERA DE PRESUPUESTO ({'; '.join(problems)})" if problems else ""
+        print(f"{module:<16} {result['wall_ms']:>13.1f} {result['import_ms']:>13.1f}{flag}")
+    return failures
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Suite de benchmarks del monitor")
+    subparsers = parser.add_subparsers(dest="command", required=True)
+
+    run_parser = subparsers.add_parser("run", help="Ejecutar los benchmarks")
+    run_parser.add_argument("--output", help="Archivo JSON de resultados")
+    run_parser.add_argument("--filter", default="", help="Solo benchmarks cuyo nombre contenga este texto")
+
+    compare_parser = subparsers.add_parser("compare", help="Comparar contra una baseline")
+    compare_parser.add_argument("baseline")
+    compare_parser.add_argument("current")
+    compare_parser.add_argument("--threshold", type=float, default=0.2)
+
+    startup_parser = subparsers.add_parser("startup", help="Presupuesto de arranque de los checks")
+    startup_parser.add_argument("--budget-ms", type=float, default=STARTUP_BUDGET_MS)
+    startup_parser.add_argument("--import-budget-ms", type=float, default=STARTUP_IMPORT_BUDGET_MS)
+    startup_parser.add_argument("modules", nargs="*", default=list(STARTUP_MODULES))
+
+    args = parser.parse_args()
+
+    if args.command == "run":
+        names = [name for name in BENCHMARKS if args.filter in name]
+        run(names, args.output)
+        return
+
+    if args.command == "startup":
+        failures = startup(args.modules, args.budget_ms, args.import_budget_ms)
+        if failures:
+            print(f"\nFuera de presupuesto: {', '.join(failures)}")
+            sys.exit(1)
+        print("\nArranque dentro de presupuesto")
+        return
+
+    with open(args.baseline) as f:
+        baseline = json.load(f)
+    with open(args.current) as f:
+        current = json.load(f)
+
+    regressions = compare(baseline, current, args.threshold)
+    if regressions:
+        print(f"\nRegresiones (> {args.threshold:.0%}): {', '.join(regressions)}")
+        sys.exit(1)
+    print("\nSin regresiones")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,155 @@
+#!/usr/bin/env python3
+"""
+Generador de carga: miles de agentes falsos enviando resultados al
+receptor central (src/result_receiver.py).
+
+Cada agente envía por ronda un lote gzip con el resultado de sus
+checks, igual que ResultSink. Si no se indica --url se arranca un
+receptor local en un proceso aparte (puerto libre).
+
+Uso:
+    python3 benchmarks/fake_agents.py [--hosts 5000] [--rounds 3] [--workers 32]
+    python3 benchmarks/fake_agents.py --url http://monitor:9200/results
+"""
+
+import argparse
+import os
+import random
+import re
+import socket
+import statistics
+import subprocess
+import sys
+import threading
+import time
+
+import requests
+
+BENCH_DIR = os.path.dirname(os.path.abspath(__file__))
+SRC_DIR = os.path.join(BENCH_DIR, "..", "src")
+sys.path.insert(0, SRC_DIR)
+from result_sink import encode_batch
+
+CHECKS = ("disk", "memory", "cpu")
+STATES = ("OK",) * 8 + ("WARNING", "CRITICAL")
+
+
+def free_port():
+    with socket.socket() as s:
+        s.bind(("127.0.0.1", 0))
+        return s.getsockname()[1]
+
+
+def start_receiver():
+    """Arranca un receptor local y espera a que acepte conexiones."""
+    port = free_port()
+    env = dict(os.environ, RECEIVER_PORT=str(port))
+    process = subprocess.Popen(
+        [sys.executable, os.path.join(SRC_DIR, "result_receiver.py")],
+        env=env, stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL
+    )
+    for _ in range(100):
+        try:
+            socket.create_connection(("127.0.0.1", port), timeout=0.1).close()
+            return process, f"http://127.0.0.1:{port}"
+        except OSError:
+            time.sleep(0.05)
+    process.kill()
+    raise RuntimeError("El receptor no arrancó")
+
+
+def build_payloads(hosts, rounds):
+    """Lotes ya comprimidos: se mide el receptor, no la generación."""
+    now = time.time()
+    payloads = []
+    for r in range(rounds):
+        for h in range(hosts):
+            results = [
+                {"check": check, "key": None, "state": random.choice(STATES),
+                 "value": f"{random.randint(0, 100)}%", "ts": now + r}
+                for check in CHECKS
+            ]
+            payloads.append(encode_batch(f"host-{h:05d}", results))
+    return payloads
+
+
+def run_load(url, payloads, workers):
+    """
+    Envía los lotes desde `workers` hilos con conexiones keep-alive.
+
+    Returns:
+        Tupla (latencias en segundos, errores, duración total)
+    """
+    latencies = []
+    errors = [0]
+    lock = threading.Lock()
+    chunks = [payloads[i::workers] for i in range(workers)]
+
+    def worker(chunk):
+        session = requests.Session()
+        local = []
+        failed = 0
+        for body in chunk:
+            start = time.perf_counter()
+            try:
+                response = session.post(
+                    f"{url}/results", data=body, timeout=10,
+                    headers={"Content-Type": "application/json", "Content-Encoding": "gzip"}
+                )
+                if response.status_code != 204:
+                    failed += 1
+            except requests.RequestException:
+                failed += 1
+            local.append(time.perf_counter() - start)
+        with lock:
+            latencies.extend(local)
+            errors[0] += failed
+
+    threads = [threading.Thread(target=worker, args=(chunk,)) for chunk in chunks]
+    start = time.perf_counter()
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+    return latencies, errors[0], time.perf_counter() - start
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Agentes falsos contra el receptor de resultados")
+    parser.add_argument("--url", help="URL base del receptor (por defecto arranca uno local)")
+    parser.add_argument("--hosts", type=int, default=5000)
+    parser.add_argument("--rounds", type=int, default=3)
+    parser.add_argument("--workers", type=int, default=32)
+    args = parser.parse_args()
+
+    process = None
+    url = args.url
+    if url is None:
+        process, url = start_receiver()
+    url = url.rstrip("/").removesuffix("/results")
+
+    try:
+        payloads = build_payloads(args.hosts, args.rounds)
+        latencies, errors, elapsed = run_load(url, payloads, args.workers)
+
+        metrics = requests.get(f"{url}/metrics", timeout=10).text
+        hosts_seen = re.search(r"^sre_fleet_hosts (\S+)", metrics, re.M)
+
+        latencies.sort()
+        print(f"Lotes enviados:    {len(payloads)} ({args.hosts} hosts x {args.rounds} rondas)")
+        print(f"Resultados:        {len(payloads) * len(CHECKS)}")
+        print(f"Errores:           {errors}")
+        print(f"Duración:          {elapsed:.2f}s")
+        print(f"Lotes/s:           {len(payloads) / elapsed:.0f}")
+        print(f"Resultados/s:      {len(payloads) * len(CHECKS) / elapsed:.0f}")
+        print(f"Latencia p50/p99:  {statistics.median(latencies) * 1000:.2f}ms / "
+              f"{latencies[int(len(latencies) * 0.99) - 1] * 1000:.2f}ms")
+        print(f"Hosts en receptor: {hosts_seen.group(1) if hosts_seen else '?'}")
+    finally:
+        if process is not None:
+            process.terminate()
+            process.wait()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,182 @@
+#!/usr/bin/env python3
+"""
+Prueba de carga de /metrics: muchos scrapes concurrentes contra el
+exporter, como varias réplicas de Prometheus más curls puntuales.
+
+Si no se indica --url se arranca un exporter local en un proceso
+aparte (puerto libre) en el modo pedido:
+- prerender: /metrics renderizado una vez por ciclo (exposition.py)
+- live: start_http_server de prometheus_client, render por petición
+
+Uso:
+    python3 benchmarks/scrape_load.py [--mode prerender|live|both] [--requests 2000] [--workers 16]
+    python3 benchmarks/scrape_load.py --gzip --etag
+    python3 benchmarks/scrape_load.py --url http://localhost:8000/metrics
+"""
+
+import argparse
+import http.client
+import os
+import socket
+import statistics
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+from urllib.parse import urlparse
+
+BENCH_DIR = os.path.dirname(os.path.abspath(__file__))
+SRC_DIR = os.path.join(BENCH_DIR, "..", "src")
+
+# Gauge que solo tiene valor tras el primer update_metrics()
+READY_MARKER = b"\nsre_collector_value_age_seconds{"
+
+
+def free_port():
+    with socket.socket() as s:
+        s.bind(("127.0.0.1", 0))
+        return s.getsockname()[1]
+
+
+def start_exporter(mode, state_dir):
+    """Arranca un exporter local y espera a que sirva su primer ciclo."""
+    port = free_port()
+    env = dict(
+        os.environ,
+        METRICS_PORT=str(port),
+        METRICS_PRERENDER="true" if mode == "prerender" else "false",
+        STATE_DIR=state_dir,
+        SAMPLE_CACHE="false",
+    )
+    process = subprocess.Popen(
+        [sys.executable, os.path.join(SRC_DIR, "metrics_exporter.py")],
+        env=env, stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL
+    )
+    url = f"http://127.0.0.1:{port}/metrics"
+    for _ in range(200):
+        try:
+            conn = http.client.HTTPConnection("127.0.0.1", port, timeout=1)
+            conn.request("GET", "/metrics")
+            if READY_MARKER in conn.getresponse().read():
+                conn.close()
+                return process, url
+            conn.close()
+        except OSError:
+            pass
+        time.sleep(0.1)
+    process.kill()
+    raise RuntimeError("El exporter no arrancó")
+
+
+def scrape(conn, path, headers=None):
+    """
+    Un GET sobre la conexión (se reabre sola si el servidor la cerró).
+
+    Returns:
+        Tupla (status, ETag, bytes del body)
+    """
+    conn.request("GET", path, headers=headers or {})
+    response = conn.getresponse()
+    body = response.read()
+    if response.getheader("Connection", "").lower() == "close" or response.version == 10:
+        conn.close()
+    return response.status, response.getheader("ETag"), len(body)
+
+
+def run_load(url, requests, workers, gzip=False, etag=False):
+    """
+    Lanza `requests` scrapes desde `workers` hilos.
+
+    Returns:
+        Diccionario con latencias (s), status, bytes y duración total
+    """
+    target = urlparse(url)
+    headers = {"Accept-Encoding": "gzip"} if gzip else {}
+    if etag:
+        conn = http.client.HTTPConnection(target.hostname, target.port, timeout=10)
+        _, current, _ = scrape(conn, target.path, headers)
+        conn.close()
+        if current:
+            headers["If-None-Match"] = current
+
+    latencies = []
+    statuses = {}
+    received = [0]
+    lock = threading.Lock()
+
+    def worker(count):
+        conn = http.client.HTTPConnection(target.hostname, target.port, timeout=10)
+        local, local_statuses, local_bytes = [], {}, 0
+        for _ in range(count):
+            start = time.perf_counter()
+            try:
+                status, _, size = scrape(conn, target.path, headers)
+            except (OSError, http.client.HTTPException):
+                status, size = "error", 0
+                conn.close()
+            local.append(time.perf_counter() - start)
+            local_statuses[status] = local_statuses.get(status, 0) + 1
+            local_bytes += size
+        conn.close()
+        with lock:
+            latencies.extend(local)
+            for status, n in local_statuses.items():
+                statuses[status] = statuses.get(status, 0) + n
+            received[0] += local_bytes
+
+    counts = [requests // workers + (1 if i < requests % workers else 0) for i in range(workers)]
+    threads = [threading.Thread(target=worker, args=(count,)) for count in counts]
+    start = time.perf_counter()
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+    return {
+        "latencies": sorted(latencies),
+        "statuses": statuses,
+        "bytes": received[0],
+        "elapsed": time.perf_counter() - start,
+    }
+
+
+def report(label, result):
+    latencies = result["latencies"]
+    elapsed = result["elapsed"]
+    statuses = ", ".join(f"{status}: {n}" for status, n in sorted(result["statuses"].items(), key=str))
+    print(f"[{label}]")
+    print(f"  Scrapes:          {len(latencies)} ({statuses})")
+    print(f"  Duración:         {elapsed:.2f}s")
+    print(f"  Scrapes/s:        {len(latencies) / elapsed:.0f}")
+    print(f"  Latencia p50/p99: {statistics.median(latencies) * 1000:.2f}ms / "
+          f"{latencies[int(len(latencies) * 0.99) - 1] * 1000:.2f}ms")
+    print(f"  Recibido:         {result['bytes'] / len(latencies) / 1024:.1f} KiB/scrape")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Scrapes concurrentes contra /metrics")
+    parser.add_argument("--url", help="URL de /metrics (por defecto arranca un exporter local)")
+    parser.add_argument("--mode", choices=("prerender", "live", "both"), default="both")
+    parser.add_argument("--requests", type=int, default=2000)
+    parser.add_argument("--workers", type=int, default=16)
+    parser.add_argument("--gzip", action="store_true", help="Pedir Accept-Encoding: gzip")
+    parser.add_argument("--etag", action="store_true", help="Mandar If-None-Match con el ETag vigente")
+    args = parser.parse_args()
+
+    if args.url:
+        report(args.url, run_load(args.url, args.requests, args.workers, args.gzip, args.etag))
+        return
+
+    modes = ("prerender", "live") if args.mode == "both" else (args.mode,)
+    with tempfile.TemporaryDirectory() as state_dir:
+        for mode in modes:
+            process, url = start_exporter(mode, state_dir)
+            try:
+                report(mode, run_load(url, args.requests, args.workers, args.gzip, args.etag))
+            finally:
+                process.terminate()
+                process.wait()
+
+
+if __name__ == "__main__":
+    main()
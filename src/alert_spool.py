@@ -0,0 +1,178 @@
+#!/usr/bin/env python3
+"""
+Spool de alertas en disco (journal append-only).
+
+Cada alerta se escribe en el journal ANTES de intentar entregarla,
+así una caída del webhook o un reinicio no la pierde. Cuando Discord
+confirma la entrega (204) se añade un registro de ack. Cuando no queda
+nada pendiente el journal se vacía, y si crece demasiado se compacta.
+
+Formato: una línea JSON por registro
+    {"op": "add", "id": "...", "ts": 1700000000.0, "embed": {...}}
+    {"op": "ack", "ids": ["...", "..."]}
+
+Varios procesos (checks de cron) pueden escribir a la vez: todas las
+operaciones sobre el journal se serializan con flock sobre <spool>.lock.
+"""
+
+import fcntl
+import json
+import os
+import uuid
+import time
+from contextlib import contextmanager
+
+STATE_DIR = os.environ.get("STATE_DIR", "/tmp")
+SPOOL_FILE = os.environ.get("ALERT_SPOOL_FILE", f"{STATE_DIR}/alerts.spool")
+
+# Tamaño a partir del cual se compacta el journal
+COMPACT_BYTES = 256 * 1024
+
+# Intervalo de reintento de drain_lock() mientras espera
+DRAIN_LOCK_POLL = 0.05
+
+
+class AlertSpool:
+    """
+    Cola persistente de alertas pendientes de entrega.
+    """
+
+    def __init__(self, path: str = SPOOL_FILE):
+        self.path = path
+        self.lock_path = f"{path}.lock"
+        self.drain_lock_path = f"{path}.drain"
+
+        os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+
+    @contextmanager
+    def _locked(self):
+        """Bloqueo exclusivo entre procesos sobre el journal."""
+        with open(self.lock_path, "a") as lock:
+            fcntl.flock(lock, fcntl.LOCK_EX)
+            try:
+                yield
+            finally:
+                fcntl.flock(lock, fcntl.LOCK_UN)
+
+    @contextmanager
+    def drain_lock(self, wait: float = 0):
+        """
+        Bloqueo para que solo un proceso (o hilo) entregue a la vez.
+
+        Args:
+            wait: Segundos que se espera a que quede libre (0 = no
+                bloqueante)
+
+        Yields:
+            bool: True si se obtuvo el bloqueo
+        """
+        deadline = time.monotonic() + wait
+        with open(self.drain_lock_path, "a") as lock:
+            while True:
+                try:
+                    fcntl.flock(lock, fcntl.LOCK_EX | fcntl.LOCK_NB)
+                    break
+                except BlockingIOError:
+                    if time.monotonic() >= deadline:
+                        yield False
+                        return
+                    time.sleep(DRAIN_LOCK_POLL)
+            try:
+                yield True
+            finally:
+                fcntl.flock(lock, fcntl.LOCK_UN)
+
+    def _write(self, record: dict) -> None:
+        """Añade un registro al journal y lo lleva a disco (fsync)."""
+        with open(self.path, "ab+") as f:
+            # Una escritura interrumpida deja una línea sin terminar:
+            # cerrarla para no corromper el registro siguiente
+            if f.tell() > 0:
+                f.seek(-1, os.SEEK_END)
+                if f.read(1) != b"\n":
+                    f.write(b"\n")
+            f.write(json.dumps(record).encode() + b"\n")
+            f.flush()
+            os.fsync(f.fileno())
+
+    def _replay(self) -> dict:
+        """
+        Reconstruye las alertas pendientes leyendo el journal.
+
+        Returns:
+            Diccionario id -> embed, en orden de llegada
+        """
+        pending = {}
+        try:
+            with open(self.path, "rb") as f:
+                for line in f:
+                    try:
+                        record = json.loads(line)
+                    except ValueError:
+                        # Línea truncada por una caída a mitad de escritura
+                        continue
+                    if record.get("op") == "add":
+                        pending[record["id"]] = record["embed"]
+                    elif record.get("op") == "ack":
+                        for alert_id in record.get("ids", []):
+                            pending.pop(alert_id, None)
+        except FileNotFoundError:
+            pass
+        return pending
+
+    def append(self, embed: dict) -> str:
+        """
+        Registra una alerta pendiente de entrega.
+
+        Returns:
+            Identificador de la alerta en el spool
+        """
+        alert_id = uuid.uuid4().hex
+        with self._locked():
+            self._write({"op": "add", "id": alert_id, "ts": time.time(), "embed": embed})
+        return alert_id
+
+    def pending(self) -> list:
+        """
+        Devuelve las alertas pendientes.
+
+        Returns:
+            Lista de tuplas (id, embed) en orden de llegada
+        """
+        with self._locked():
+            return list(self._replay().items())
+
+    def ack(self, ids: list) -> None:
+        """Marca alertas como entregadas y compacta el journal si procede."""
+        if not ids:
+            return
+
+        with self._locked():
+            self._write({"op": "ack", "ids": list(ids)})
+
+            pending = self._replay()
+            if not pending:
+                os.truncate(self.path, 0)
+            elif os.path.getsize(self.path) > COMPACT_BYTES:
+                self._compact(pending)
+
+    def _compact(self, pending: dict) -> None:
+        """Reescribe el journal solo con las pendientes (atómico con rename)."""
+        tmp_path = f"{self.path}.tmp"
+        with open(tmp_path, "wb") as f:
+            for alert_id, embed in pending.items():
+                record = {"op": "add", "id": alert_id, "ts": time.time(), "embed": embed}
+                f.write(json.dumps(record).encode() + b"\n")
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(tmp_path, self.path)
+
+    def is_empty(self) -> bool:
+        """Comprobación barata (solo stat) de que no hay nada en el journal."""
+        try:
+            return os.path.getsize(self.path) == 0
+        except FileNotFoundError:
+            return True
+
+    def __len__(self) -> int:
+        return len(self.pending())
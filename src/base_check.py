@@ -5,24 +5,138 @@ Contiene lógica compartida: logging, state management, alertas.
 """
 
 import logging
+import math
 import sys
 import os
+import time
+from contextlib import contextmanager
 from typing import Literal
 
-# Añadir directorio al path para importar notifier
+# Añadir directorio al path para importar los módulos hermanos.
+# notifier y result_sink (y con ellos requests) no se importan aquí:
+# casi ninguna ejecución de cron alerta y cuestan más que el propio check
 sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
-from notifier import send_alert
+from state_store import FileStateBackend, get_state_backend
+from rolling_window import LEVELS, RollingWindow
+from logging_setup import setup_logging
 
 State = Literal["OK", "WARNING", "CRITICAL"]
 
 STATE_DIR = os.environ.get("STATE_DIR", "/tmp")
 
+# Intervalo por defecto entre ejecuciones en check_runner.py
+CHECK_INTERVAL = int(os.environ.get("CHECK_INTERVAL", "10"))
+
+
+def send_alert(title, message, level="INFO"):
+    """
+    Envía una alerta. El notifier se importa en la primera llamada.
+    """
+    from notifier import send_alert as notify
+    notify(title, message, level)
+
+
+def drain_pending_alerts() -> None:
+    """
+    Carga el notifier si quedaron alertas en el spool de ejecuciones
+    anteriores, para que las entregue aunque esta no alerte.
+    
+    Solo hace un stat del journal; sin webhook no hay nada que entregar.
+    """
+    if not os.environ.get("DISCORD_WEBHOOK"):
+        return
+    from alert_spool import AlertSpool
+    if not AlertSpool().is_empty():
+        from notifier import get_notifier
+        get_notifier()
+
+
+def get_threshold(check_name: str, name: str, default: str, **kwargs) -> int:
+    """
+    Lee un threshold de las variables de entorno.
+    
+    Primero busca la variable específica del check (ej: DISK_WARNING)
+    y si no existe usa la genérica (WARNING). Así varios checks pueden
+    convivir en el mismo proceso con thresholds distintos.
+    
+    Acepta los mismos argumentos opcionales que get_setting.
+    """
+    return int(get_setting(check_name, name, default, **kwargs))
+
+
+def get_setting(
+    check_name: str,
+    name: str,
+    default: str,
+    fallbacks: tuple = (),
+    generic: bool = True
+) -> float:
+    """
+    Como get_threshold pero admite decimales (ej: márgenes de histéresis).
+    
+    Args:
+        check_name: Prefijo de la variable específica (ej: disk_inode)
+        name: Nombre del setting (ej: WARNING)
+        default: Valor si no hay ninguna variable
+        fallbacks: Prefijos que se prueban después del del check (ej:
+            los inodos usan DISK_WARNING si no hay DISK_INODE_WARNING)
+        generic: Usar la variable genérica (`name` sin prefijo); False en
+            métricas que no están en porcentaje, como la carga
+    """
+    for prefix in (check_name, *fallbacks):
+        value = os.environ.get(f"{prefix.upper()}_{name}")
+        if value is not None:
+            return float(value)
+    if generic:
+        return float(os.environ.get(name, default))
+    return float(default)
+
+
+def classify(
+    value: float,
+    warning: float,
+    critical: float,
+    inverted: bool = False,
+    previous: State = "OK",
+    hysteresis: float = 0
+) -> State:
+    """
+    Estado de una muestra con thresholds de entrada y salida.
+    
+    Para entrar en un estado basta con cruzar su threshold; para salir
+    el valor tiene que alejarse además `hysteresis` puntos. Así una
+    métrica que oscila justo en el límite no alterna entre estados.
+    
+    Args:
+        value: Valor de la métrica
+        warning: Threshold de entrada en WARNING
+        critical: Threshold de entrada en CRITICAL
+        inverted: Si True, valores más bajos son peores (ej: memoria)
+        previous: Estado anterior
+        hysteresis: Margen de salida en las unidades de la métrica
+    """
+    if inverted:
+        level = 2 if value < critical else 1 if value < warning else 0
+        holds = lambda threshold: value < threshold + hysteresis
+    else:
+        level = 2 if value >= critical else 1 if value >= warning else 0
+        holds = lambda threshold: value >= threshold - hysteresis
+    
+    # Mantener el estado anterior mientras no se cruce el threshold de salida
+    previous_level = LEVELS.index(previous)
+    if previous_level == 2 and level < 2 and holds(critical):
+        level = 2
+    elif previous_level >= 1 and level < 1 and holds(warning):
+        level = 1
+    return LEVELS[level]
 
 
 class BaseCheck:
     """
     Clase base para todos los checks de monitoreo.
     Maneja state management, logging y alertas.
+    
+    Las subclases implementan run() y devuelven el exit code.
     """
     
     def __init__(self, check_name: str):
@@ -34,44 +148,232 @@ class BaseCheck:
         """
         self.check_name = check_name
         self.state_file = f"{STATE_DIR}/{check_name}.state"
+        self.state_backend = get_state_backend()
+        
+        # Envío opcional de resultados a un receptor central (RESULT_SINK_URL)
+        self.result_sink = None
+        if os.environ.get("RESULT_SINK_URL"):
+            from result_sink import get_result_sink
+            self.result_sink = get_result_sink()
+        self.interval = int(os.environ.get(
+            f"{check_name.upper()}_INTERVAL", CHECK_INTERVAL
+        ))
+        
+        # Cache en memoria del último estado por clave (evita releer el
+        # archivo en procesos de larga duración)
+        self._last_state = {}
+        
+        # Estados pendientes de escribir dentro de deferred_states()
+        self._deferred_states = None
+        
+        # Inicio (monotónico) de la ejecución en curso de run_check()
+        self._run_started = None
+        
+        # Reglas sostenidas: alertar si N de las últimas M muestras
+        # superan el threshold (por defecto 1 de 1, una sola muestra)
+        self.window_size = max(get_threshold(check_name, "ALERT_WINDOW", "1"), 1)
+        self.min_samples = min(
+            max(get_threshold(check_name, "ALERT_MIN_SAMPLES", str(self.window_size)), 1),
+            self.window_size
+        )
+        self.hysteresis = get_setting(check_name, "HYSTERESIS", "0")
+        
+        # Muestreo adaptativo (0 = intervalo fijo): cerca de un threshold
+        # (a menos de ADAPTIVE_MARGIN, en fracción del threshold) o en
+        # alerta se ejecuta ADAPTIVE_FACTOR veces más a menudo; lejos (a
+        # más de ADAPTIVE_FAR veces ADAPTIVE_MARGIN), ADAPTIVE_FACTOR veces menos
+        self.adaptive_margin = get_setting(check_name, "ADAPTIVE_MARGIN", "0")
+        self.adaptive_factor = max(get_setting(check_name, "ADAPTIVE_FACTOR", "2"), 1)
+        self.adaptive_far = max(get_setting(check_name, "ADAPTIVE_FAR", "3"), 1)
+        self._closest = None
+        
+        # (clave, métrica) -> RollingWindow con las últimas muestras
+        self._windows = {}
         
         os.makedirs(os.path.dirname(self.state_file), exist_ok=True)
 
         
-        # Configurar logging
-        logging.basicConfig(
-            level=logging.INFO,
-            format="%(asctime)s - %(levelname)s - %(message)s",
-            datefmt="%Y-%m-%d %H:%M:%S"
-        )
+        # Configurar logging (texto o JSON según LOG_FORMAT, vía cola)
+        setup_logging()
+        self.validate_interval(self.interval)
+        
+        drain_pending_alerts()
+    
+    def state_file_for(self, key: str = None) -> str:
+        """
+        Devuelve el archivo de estado de una clave (backend file).
+        
+        Los checks con varios objetivos (ej: un disco por montaje) usan
+        una clave para que cada objetivo tenga su propio estado.
+        Sin clave se usa el archivo de siempre (<check>.state).
+        """
+        if isinstance(self.state_backend, FileStateBackend):
+            return self.state_backend.path_for(self.check_name, key)
+        return FileStateBackend(STATE_DIR).path_for(self.check_name, key)
     
-    def load_last_state(self) -> State:
+    def load_last_state(self, key: str = None) -> State:
         """
         Lee el último estado guardado.
         Si no existe, asume OK.
         """
-        try:
-            with open(self.state_file) as f:
-                state = f.read().strip()
-                # Validar que sea un estado válido
-                if state in ("OK", "WARNING", "CRITICAL"):
-                    return state
-                return "OK"
-        except FileNotFoundError:
-            return "OK"
+        if key in self._last_state:
+            return self._last_state[key]
+        
+        state = self.state_backend.load(self.check_name, key) or "OK"
+        
+        self._last_state[key] = state
+        return state
     
-    def save_state(self, state: State) -> None:
+    def save_state(self, state: State, key: str = None, value: str = None) -> None:
         """
         Guarda el estado actual.
+        
+        Args:
+            state: Estado a guardar
+            key: Objetivo dentro del check (ej: mountpoint)
+            value: Valor de la métrica (se guarda en el histórico si
+                el backend lo soporta)
         """
-        with open(self.state_file, "w") as f:
-            f.write(state)
+        if self._deferred_states is not None:
+            self._deferred_states.append((state, key, value))
+        else:
+            self.state_backend.save(self.check_name, state, key, value)
+        self._last_state[key] = state
+    
+    @contextmanager
+    def deferred_states(self):
+        """
+        Acumula los save_state() del bloque y los escribe al salir en una
+        sola transacción del backend.
+        
+        Así la transacción no queda abierta mientras el check mide y
+        alerta: solo cubre las escrituras de después. check_runner.py
+        sale de los de todos los checks dentro de un mismo batch(), y
+        los batch() anidados de SQLite comparten esa transacción.
+        """
+        self._deferred_states = []
+        try:
+            yield
+        finally:
+            states, self._deferred_states = self._deferred_states, None
+            if states:
+                with self.state_backend.batch():
+                    for state, key, value in states:
+                        self.state_backend.save(self.check_name, state, key, value)
+    
+    def window_for(self, key: str = None, metric: str = None) -> RollingWindow:
+        """Devuelve (creándola si hace falta) la ventana de una métrica."""
+        window = self._windows.get((key, metric))
+        if window is None:
+            window = self._windows[(key, metric)] = RollingWindow(self.window_size)
+        return window
+    
+    def evaluate(
+        self,
+        value: float,
+        warning: float,
+        critical: float,
+        inverted: bool = False,
+        key: str = None,
+        metric: str = None
+    ) -> State:
+        """
+        Decide el estado a partir de las últimas muestras, no solo de una.
+        
+        Cada muestra se clasifica con histéresis respecto al estado
+        anterior y se guarda en la ventana; el estado resultante es el
+        más grave alcanzado por al menos ALERT_MIN_SAMPLES de las últimas
+        ALERT_WINDOW muestras. Mientras la ventana se llena (o en una
+        ejecución suelta desde cron) basta con las muestras disponibles.
+        
+        Args:
+            value: Valor de la métrica
+            warning: Threshold de warning
+            critical: Threshold de critical
+            inverted: Si True, valores más bajos son peores (ej: memoria)
+            key: Objetivo dentro del check (ej: mountpoint)
+            metric: Nombre de la métrica si el check evalúa varias por clave
+        
+        Returns:
+            Estado (OK/WARNING/CRITICAL)
+        """
+        previous = self.load_last_state(key)
+        state = classify(value, warning, critical, inverted, previous, self.hysteresis)
+        
+        window = self.window_for(key, metric)
+        window.append(value, LEVELS.index(state))
+        
+        if window.capacity > 1:
+            logging.info(
+                f"Ventana {metric or self.check_name}: {len(window)}/{window.capacity} "
+                f"muestras (min {window.min:g}, media {window.mean:.1f}, max {window.max:g})"
+            )
+        
+        required = min(self.min_samples, len(window))
+        state = LEVELS[window.sustained_level(required)]
+        self._track_proximity(value, warning, critical, state)
+        return state
+    
+    def _track_proximity(self, value: float, warning: float, critical: float, state: State) -> None:
+        """Guarda la menor distancia relativa a un threshold de esta ejecución."""
+        if state != "OK":
+            distance = 0.0
+        else:
+            # Un threshold infinito (regla sin critical) no cuenta
+            distances = [abs(value - t) / abs(t) for t in (warning, critical) if t and math.isfinite(t)]
+            distance = min(distances, default=float("inf"))
+        if self._closest is None or distance < self._closest:
+            self._closest = distance
+    
+    def next_interval(self) -> float:
+        """
+        Segundos hasta la próxima ejecución en check_runner.py.
+        
+        Sin ADAPTIVE_MARGIN es siempre `interval`. Con él depende de lo
+        cerca que quedó del threshold la métrica más próxima de la
+        última ejecución.
+        """
+        closest, self._closest = self._closest, None
+        if self.adaptive_margin <= 0 or closest is None:
+            return self.interval
+        if closest <= self.adaptive_margin:
+            return self.interval / self.adaptive_factor
+        if closest >= self.adaptive_margin * self.adaptive_far:
+            return self.interval * self.adaptive_factor
+        return self.interval
+    
+    def run(self) -> int:
+        """
+        Ejecuta el check una vez.
+        
+        Returns:
+            Exit code (0 OK, 1 WARNING, 2 CRITICAL o error)
+        """
+        raise NotImplementedError(
+            f"{type(self).__name__} debe implementar run()"
+        )
+    
+    def run_check(self) -> int:
+        """
+        Ejecuta run() midiendo su duración, que acompaña a los eventos
+        de estado del log.
+        
+        Returns:
+            Exit code de run()
+        """
+        self._run_started = time.monotonic()
+        try:
+            return self.run()
+        finally:
+            self._run_started = None
     
     def handle_state_change(
         self, 
         current_state: State, 
         metric_name: str, 
-        metric_value: str
+        metric_value: str,
+        key: str = None,
+        details: str = None
     ) -> int:
         """
         Maneja cambios de estado y envía alertas.
@@ -80,15 +382,34 @@ class BaseCheck:
             current_state: Estado actual (OK/WARNING/CRITICAL)
             metric_name: Nombre de la métrica (ej: "Uso de disco")
             metric_value: Valor de la métrica (ej: "85%")
+            key: Objetivo dentro del check (ej: mountpoint), con estado propio
+            details: Contexto extra para la alerta (ej: procesos responsables)
         
         Returns:
             Exit code apropiado (0, 1, o 2)
         """
-        last_state = self.load_last_state()
+        last_state = self.load_last_state(key)
+        duration = None
+        if self._run_started is not None:
+            duration = round(time.monotonic() - self._run_started, 4)
         
         logging.info(f"Estado anterior: {last_state}")
-        logging.info(f"Estado actual: {current_state}")
+        logging.info(
+            f"Estado actual: {current_state}",
+            extra={
+                "event": "state",
+                "check": self.check_name,
+                "key": key,
+                "state": current_state,
+                "previous_state": last_state,
+                "metric": metric_name,
+                "value": metric_value,
+                "duration": duration,
+            }
+        )
         logging.info(f"{metric_name}: {metric_value}")
+        if details:
+            logging.info(details)
         
         # Detectar si debe alertar
         should_alert = (
@@ -107,20 +428,24 @@ class BaseCheck:
             logging.info("DEBUG: entrando en send_alert (ALERTA)")
             send_alert(
                 title=f"{current_state}: {metric_name}",
-                message=f"{metric_name}: {metric_value}",
+                message=f"{metric_name}: {metric_value}" + (f"\n{details}" if details else ""),
                 level=current_state
             )
         
         if should_recovery:
             logging.info("DEBUG: entrando en send_alert (RECOVERY)")
+            target = self.check_name.title() if key is None else f"{self.check_name.title()} {key}"
             send_alert(
-                title=f"RECOVERY: {self.check_name.title()} OK",
+                title=f"RECOVERY: {target} OK",
                 message=f"{metric_name} normalizado: {metric_value}",
                 level="OK"
             )
         
         # Guardar estado
-        self.save_state(current_state)
+        self.save_state(current_state, key, metric_value)
+        
+        if self.result_sink is not None:
+            self.result_sink.record(self.check_name, current_state, metric_value, key)
         
         # Retornar exit code apropiado
         if current_state == "OK":
@@ -130,6 +455,20 @@ class BaseCheck:
         else:  # CRITICAL
             return 2
     
+    def validate_interval(self, interval: int) -> None:
+        """
+        Valida que el intervalo entre ejecuciones sea positivo.
+        
+        Args:
+            interval: Segundos entre ejecuciones en check_runner.py
+        """
+        if interval <= 0:
+            logging.error(
+                f"El intervalo de {self.check_name} ({interval}s) debe ser "
+                f"mayor que 0 (CHECK_INTERVAL / {self.check_name.upper()}_INTERVAL)"
+            )
+            sys.exit(2)
+    
     def validate_thresholds(
         self, 
         warning: int, 
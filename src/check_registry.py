@@ -0,0 +1,459 @@
+#!/usr/bin/env python3
+"""
+Registro declarativo de checks.
+
+Los checks se declaran en config/checks.toml (CHECKS_CONFIG): cada
+entrada indica una fuente de métricas, sus reglas (métrica, comparador
+y thresholds) y el mensaje de la alerta. Añadir un check es añadir una
+entrada, no copiar un script.
+
+En cada ciclo del runner las fuentes se leen una sola vez (Snapshot) y
+todos los checks se evalúan contra esa lectura: el coste de recolección
+crece con el número de fuentes, no con el de checks.
+"""
+
+import logging
+import math
+import os
+import sys
+import tomllib
+from typing import NamedTuple
+
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+from base_check import BaseCheck, get_setting
+from rolling_window import LEVELS
+from collectors import (
+    DISK_DISCOVERY,
+    read_disk_usage,
+    read_all_mounts_usage,
+    mount_table_from_env,
+    read_meminfo,
+    memory_usage_from_meminfo,
+    read_pressure,
+    CpuSampler,
+    DiskIOSampler,
+    NetIOSampler,
+    RunDelaySampler,
+    PROC_SCHEDSTAT,
+    read_loadavg,
+    online_cpus,
+    load_per_cpu,
+    ProcessSampler,
+    TOP_PROCESSES,
+    format_processes,
+)
+from cpu_check import CORE_SATURATION, CORE_SATURATION_SECONDS, CoreSaturation
+
+CHECKS_CONFIG = os.environ.get(
+    "CHECKS_CONFIG",
+    os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "config", "checks.toml")
+)
+
+DISK_PATH = os.environ.get("DISK_PATH", "/")
+
+# Comparador -> inverted (ver classify): ">=" alerta al superar, "<" al bajar
+COMPARATORS = {">=": False, "<": True}
+
+
+class Snapshot:
+    """
+    Lectura de las fuentes compartida por todos los checks de un ciclo.
+
+    Cada fuente se lee como mucho una vez entre dos clear(); un error
+    también se memoriza, así una fuente rota no se reintenta por cada
+    check que la usa. Lo mismo con los detalles de las alertas: si cpu
+    y load alertan en el mismo ciclo comparten una pasada por /proc (una
+    segunda mediría el % de CPU sobre unos milisegundos). Los objetos
+    con estado entre ciclos (samplers, tabla de montajes) se guardan
+    con keep().
+    """
+
+    def __init__(self):
+        self._values = {}
+        self._details = {}
+        self._objects = {}
+        # Fuente -> lecturas reales (para logs y tests)
+        self.reads = {}
+
+    def clear(self) -> None:
+        """Empieza un ciclo nuevo: la próxima get() vuelve a leer."""
+        self._values.clear()
+        self._details.clear()
+
+    def keep(self, name: str, factory):
+        """Devuelve un objeto persistente entre ciclos, creándolo la primera vez."""
+        if name not in self._objects:
+            self._objects[name] = factory()
+        return self._objects[name]
+
+    def get(self, source: str) -> dict:
+        """
+        Valores de una fuente en este ciclo.
+
+        Returns:
+            Diccionario clave -> {campo: valor}; la clave es None en las
+            fuentes con un solo objetivo
+
+        Raises:
+            OSError, ValueError: Si la fuente no se pudo leer
+        """
+        if source not in self._values:
+            try:
+                self._values[source] = SOURCES[source](self)
+            except (OSError, ValueError) as e:
+                self._values[source] = e
+            self.reads[source] = self.reads.get(source, 0) + 1
+
+        values = self._values[source]
+        if isinstance(values, Exception):
+            raise values
+        return values
+
+    def details(self, name: str) -> str:
+        """
+        Detalles de alerta (DETAILS) de este ciclo.
+
+        Raises:
+            OSError: Si /proc no se pudo leer
+        """
+        if name not in self._details:
+            try:
+                self._details[name] = DETAILS[name](self)
+            except OSError as e:
+                self._details[name] = e
+
+        details = self._details[name]
+        if isinstance(details, Exception):
+            raise details
+        return details
+
+
+# Fuentes: función(snapshot) -> {clave: {campo: valor}}
+
+def _disk_values(mountpoint: str, usage) -> dict:
+    return {
+        "mountpoint": mountpoint,
+        "use_percent": usage.use_percent,
+        "inodes_percent": usage.inodes_percent,
+        "total_bytes": usage.total_bytes,
+        "available_bytes": usage.available_bytes,
+    }
+
+
+def disk_source(snapshot: Snapshot) -> dict:
+    """DISK_PATH, o todos los montajes reales con DISK_DISCOVERY=true."""
+    if not DISK_DISCOVERY:
+        return {None: _disk_values(DISK_PATH, read_disk_usage(DISK_PATH))}
+
+    table = snapshot.keep("mount_table", mount_table_from_env)
+    return {
+        mount.mountpoint: _disk_values(mount.mountpoint, usage)
+        for mount, usage in read_all_mounts_usage(table)
+    }
+
+
+def memory_source(snapshot: Snapshot) -> dict:
+    """Todos los campos de /proc/meminfo más los derivados de `free`."""
+    fields = read_meminfo()
+    memory = memory_usage_from_meminfo(fields)
+    values = dict(fields)
+    values.update(
+        available_percent=memory.available_percent,
+        total_mb=memory.total_kb // 1024,
+        available_mb=memory.available_kb // 1024,
+        swap_total_mb=memory.swap_total_kb // 1024,
+        swap_used_mb=memory.swap_used_kb // 1024,
+    )
+    return {None: values}
+
+
+def _cpu_sampler(snapshot: Snapshot) -> CpuSampler:
+    """Sampler de CPU del proceso (por core si CPU_CORE_SATURATION > 0)."""
+    return snapshot.keep("cpu_sampler", lambda: CpuSampler(per_core=CORE_SATURATION > 0))
+
+
+def cpu_source(snapshot: Snapshot) -> dict:
+    """% por modo desde el ciclo anterior (un sampler para todo el proceso)."""
+    cpu = _cpu_sampler(snapshot).sample()
+    return {None: dict(cpu, usage=round(100 - cpu["idle"], 1))}
+
+
+def cpu_cores_source(snapshot: Snapshot) -> dict:
+    """
+    Cores saturados de forma sostenida (vacío con CPU_CORE_SATURATION=0).
+
+    Usa la misma lectura de /proc/stat que la fuente cpu y el mismo
+    seguimiento (y estado persistido) que cpu_check.py.
+    """
+    if CORE_SATURATION <= 0:
+        return {}
+    snapshot.get("cpu")
+    sampler = _cpu_sampler(snapshot)
+    if sampler.cores is None:
+        return {}
+
+    saturation = snapshot.keep("core_saturation", lambda: CoreSaturation(window=sampler.window))
+    sustained = saturation.update(sampler.cores)
+    return {None: {
+        "saturated": len(sustained),
+        "cores": ", ".join(f"cpu{cpu} {busy}%" for cpu, busy in sustained) or "ningún core",
+        "threshold": CORE_SATURATION,
+        "seconds": CORE_SATURATION_SECONDS,
+    }}
+
+
+def pressure_source(snapshot: Snapshot) -> dict:
+    """PSI aplanado: memory_some_avg10, io_full_avg60, ... (vacío sin PSI)."""
+    values = {}
+    for resource, kinds in read_pressure().items():
+        for kind, pressure in kinds.items():
+            for window, value in pressure.items():
+                values[f"{resource}_{kind}_{window}"] = value
+    return {None: values} if values else {}
+
+
+def diskio_source(snapshot: Snapshot) -> dict:
+    """IOPS, throughput, await y %util por dispositivo desde el ciclo anterior."""
+    devices = snapshot.keep("disk_io_sampler", DiskIOSampler).sample()
+    return {device: io._asdict() for device, io in devices.items()}
+
+
+def network_source(snapshot: Snapshot) -> dict:
+    """Bytes, paquetes, errores y descartes por interfaz desde el ciclo anterior."""
+    interfaces = snapshot.keep("net_io_sampler", NetIOSampler).sample()
+    return {name: net._asdict() for name, net in interfaces.items()}
+
+
+def load_source(snapshot: Snapshot) -> dict:
+    """Load average total y normalizado por CPUs online."""
+    load = read_loadavg()
+    cpus = online_cpus()
+    return {None: dict(load._asdict(), cpus=cpus, **load_per_cpu(load, cpus))}
+
+
+def schedstat_source(snapshot: Snapshot) -> dict:
+    """Espera en cola por CPU desde el ciclo anterior (vacío sin schedstats)."""
+    if not os.path.exists(PROC_SCHEDSTAT):
+        return {}
+    delays = snapshot.keep("run_delay_sampler", RunDelaySampler).sample()
+    return {cpu: delay._asdict() for cpu, delay in delays.items()}
+
+
+SOURCES = {
+    "disk": disk_source,
+    "memory": memory_source,
+    "cpu": cpu_source,
+    "cpu_cores": cpu_cores_source,
+    "pressure": pressure_source,
+    "diskio": diskio_source,
+    "network": network_source,
+    "load": load_source,
+    "schedstat": schedstat_source,
+}
+
+
+# Detalles para alertas no OK: función(snapshot) -> texto o None
+
+def top_cpu_details(snapshot: Snapshot) -> str:
+    top_cpu, _ = snapshot.keep("processes", ProcessSampler).sample()
+    return f"Top CPU: {format_processes(top_cpu)}" if top_cpu else None
+
+
+def top_rss_details(snapshot: Snapshot) -> str:
+    _, top_rss = snapshot.keep("processes", ProcessSampler).sample(cpu=False)
+    return f"Top RSS: {format_processes(top_rss, by='rss')}" if top_rss else None
+
+
+DETAILS = {
+    "top_cpu": top_cpu_details,
+    "top_rss": top_rss_details,
+}
+
+
+class Rule(NamedTuple):
+    """Regla de un check: métrica de la fuente y sus thresholds."""
+    metric: str
+    inverted: bool
+    warning: float
+    critical: float
+
+
+def parse_rule(check_name: str, rule: dict) -> Rule:
+    """
+    Construye una regla de una entrada del registro.
+
+    Raises:
+        ValueError: Si falta un campo, un threshold no es un número o
+            el comparador no existe
+    """
+    try:
+        metric = rule["metric"]
+        comparator = rule["comparator"]
+        warning = rule["warning"]
+    except KeyError as e:
+        raise ValueError(f"Check {check_name}: falta {e} en una regla") from None
+
+    if comparator not in COMPARATORS:
+        raise ValueError(
+            f"Check {check_name}: comparador '{comparator}' inválido "
+            f"(usar {' o '.join(COMPARATORS)})"
+        )
+
+    # Sin critical la regla solo llega a WARNING
+    critical = rule.get("critical", -math.inf if comparator == "<" else math.inf)
+
+    for level, threshold in (("warning", warning), ("critical", critical)):
+        # bool es un int para Python, pero `warning = true` es un error
+        if not isinstance(threshold, (int, float)) or isinstance(threshold, bool):
+            raise ValueError(
+                f"Check {check_name}: {level} de {metric} debe ser un número, "
+                f"no {threshold!r}"
+            )
+
+    # Mismas variables y prioridades que los scripts (get_setting): env
+    # es un prefijo o una lista de ellos, de más a menos específico
+    env = rule.get("env")
+    if env:
+        prefixes = [env] if isinstance(env, str) else list(env)
+        if not all(isinstance(prefix, str) for prefix in prefixes):
+            raise ValueError(f"Check {check_name}: env debe ser un texto o una lista de textos")
+        generic = rule.get("generic", True)
+        warning = get_setting(prefixes[0], "WARNING", warning,
+                              fallbacks=prefixes[1:], generic=generic)
+        critical = get_setting(prefixes[0], "CRITICAL", critical,
+                               fallbacks=prefixes[1:], generic=generic)
+
+    return Rule(metric, COMPARATORS[comparator], warning, critical)
+
+
+class RegistryCheck(BaseCheck):
+    """Check definido por una entrada del registro."""
+
+    def __init__(self, entry: dict, snapshot: Snapshot):
+        """
+        Args:
+            entry: Entrada [[checks]] del TOML
+            snapshot: Snapshot compartido por todos los checks del ciclo
+
+        Raises:
+            ValueError: Si la entrada es inválida
+        """
+        name = entry.get("name")
+        if not name:
+            raise ValueError("Hay un check sin name en el registro")
+        super().__init__(name)
+
+        self.snapshot = snapshot
+        self.source = entry.get("source")
+        if self.source not in SOURCES:
+            raise ValueError(f"Check {name}: fuente '{self.source}' desconocida")
+
+        self.title = entry.get("title", name)
+        self.label = entry.get("label", name)
+        self.message = entry.get("message", "")
+        self.optional = entry.get("optional", False)
+
+        self.details = entry.get("details")
+        if self.details is not None and self.details not in DETAILS:
+            raise ValueError(f"Check {name}: details '{self.details}' desconocido")
+
+        rules = entry.get("rules")
+        if not rules:
+            raise ValueError(f"Check {name}: necesita al menos una regla")
+        self.rules = [parse_rule(name, rule) for rule in rules]
+        for rule in self.rules:
+            self.validate_thresholds(rule.warning, rule.critical, inverted=rule.inverted)
+
+        if "interval" in entry:
+            self.interval = int(os.environ.get(f"{name.upper()}_INTERVAL", entry["interval"]))
+            if self.interval <= 0:
+                raise ValueError(f"Check {name}: interval debe ser mayor que 0")
+
+    def run(self) -> int:
+        logging.info(
+            f"Chequeando {self.label} ("
+            + ", ".join(
+                f"{r.metric} {'<' if r.inverted else '>='} {r.warning:g}/{r.critical:g}"
+                for r in self.rules
+            )
+            + ")"
+        )
+
+        try:
+            targets = self.snapshot.get(self.source)
+        except (OSError, ValueError) as e:
+            logging.error(f"Error leyendo la fuente {self.source}: {e}")
+            return 2
+
+        if not targets:
+            if self.optional:
+                logging.info(f"Fuente {self.source} sin datos, check omitido")
+                return 0
+            logging.error(f"La fuente {self.source} no devolvió ningún objetivo")
+            return 2
+
+        # Exit code: el peor de todos los objetivos
+        return max(self.check_target(key, values) for key, values in targets.items())
+
+    def check_target(self, key, values: dict) -> int:
+        """Evalúa las reglas sobre un objetivo y gestiona su estado."""
+        try:
+            states = [
+                self.evaluate(values[rule.metric], rule.warning, rule.critical,
+                              inverted=rule.inverted, key=key, metric=rule.metric)
+                for rule in self.rules
+            ]
+            message = self.message.format(key=key, **values)
+        except KeyError as e:
+            logging.error(f"La fuente {self.source} no tiene el campo {e}")
+            return 2
+
+        current_state = max(states, key=LEVELS.index)
+        metric_name = self.title if key is None else f"{self.title} {key}"
+
+        details = None
+        if current_state != "OK" and self.details and TOP_PROCESSES > 0:
+            try:
+                details = self.snapshot.details(self.details)
+            except OSError as e:
+                logging.error(f"Error leyendo procesos de /proc: {e}")
+
+        return self.handle_state_change(current_state, metric_name, message, key, details)
+
+
+def load_registry(path: str = CHECKS_CONFIG, snapshot: Snapshot = None, names: str = "") -> list:
+    """
+    Carga los checks declarados en un TOML.
+
+    Args:
+        path: Ruta del registro
+        snapshot: Snapshot compartido (por defecto uno nuevo)
+        names: Solo estos checks, separados por comas (vacío = todos)
+
+    Returns:
+        Lista de RegistryCheck que comparten el mismo Snapshot
+
+    Raises:
+        ValueError: Si el registro es inválido
+    """
+    with open(path, "rb") as f:
+        try:
+            config = tomllib.load(f)
+        except tomllib.TOMLDecodeError as e:
+            raise ValueError(f"{path}: {e}") from None
+
+    snapshot = snapshot or Snapshot()
+    wanted = {n.strip() for n in names.split(",") if n.strip()}
+
+    checks = []
+    for entry in config.get("checks", []):
+        if wanted and entry.get("name") not in wanted:
+            continue
+        checks.append(RegistryCheck(entry, snapshot))
+
+    seen = set()
+    for check in checks:
+        if check.check_name in seen:
+            raise ValueError(f"Check {check.check_name} duplicado en {path}")
+        seen.add(check.check_name)
+    return checks
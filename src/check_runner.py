@@ -0,0 +1,266 @@
+#!/usr/bin/env python3
+"""
+Runner de checks en un solo proceso.
+
+Sustituye a los tres procesos que lanza cron cada 5 minutos:
+carga los checks una vez y ejecuta cada uno según su propio
+intervalo (CHECK_INTERVAL o <CHECK>_INTERVAL). El estado vive en
+memoria y se sigue persistiendo con save_state.
+
+Los checks salen del registro declarativo (config/checks.toml, ver
+check_registry.py) y comparten una lectura de las fuentes por ciclo.
+Con --modules se cargan en su lugar los scripts <nombre>_check.py.
+
+Uso:
+    python3 src/check_runner.py            # daemon
+    python3 src/check_runner.py --once     # una pasada, exit code = peor resultado
+    python3 src/check_runner.py --modules  # scripts en lugar del registro
+"""
+
+import argparse
+import contextlib
+import heapq
+import importlib
+import inspect
+import logging
+import os
+import signal
+import sys
+import threading
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+from base_check import BaseCheck
+from check_registry import CHECKS_CONFIG, Snapshot, load_registry
+from scheduler import next_deadline
+
+# Checks a cargar (vacío = todos los del registro). Con --modules cada
+# nombre corresponde al módulo <nombre>_check.py
+CHECKS = os.environ.get("CHECKS", "")
+DEFAULT_MODULES = "disk,memory,cpu"
+
+
+def load_checks(names: str = CHECKS or DEFAULT_MODULES) -> list:
+    """
+    Importa los módulos de checks e instancia sus subclases de BaseCheck.
+
+    Args:
+        names: Nombres separados por comas (disk,memory,cpu)
+
+    Returns:
+        Lista de instancias de checks
+    """
+    checks = []
+    for name in (n.strip() for n in names.split(",")):
+        if not name:
+            continue
+
+        module = importlib.import_module(f"{name}_check")
+
+        for _, cls in inspect.getmembers(module, inspect.isclass):
+            if (
+                issubclass(cls, BaseCheck)
+                and cls is not BaseCheck
+                and cls.__module__ == module.__name__
+            ):
+                checks.append(cls())
+    return checks
+
+
+class CheckRunner:
+    """
+    Planificador de checks dentro de un solo proceso.
+
+    Cada check se ejecuta cada `check.next_interval()` segundos (su
+    intervalo, o el adaptativo con <CHECK>_ADAPTIVE_MARGIN) y su exit
+    code queda disponible en `results` con la misma semántica que en cron.
+    Las ejecuciones que un retraso se salta se cuentan en `missed`.
+    """
+
+    def __init__(self, checks: list, snapshot: Snapshot = None, clock=time.monotonic):
+        self.checks = checks
+        self.clock = clock
+        self.results = {}
+        # Lectura de fuentes compartida por los checks del registro:
+        # se renueva en cada ciclo
+        self.snapshot = snapshot
+        self.missed = {check.check_name: 0 for check in checks}
+        self._stop = threading.Event()
+
+        # Cola de prioridad (próxima ejecución, orden, check)
+        now = clock()
+        self._queue = [(now, i, check) for i, check in enumerate(checks)]
+        heapq.heapify(self._queue)
+
+    def run_check(self, check: BaseCheck) -> int:
+        """
+        Ejecuta un check aislando sus errores del resto.
+
+        Returns:
+            Exit code del check (2 si falla de forma inesperada)
+        """
+        start = time.monotonic()
+        try:
+            exit_code = getattr(check, "run_check", check.run)()
+        except SystemExit as e:
+            exit_code = e.code if isinstance(e.code, int) else 2
+        except Exception as e:
+            logging.error(f"Error ejecutando check {check.check_name}: {e}")
+            exit_code = 2
+        duration = time.monotonic() - start
+
+        logging.info(
+            f"Check {check.check_name} terminado en {duration:.3f}s (exit {exit_code})",
+            extra={
+                "event": "run",
+                "check": check.check_name,
+                "duration": round(duration, 4),
+                "exit_code": exit_code,
+            }
+        )
+
+        self.results[check.check_name] = exit_code
+        return exit_code
+
+    @contextlib.contextmanager
+    def cycle_states(self):
+        """
+        Escribe los estados de todos los checks de un ciclo en una sola
+        transacción por backend.
+
+        Los save_state() se acumulan mientras los checks miden y alertan
+        (deferred_states) y se vuelcan al terminar el ciclo, así la
+        transacción tampoco queda abierta durante las mediciones.
+        """
+        deferred = contextlib.ExitStack()
+        for check in self.checks:
+            deferred.enter_context(getattr(check, "deferred_states", contextlib.nullcontext)())
+        try:
+            yield
+        finally:
+            # Normalmente todos los checks comparten el backend del proceso
+            backends = {}
+            for check in self.checks:
+                backend = getattr(check, "state_backend", None)
+                if backend is not None:
+                    backends[id(backend)] = backend
+            with contextlib.ExitStack() as batches:
+                for backend in backends.values():
+                    batches.enter_context(backend.batch())
+                deferred.close()
+
+    def run_once(self) -> dict:
+        """
+        Ejecuta todos los checks una vez.
+
+        Returns:
+            Diccionario check -> exit code
+        """
+        if self.snapshot is not None:
+            self.snapshot.clear()
+
+        with self.cycle_states():
+            for check in self.checks:
+                self.run_check(check)
+        return dict(self.results)
+
+    def run_pending(self, now: float) -> float:
+        """
+        Ejecuta los checks cuyo turno ha llegado.
+
+        Se ejecutan los checks que tocaban en `now`; el siguiente turno
+        de cada uno se calcula con el reloj tras ejecutarlo, así lo que
+        tardan los anteriores de la misma pasada cuenta como retraso.
+
+        Args:
+            now: Tiempo monotónico actual
+
+        Returns:
+            Tiempo monotónico de la próxima ejecución
+        """
+        if not self._queue or self._queue[0][0] > now:
+            return self._queue[0][0] if self._queue else now + 1
+
+        if self.snapshot is not None:
+            self.snapshot.clear()
+
+        with self.cycle_states():
+            while self._queue and self._queue[0][0] <= now:
+                due, order, check = heapq.heappop(self._queue)
+                self.run_check(check)
+
+                # Si vamos con retraso no encadenar ejecuciones atrasadas:
+                # saltar a la siguiente de la rejilla y contarlas
+                finished = max(now, self.clock())
+                next_run, missed = next_deadline(due, check.next_interval(), finished)
+                if missed:
+                    self.missed[check.check_name] += missed
+                    logging.warning(
+                        f"Check {check.check_name}: {missed} ejecuciones saltadas por retraso"
+                    )
+                heapq.heappush(self._queue, (next_run, order, check))
+
+        return self._queue[0][0] if self._queue else now + 1
+
+    def run_forever(self) -> None:
+        """Bucle principal hasta que se llame a stop()."""
+        while not self._stop.is_set():
+            next_run = self.run_pending(self.clock())
+            self._stop.wait(max(next_run - self.clock(), 0))
+
+    def stop(self, *_) -> None:
+        """Detiene el bucle principal (usable como handler de señal)."""
+        self._stop.set()
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Runner de checks en un solo proceso")
+    parser.add_argument(
+        "--once",
+        action="store_true",
+        help="Ejecutar todos los checks una vez y salir con el peor exit code"
+    )
+    parser.add_argument(
+        "--modules",
+        action="store_true",
+        help="Cargar los scripts <nombre>_check.py en lugar del registro"
+    )
+    args = parser.parse_args()
+
+    snapshot = None
+    try:
+        if args.modules:
+            checks = load_checks(CHECKS or DEFAULT_MODULES)
+        else:
+            snapshot = Snapshot()
+            checks = load_registry(CHECKS_CONFIG, snapshot, CHECKS)
+    except SystemExit:
+        logging.error("Configuración de thresholds o intervalos inválida, abortando")
+        raise
+    except (OSError, ValueError) as e:
+        logging.error(f"Registro de checks inválido ({CHECKS_CONFIG}): {e}")
+        sys.exit(2)
+
+    runner = CheckRunner(checks, snapshot=snapshot)
+
+    if args.once:
+        results = runner.run_once()
+        sys.exit(max(results.values(), default=0))
+
+    signal.signal(signal.SIGTERM, runner.stop)
+
+    logging.info(
+        "Iniciando runner con checks: "
+        + ", ".join(f"{c.check_name} ({c.interval}s)" for c in checks)
+    )
+
+    try:
+        runner.run_forever()
+    except KeyboardInterrupt:
+        logging.info("Deteniendo runner por interrupción del usuario")
+
+    logging.info(f"Últimos resultados: {runner.results}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,151 @@
+#!/usr/bin/env python3
+"""
+Ejecución concurrente de collectors con deadline por collector.
+
+Un collector lento (ej: statvfs sobre un NFS colgado) no bloquea al
+resto: cada ciclo se lanzan todos en un pool acotado, se espera a cada
+uno hasta su deadline y el que no responde se marca como stale. Mientras
+siga colgado no se vuelve a encolar, y se sirve su último valor bueno.
+"""
+
+import logging
+import os
+import time
+from concurrent.futures import ThreadPoolExecutor, TimeoutError
+
+COLLECTOR_TIMEOUT = float(os.environ.get("COLLECTOR_TIMEOUT", "5"))
+
+
+def is_valid(value) -> bool:
+    """
+    Indica si un collector devolvió un valor utilizable.
+    Los collectors devuelven -1 o None cuando fallan.
+    """
+    if value is None:
+        return False
+    if isinstance(value, (int, float)) and value < 0:
+        return False
+    return True
+
+
+class CollectorPool:
+    """
+    Pool acotado de collectors con aislamiento por timeout.
+
+    Atributos públicos tras cada collect():
+        values: último valor bueno de cada collector
+        stale: True si el valor servido no es de este ciclo
+        updated_at: instante (monotónico) del último valor bueno
+        last_success: timestamp (epoch) del último valor bueno
+        error_count: errores acumulados (excepción o valor inválido)
+        timeout_count: deadlines superados acumulados
+    """
+
+    def __init__(
+        self,
+        collectors: dict,
+        timeout: float = COLLECTOR_TIMEOUT,
+        timeouts: dict = None,
+        max_workers: int = None,
+        on_duration=None
+    ):
+        """
+        Args:
+            collectors: Diccionario nombre -> función sin argumentos
+            timeout: Deadline por defecto en segundos
+            timeouts: Deadlines específicos por collector
+            max_workers: Tamaño del pool (por defecto uno por collector,
+                así un collector colgado nunca retrasa a otro)
+            on_duration: Función (nombre, segundos) que recibe la duración
+                de cada ejecución, también la de los que acaban tarde
+        """
+        self.collectors = collectors
+        self.on_duration = on_duration
+        self.timeouts = {name: timeout for name in collectors}
+        self.timeouts.update(timeouts or {})
+
+        self._executor = ThreadPoolExecutor(
+            max_workers=max_workers or len(collectors),
+            thread_name_prefix="collector"
+        )
+        # Futures que superaron su deadline y siguen ejecutándose
+        self._hung = {}
+
+        self.values = {}
+        self.stale = {name: True for name in collectors}
+        self.updated_at = {}
+        self.last_success = {}
+        self.error_count = {name: 0 for name in collectors}
+        self.timeout_count = {name: 0 for name in collectors}
+
+    def _timed(self, name: str, func):
+        """Ejecuta un collector midiendo su duración (en el hilo del pool)."""
+        start = time.perf_counter()
+        try:
+            return func()
+        finally:
+            if self.on_duration is not None:
+                self.on_duration(name, time.perf_counter() - start)
+
+    def collect(self) -> dict:
+        """
+        Ejecuta todos los collectors en paralelo y espera a cada uno
+        como máximo hasta su deadline.
+
+        Returns:
+            Diccionario nombre -> último valor bueno
+        """
+        start = time.monotonic()
+        futures = {}
+
+        for name, func in self.collectors.items():
+            hung = self._hung.get(name)
+            if hung is not None:
+                if not hung.done():
+                    # Sigue colgado: no encolar otra llamada detrás
+                    self.stale[name] = True
+                    continue
+                del self._hung[name]
+            futures[name] = self._executor.submit(self._timed, name, func)
+
+        # Esperar por orden de deadline; todos corren en paralelo, así
+        # que el ciclo dura como mucho el deadline más largo
+        for name in sorted(futures, key=self.timeouts.get):
+            future = futures[name]
+            remaining = start + self.timeouts[name] - time.monotonic()
+
+            try:
+                value = future.result(timeout=max(remaining, 0))
+            except TimeoutError:
+                logging.warning(
+                    f"Collector {name} superó su deadline de "
+                    f"{self.timeouts[name]}s, sirviendo último valor"
+                )
+                self._hung[name] = future
+                self.stale[name] = True
+                self.timeout_count[name] += 1
+                continue
+            except Exception as e:
+                logging.error(f"Error en collector {name}: {e}")
+                value = None
+
+            if is_valid(value):
+                self.values[name] = value
+                self.updated_at[name] = time.monotonic()
+                self.last_success[name] = time.time()
+                self.stale[name] = False
+            else:
+                self.stale[name] = True
+                self.error_count[name] += 1
+
+        return self.values
+
+    def age(self, name: str) -> float:
+        """Segundos desde el último valor bueno (inf si nunca lo hubo)."""
+        if name not in self.updated_at:
+            return float("inf")
+        return time.monotonic() - self.updated_at[name]
+
+    def shutdown(self) -> None:
+        """Libera el pool sin esperar a collectors colgados."""
+        self._executor.shutdown(wait=False, cancel_futures=True)
@@ -0,0 +1,1064 @@
+#!/usr/bin/env python3
+"""
+Collectors nativos de métricas del sistema.
+Leen os.statvfs, /proc/meminfo, /proc/stat, /proc/pressure,
+/proc/diskstats, /proc/net/dev, /proc/loadavg, /proc/schedstat y
+/proc/[pid]/stat directamente, sin lanzar subprocesos (df, free, top,
+ps, iostat, sar, uptime).
+
+Los usan tanto los checks de cron como metrics_exporter.py.
+"""
+
+import fnmatch
+import heapq
+import operator
+import os
+import re
+import select
+import time
+from array import array
+from itertools import repeat
+from typing import NamedTuple
+
+PROC_MEMINFO = "/proc/meminfo"
+PROC_STAT = "/proc/stat"
+PROC_MOUNTS = "/proc/self/mounts"
+PROC_PRESSURE = "/proc/pressure"
+PROC_DISKSTATS = "/proc/diskstats"
+PROC_NET_DEV = "/proc/net/dev"
+PROC_LOADAVG = "/proc/loadavg"
+# Solo existe con CONFIG_SCHEDSTATS
+PROC_SCHEDSTAT = "/proc/schedstat"
+
+# Recursos con Pressure Stall Information (kernel >= 4.20 con CONFIG_PSI)
+PRESSURE_RESOURCES = ("cpu", "memory", "io")
+
+# Descubrimiento de montajes (disk_check.py y metrics_exporter.py)
+DISK_DISCOVERY = os.environ.get("DISK_DISCOVERY", "false").lower() == "true"
+DISK_MOUNTS_INCLUDE = os.environ.get("DISK_MOUNTS_INCLUDE", "")
+DISK_MOUNTS_EXCLUDE = os.environ.get("DISK_MOUNTS_EXCLUDE", "")
+
+_MOUNT_ESCAPE = re.compile(r"\\([0-7]{3})")
+
+# Filesystems sin almacenamiento real que no tiene sentido vigilar
+PSEUDO_FILESYSTEMS = frozenset({
+    "autofs", "binfmt_misc", "bpf", "cgroup", "cgroup2", "configfs",
+    "debugfs", "devpts", "devtmpfs", "efivarfs", "fusectl", "hugetlbfs",
+    "mqueue", "nsfs", "overlay", "proc", "pstore", "ramfs", "rpc_pipefs",
+    "securityfs", "squashfs", "sysfs", "tmpfs", "tracefs", "fuse.lxcfs",
+    "fuse.portal", "fuse.gvfsd-fuse",
+})
+
+# Ventana de muestreo de CPU para checks de una sola ejecución
+CPU_SAMPLE_WINDOW = float(os.environ.get("CPU_SAMPLE_WINDOW", "0.25"))
+
+CPU_MODES = (
+    "user", "nice", "system", "idle", "iowait", "irq", "softirq", "steal"
+)
+
+# Dispositivos de bloque e interfaces que no se vigilan (patrones fnmatch)
+DISKSTATS_EXCLUDE = os.environ.get("DISKSTATS_EXCLUDE", "loop*,ram*,zram*,fd*,sr*")
+NET_DEVICES_EXCLUDE = os.environ.get("NET_DEVICES_EXCLUDE", "lo")
+
+# Tamaño de sector de /proc/diskstats (siempre 512, sea cual sea el disco)
+SECTOR_SIZE = 512
+
+# Procesos: cuántos se exportan/citan en alertas (top N por CPU y por RSS)
+PROC_DIR = "/proc"
+TOP_PROCESSES = int(os.environ.get("TOP_PROCESSES", "5"))
+
+# Antigüedad máxima de la muestra anterior para calcular % de CPU por delta
+PROCESS_SAMPLE_MAX_AGE = float(os.environ.get("PROCESS_SAMPLE_MAX_AGE", "60"))
+
+CLK_TCK = os.sysconf("SC_CLK_TCK")
+PAGE_SIZE = os.sysconf("SC_PAGE_SIZE")
+
+
+class DiskUsage(NamedTuple):
+    """Uso de un filesystem, calculado igual que `df` (e `df -i`)."""
+    total_bytes: int
+    used_bytes: int
+    available_bytes: int
+    use_percent: int
+    inodes_total: int = 0
+    inodes_used: int = 0
+    inodes_percent: int = 0
+
+
+class PerCoreCpu(NamedTuple):
+    """
+    Porcentajes por core y modo, guardados por columnas.
+
+    columns[mode][i] es el porcentaje del modo en el core cpus[i].
+    """
+    cpus: tuple
+    columns: dict
+
+    def busy(self) -> list:
+        """Porcentaje ocupado de cada core (todo menos idle e iowait)."""
+        free = map(operator.add, self.columns["idle"], self.columns["iowait"])
+        return list(map(operator.sub, repeat(100.0), free))
+
+
+class DiskIO(NamedTuple):
+    """Actividad de un dispositivo de bloque (como `iostat -x`)."""
+    reads_per_sec: float
+    writes_per_sec: float
+    read_bytes_per_sec: float
+    write_bytes_per_sec: float
+    read_await_ms: float
+    write_await_ms: float
+    util_percent: float
+    in_progress: int
+
+
+class NetIO(NamedTuple):
+    """Tráfico de una interfaz de red (como `sar -n DEV,EDEV`)."""
+    rx_bytes_per_sec: float
+    tx_bytes_per_sec: float
+    rx_packets_per_sec: float
+    tx_packets_per_sec: float
+    rx_errors_per_sec: float
+    tx_errors_per_sec: float
+    rx_drops_per_sec: float
+    tx_drops_per_sec: float
+
+
+class LoadAverage(NamedTuple):
+    """Carga de /proc/loadavg y tareas ejecutables/totales."""
+    load1: float
+    load5: float
+    load15: float
+    runnable: int
+    tasks: int
+
+
+class RunDelay(NamedTuple):
+    """Espera en la cola de ejecución de una CPU (de /proc/schedstat)."""
+    # Segundos de espera de tareas por segundo de reloj (1.0 = en media
+    # siempre hay una tarea esperando en esa CPU)
+    delay_per_sec: float
+    # Espera media por timeslice
+    avg_wait_ms: float
+
+
+class Mount(NamedTuple):
+    """Entrada de /proc/mounts."""
+    device: str
+    mountpoint: str
+    fstype: str
+
+
+class MemoryUsage(NamedTuple):
+    """Memoria total y disponible (columna 'available' de `free`) y swap."""
+    total_kb: int
+    available_kb: int
+    available_percent: float
+    swap_total_kb: int = 0
+    swap_free_kb: int = 0
+
+    @property
+    def swap_used_kb(self) -> int:
+        return self.swap_total_kb - self.swap_free_kb
+
+
+def read_disk_usage(path: str) -> DiskUsage:
+    """
+    Lee el uso de disco de un path con os.statvfs.
+
+    El porcentaje se calcula como `df`: usado / (usado + disponible
+    para usuarios no root), redondeado hacia arriba.
+
+    Raises:
+        OSError: Si el path no existe o no se puede consultar
+    """
+    st = os.statvfs(path)
+
+    total = st.f_blocks * st.f_frsize
+    used = (st.f_blocks - st.f_bfree) * st.f_frsize
+    available = st.f_bavail * st.f_frsize
+
+    denominator = used + available
+    if denominator == 0:
+        use_percent = 0
+    else:
+        # Redondeo hacia arriba con enteros, igual que df
+        use_percent = -(-used * 100 // denominator)
+
+    # Algunos filesystems (btrfs, vfat) no tienen inodos fijos: f_files = 0
+    inodes_used = st.f_files - st.f_ffree
+    if st.f_files == 0:
+        inodes_percent = 0
+    else:
+        inodes_percent = -(-inodes_used * 100 // st.f_files)
+
+    return DiskUsage(
+        total, used, available, use_percent,
+        st.f_files, inodes_used, inodes_percent
+    )
+
+
+def _unescape_mount_field(field: str) -> str:
+    """Deshace el escapado octal de /proc/mounts (ej: \\040 = espacio)."""
+    if "\\" not in field:
+        return field
+    return _MOUNT_ESCAPE.sub(lambda m: chr(int(m.group(1), 8)), field)
+
+
+def parse_mounts(text: str) -> list:
+    """
+    Parsea el contenido de /proc/mounts.
+
+    Returns:
+        Lista de Mount en el orden del archivo
+    """
+    mounts = []
+    for line in text.splitlines():
+        parts = line.split()
+        if len(parts) < 3:
+            continue
+        mounts.append(Mount(
+            parts[0],
+            _unescape_mount_field(parts[1]),
+            parts[2]
+        ))
+    return mounts
+
+
+def _split_patterns(value: str) -> tuple:
+    return tuple(p.strip() for p in value.split(",") if p.strip())
+
+
+def filter_mounts(mounts: list, include=(), exclude=()) -> list:
+    """
+    Filtra pseudo-filesystems y aplica listas include/exclude.
+
+    Args:
+        mounts: Lista de Mount
+        include: Patrones fnmatch de mountpoints a vigilar (vacío = todos)
+        exclude: Patrones fnmatch de mountpoints a ignorar
+
+    Returns:
+        Montajes reales, uno por dispositivo (sin bind mounts repetidos)
+    """
+    seen_devices = set()
+    selected = []
+    for mount in mounts:
+        if mount.fstype in PSEUDO_FILESYSTEMS:
+            continue
+        if include and not any(fnmatch.fnmatch(mount.mountpoint, p) for p in include):
+            continue
+        if any(fnmatch.fnmatch(mount.mountpoint, p) for p in exclude):
+            continue
+        if mount.device in seen_devices:
+            continue
+        seen_devices.add(mount.device)
+        selected.append(mount)
+    return selected
+
+
+class MountTable:
+    """
+    Tabla de montajes cacheada.
+
+    /proc/mounts solo se vuelve a parsear cuando cambia: el kernel
+    marca el descriptor con POLLPRI/POLLERR al montar o desmontar.
+    """
+
+    def __init__(self, include=(), exclude=(), path: str = PROC_MOUNTS):
+        self.include = include
+        self.exclude = exclude
+        self._file = open(path, "rb")
+        self._poller = select.poll()
+        self._poller.register(self._file, select.POLLPRI | select.POLLERR)
+        self._signature = None
+        self._mounts = None
+
+    def _changed(self) -> bool:
+        events = self._poller.poll(0)
+        if any(ev & (select.POLLPRI | select.POLLERR) for _, ev in events):
+            return True
+        # Archivos normales (tests) no notifican por poll: usar mtime/size
+        st = os.fstat(self._file.fileno())
+        return (st.st_mtime_ns, st.st_size) != self._signature
+
+    def mounts(self) -> list:
+        """Devuelve los montajes filtrados, releyendo solo si hubo cambios."""
+        if self._mounts is None or self._changed():
+            self._file.seek(0)
+            text = self._file.read().decode()
+            st = os.fstat(self._file.fileno())
+            self._signature = (st.st_mtime_ns, st.st_size)
+            self._mounts = filter_mounts(
+                parse_mounts(text), self.include, self.exclude
+            )
+        return self._mounts
+
+    def close(self) -> None:
+        self._file.close()
+
+
+def mount_table_from_env() -> MountTable:
+    """Crea la tabla de montajes con DISK_MOUNTS_INCLUDE/EXCLUDE."""
+    return MountTable(
+        include=_split_patterns(DISK_MOUNTS_INCLUDE),
+        exclude=_split_patterns(DISK_MOUNTS_EXCLUDE)
+    )
+
+
+def read_all_mounts_usage(table: MountTable) -> list:
+    """
+    Lee bytes e inodos de todos los montajes reales en una pasada.
+
+    Los montajes que fallan (ej: NFS caído, permisos) se omiten.
+
+    Returns:
+        Lista de tuplas (Mount, DiskUsage)
+    """
+    results = []
+    for mount in table.mounts():
+        try:
+            results.append((mount, read_disk_usage(mount.mountpoint)))
+        except OSError:
+            continue
+    return results
+
+
+def parse_meminfo(text: str) -> dict:
+    """
+    Parsea el contenido de /proc/meminfo.
+
+    Returns:
+        Diccionario campo -> valor (en kB para los campos con unidad)
+    """
+    fields = {}
+    for line in text.splitlines():
+        name, sep, rest = line.partition(":")
+        if not sep:
+            continue
+        parts = rest.split()
+        if parts:
+            fields[name] = int(parts[0])
+    return fields
+
+
+def read_meminfo() -> dict:
+    """Lee y parsea /proc/meminfo."""
+    with open(PROC_MEMINFO) as f:
+        return parse_meminfo(f.read())
+
+
+def memory_usage_from_meminfo(fields: dict) -> MemoryUsage:
+    """
+    Calcula la memoria disponible a partir de los campos de meminfo.
+
+    Raises:
+        ValueError: Si faltan MemTotal o MemAvailable
+    """
+    try:
+        total_kb = fields["MemTotal"]
+        available_kb = fields["MemAvailable"]
+    except KeyError as e:
+        raise ValueError(f"Campo ausente en meminfo: {e}") from None
+
+    if total_kb <= 0:
+        raise ValueError("MemTotal inválido en meminfo")
+
+    available_percent = round((available_kb / total_kb) * 100, 1)
+    return MemoryUsage(
+        total_kb, available_kb, available_percent,
+        fields.get("SwapTotal", 0), fields.get("SwapFree", 0)
+    )
+
+
+def read_memory_usage() -> MemoryUsage:
+    """Lee la memoria disponible desde /proc/meminfo."""
+    return memory_usage_from_meminfo(read_meminfo())
+
+
+def meminfo_bytes(fields: dict) -> dict:
+    """
+    Convierte los campos de meminfo a bytes.
+
+    Los contadores sin unidad (HugePages_Total, HugePages_Free...) no
+    son tamaños y se dejan fuera; Hugepagesize sí está en kB.
+    """
+    return {
+        name: value * 1024
+        for name, value in fields.items()
+        if not name.startswith("HugePages_")
+    }
+
+
+def parse_pressure(text: str) -> dict:
+    """
+    Parsea un archivo de /proc/pressure.
+
+    Ejemplo de línea: "some avg10=1.53 avg60=0.87 avg300=0.20 total=123456"
+
+    Returns:
+        Diccionario tipo ("some"/"full") -> {"avg10", "avg60", "avg300"
+        en %, "total" en microsegundos}
+    """
+    pressure = {}
+    for line in text.splitlines():
+        kind, _, rest = line.partition(" ")
+        if not rest:
+            continue
+        values = {}
+        for item in rest.split():
+            name, _, value = item.partition("=")
+            values[name] = int(value) if name == "total" else float(value)
+        pressure[kind] = values
+    return pressure
+
+
+def read_pressure(pressure_dir: str = PROC_PRESSURE) -> dict:
+    """
+    Lee la presión de CPU, memoria e IO.
+
+    Returns:
+        Diccionario recurso -> parse_pressure(); vacío si el kernel no
+        tiene PSI. Un recurso ilegible se omite.
+    """
+    pressure = {}
+    for resource in PRESSURE_RESOURCES:
+        try:
+            pressure[resource] = parse_pressure(
+                _read_small(f"{pressure_dir}/{resource}").decode()
+            )
+        except OSError:
+            continue
+    return pressure
+
+
+def parse_cpu_times(text: str) -> tuple:
+    """
+    Extrae los contadores agregados de la línea 'cpu' de /proc/stat.
+
+    Returns:
+        Tupla de jiffies: user, nice, system, idle, iowait, irq,
+        softirq, steal (guest y guest_nice ya están incluidos en user)
+
+    Raises:
+        ValueError: Si no se encuentra la línea 'cpu'
+    """
+    for line in text.splitlines():
+        if line.startswith("cpu "):
+            values = [int(v) for v in line.split()[1:9]]
+            # Kernels antiguos no tienen steal
+            values.extend([0] * (8 - len(values)))
+            return tuple(values)
+    raise ValueError("No se encontró la línea 'cpu' en /proc/stat")
+
+
+def read_cpu_times() -> tuple:
+    """Lee los contadores agregados de CPU desde /proc/stat."""
+    with open(PROC_STAT) as f:
+        return parse_cpu_times(f.read())
+
+
+def parse_per_cpu_times(text: str) -> tuple:
+    """
+    Extrae los contadores de /proc/stat: el agregado y los de cada core.
+
+    Los contadores por core se devuelven en un único array plano
+    (core0 modo0..7, core1 modo0..7, ...) para poder calcular los
+    deltas de todos los cores con una sola operación.
+
+    Returns:
+        Tupla (agregado, ids de cores, array plano de jiffies)
+    """
+    aggregate = None
+    cpus = []
+    flat = array("Q")
+    n_modes = len(CPU_MODES)
+
+    for line in text.splitlines():
+        if not line.startswith("cpu"):
+            # Las líneas cpu* van siempre al principio de /proc/stat
+            if cpus:
+                break
+            continue
+        parts = line.split()
+        values = [int(v) for v in parts[1:n_modes + 1]]
+        values.extend([0] * (n_modes - len(values)))
+        if parts[0] == "cpu":
+            aggregate = tuple(values)
+        else:
+            cpus.append(parts[0][3:])
+            flat.extend(values)
+
+    if aggregate is None:
+        raise ValueError("No se encontró la línea 'cpu' en /proc/stat")
+    return aggregate, tuple(cpus), flat
+
+
+def read_per_cpu_times() -> tuple:
+    """Lee los contadores agregados y por core desde /proc/stat."""
+    with open(PROC_STAT) as f:
+        return parse_per_cpu_times(f.read())
+
+
+def per_core_percentages(cpus: tuple, before: array, after: array) -> PerCoreCpu:
+    """
+    Calcula el porcentaje de cada modo en cada core entre dos lecturas.
+
+    Todo el cálculo se hace por columnas (un modo de todos los cores a
+    la vez) con map/operator, que iteran en C: el número de pasadas en
+    Python depende de los modos (8), no de los cores.
+    """
+    n_modes = len(CPU_MODES)
+    deltas = array("q", map(operator.sub, after, before))
+
+    # Una columna por modo: deltas[m::n] son los jiffies del modo m en cada core
+    columns = [deltas[m::n_modes] for m in range(n_modes)]
+
+    totals = columns[0]
+    for column in columns[1:]:
+        totals = list(map(operator.add, totals, column))
+    # Cores sin jiffies nuevos (o contadores reiniciados): evitar división por 0
+    totals = list(map(max, totals, repeat(1)))
+
+    percents = {}
+    for mode, column in zip(CPU_MODES, columns):
+        scaled = map(operator.mul, map(max, column, repeat(0)), repeat(100.0))
+        percents[mode] = list(map(operator.truediv, scaled, totals))
+
+    return PerCoreCpu(cpus, percents)
+
+
+def cpu_percentages(before: tuple, after: tuple) -> dict:
+    """
+    Calcula el porcentaje de cada modo de CPU entre dos lecturas.
+
+    Como `top`, el idle no incluye iowait.
+
+    Returns:
+        Diccionario modo -> porcentaje, o None si no hay delta
+        (dos lecturas dentro del mismo jiffy)
+    """
+    deltas = [max(b - a, 0) for a, b in zip(before, after)]
+    total = sum(deltas)
+    if total <= 0:
+        return None
+    return {
+        mode: round(delta * 100 / total, 1)
+        for mode, delta in zip(CPU_MODES, deltas)
+    }
+
+
+class CpuSampler:
+    """
+    Sampler incremental de CPU basado en deltas de /proc/stat.
+
+    Guarda los contadores de la lectura anterior y calcula los
+    porcentajes sobre el intervalo transcurrido desde entonces.
+    En un proceso de larga duración (exporter) cada llamada a
+    sample() es una sola lectura de /proc/stat. La primera llamada,
+    o un check de una sola ejecución, usa una ventana corta acotada.
+    """
+
+    def __init__(self, window: float = CPU_SAMPLE_WINDOW, per_core: bool = False):
+        """
+        Args:
+            window: Segundos de la ventana de muestreo inicial
+            per_core: Calcular también los porcentajes de cada core
+                (quedan en self.cores tras cada sample())
+        """
+        self.window = window
+        self.per_core = per_core
+        self.cores = None
+        self._previous = None
+        self._previous_cores = None
+        self._previous_cpus = None
+        self._last = None
+
+    def _read(self) -> tuple:
+        if self.per_core:
+            return read_per_cpu_times()
+        return read_cpu_times(), None, None
+
+    def sample(self) -> dict:
+        """
+        Devuelve los porcentajes por modo desde la última muestra.
+
+        Raises:
+            OSError, ValueError: Si /proc/stat no se puede leer
+        """
+        current, cpus, current_cores = self._read()
+
+        if self._previous is None:
+            time.sleep(self.window)
+            self._previous, self._previous_cores = current, current_cores
+            self._previous_cpus = cpus
+            current, cpus, current_cores = self._read()
+
+        percentages = cpu_percentages(self._previous, current)
+        if percentages is None:
+            # Sin jiffies nuevos: conservar la referencia y el último valor
+            if self._last is not None:
+                return self._last
+            percentages = {mode: 0.0 for mode in CPU_MODES}
+            percentages["idle"] = 100.0
+            return percentages
+
+        if self.per_core:
+            # Cores añadidos o retirados (hotplug): no hay delta comparable.
+            # Se comparan los ids, no cuántos hay: uno que sale y otro que
+            # entra dejan el mismo número de cores
+            if self._previous_cores is not None and cpus == self._previous_cpus:
+                self.cores = per_core_percentages(cpus, self._previous_cores, current_cores)
+            else:
+                self.cores = None
+            self._previous_cores, self._previous_cpus = current_cores, cpus
+
+        self._previous = current
+        self._last = percentages
+        return percentages
+
+    def sample_window(self, window: float = None) -> dict:
+        """
+        Mide la CPU durante una ventana acotada (checks de una ejecución).
+        """
+        if window is not None:
+            self.window = window
+        self._previous = None
+        return self.sample()
+
+
+class CounterRates:
+    """
+    Convierte contadores acumulados en tasas por segundo.
+
+    Motor común de /proc/diskstats y /proc/net/dev: recibe en cada
+    update() los contadores de todos los dispositivos y devuelve la
+    tasa de cada uno desde la llamada anterior, medida con reloj
+    monotónico.
+
+    - Vuelta de contador: si un valor baja se asume que dio la vuelta
+      (a 2**32 si el valor anterior cabía en 32 bits, si no a 2**64).
+      Si ni así sale un delta plausible es un reinicio del contador y
+      el dispositivo vuelve a empezar sin tasa.
+    - Hot-plug: un dispositivo nuevo no tiene tasa hasta su segunda
+      muestra; uno que desaparece se olvida.
+    """
+
+    def __init__(self, clock=time.monotonic):
+        self.clock = clock
+        self._previous = {}
+        self._previous_at = None
+
+    @staticmethod
+    def delta(before: int, after: int):
+        """Diferencia entre dos lecturas de un contador, o None si se reinició."""
+        diff = after - before
+        if diff >= 0:
+            return diff
+        wrap = 2 ** 32 if before < 2 ** 32 else 2 ** 64
+        diff += wrap
+        return diff if diff < wrap // 2 else None
+
+    def update(self, counters: dict) -> dict:
+        """
+        Args:
+            counters: Clave (dispositivo) -> tupla de contadores
+
+        Returns:
+            Clave -> tupla de tasas por segundo, solo para los
+            dispositivos con una muestra anterior comparable
+        """
+        now = self.clock()
+        elapsed = now - self._previous_at if self._previous_at is not None else 0
+        previous = self._previous
+
+        rates = {}
+        if elapsed > 0:
+            for key, values in counters.items():
+                before = previous.get(key)
+                if before is None or len(before) != len(values):
+                    continue
+                deltas = [self.delta(b, a) for b, a in zip(before, values)]
+                if None in deltas:
+                    continue
+                rates[key] = tuple(d / elapsed for d in deltas)
+
+        # Con elapsed 0 (dos lecturas en el mismo tick) se conserva la referencia
+        if elapsed > 0 or self._previous_at is None:
+            self._previous = counters
+            self._previous_at = now
+        return rates
+
+
+def _excluded(name: str, patterns: tuple) -> bool:
+    return any(fnmatch.fnmatch(name, p) for p in patterns)
+
+
+def parse_diskstats(text: str, exclude=()) -> tuple:
+    """
+    Parsea /proc/diskstats.
+
+    Returns:
+        Tupla (contadores, en curso): dispositivo -> (lecturas,
+        sectores leídos, ms leyendo, escrituras, sectores escritos,
+        ms escribiendo, ms con IO) y dispositivo -> peticiones en curso
+    """
+    counters = {}
+    in_progress = {}
+    for line in text.splitlines():
+        fields = line.split()
+        if len(fields) < 14 or _excluded(fields[2], exclude):
+            continue
+        device = fields[2]
+        counters[device] = (
+            int(fields[3]), int(fields[5]), int(fields[6]),
+            int(fields[7]), int(fields[9]), int(fields[10]),
+            int(fields[12]),
+        )
+        in_progress[device] = int(fields[11])
+    return counters, in_progress
+
+
+def disk_io_from_rates(rates: tuple, in_progress: int) -> DiskIO:
+    """Calcula IOPS, throughput, await y utilización a partir de las tasas."""
+    reads, sectors_read, ms_reading, writes, sectors_written, ms_writing, ms_io = rates
+    return DiskIO(
+        round(reads, 2),
+        round(writes, 2),
+        round(sectors_read * SECTOR_SIZE, 1),
+        round(sectors_written * SECTOR_SIZE, 1),
+        round(ms_reading / reads, 2) if reads else 0.0,
+        round(ms_writing / writes, 2) if writes else 0.0,
+        # ms con IO por segundo de reloj: 1000 ms/s = 100%
+        round(min(ms_io / 10, 100.0), 1),
+        in_progress,
+    )
+
+
+def parse_net_dev(text: str, exclude=()) -> dict:
+    """
+    Parsea /proc/net/dev.
+
+    Returns:
+        Interfaz -> (rx bytes, tx bytes, rx paquetes, tx paquetes,
+        rx errores, tx errores, rx descartes, tx descartes)
+    """
+    counters = {}
+    for line in text.splitlines()[2:]:
+        name, sep, rest = line.partition(":")
+        name = name.strip()
+        if not sep or _excluded(name, exclude):
+            continue
+        fields = rest.split()
+        if len(fields) < 16:
+            continue
+        counters[name] = (
+            int(fields[0]), int(fields[8]),
+            int(fields[1]), int(fields[9]),
+            int(fields[2]), int(fields[10]),
+            int(fields[3]), int(fields[11]),
+        )
+    return counters
+
+
+def parse_loadavg(text: str) -> LoadAverage:
+    """
+    Parsea /proc/loadavg ("0.34 0.28 0.25 2/72 15162").
+
+    Raises:
+        ValueError: Si el formato no es el esperado
+    """
+    fields = text.split()
+    runnable, _, tasks = fields[3].partition("/")
+    return LoadAverage(float(fields[0]), float(fields[1]), float(fields[2]), int(runnable), int(tasks))
+
+
+def read_loadavg() -> LoadAverage:
+    """Lee /proc/loadavg."""
+    return parse_loadavg(_read_small(PROC_LOADAVG).decode())
+
+
+def online_cpus() -> int:
+    """CPUs online ahora mismo (cambia con hot-plug)."""
+    return os.sysconf("SC_NPROCESSORS_ONLN") or 1
+
+
+def load_per_cpu(load: LoadAverage, cpus: int) -> dict:
+    """
+    Load average normalizado por CPUs online: los thresholds valen igual
+    para 2 que para 64 cores.
+
+    Returns:
+        Diccionario load1_per_cpu, load5_per_cpu y load15_per_cpu
+    """
+    return {
+        "load1_per_cpu": round(load.load1 / cpus, 2),
+        "load5_per_cpu": round(load.load5 / cpus, 2),
+        "load15_per_cpu": round(load.load15 / cpus, 2),
+    }
+
+
+def parse_schedstat(text: str) -> dict:
+    """
+    Parsea las líneas cpuN de /proc/schedstat (versión 15).
+
+    Returns:
+        CPU ("0", "1"...) -> (ns ejecutando, ns esperando en cola, timeslices)
+    """
+    counters = {}
+    for line in text.splitlines():
+        if not line.startswith("cpu"):
+            continue
+        fields = line.split()
+        if len(fields) < 10:
+            continue
+        counters[fields[0][3:]] = (int(fields[7]), int(fields[8]), int(fields[9]))
+    return counters
+
+
+class _RateSampler:
+    """
+    Base de los samplers de contadores: una lectura del archivo por
+    sample() y, en la primera, una segunda lectura tras `window`.
+    """
+
+    path = None
+
+    def __init__(self, window: float = CPU_SAMPLE_WINDOW, exclude: str = ""):
+        self.window = window
+        self.exclude = _split_patterns(exclude)
+        self.rates = CounterRates()
+        self._sampled = False
+
+    def _read(self) -> str:
+        with open(self.path) as f:
+            return f.read()
+
+    def _update(self) -> dict:
+        raise NotImplementedError
+
+    def sample(self) -> dict:
+        """
+        Raises:
+            OSError, ValueError: Si el archivo no se puede leer
+        """
+        if not self._sampled:
+            self._update()
+            self._sampled = True
+            time.sleep(self.window)
+        return self._update()
+
+
+class DiskIOSampler(_RateSampler):
+    """IOPS, throughput, await y utilización por dispositivo desde /proc/diskstats."""
+
+    path = PROC_DISKSTATS
+
+    def __init__(self, window: float = CPU_SAMPLE_WINDOW, exclude: str = DISKSTATS_EXCLUDE):
+        super().__init__(window, exclude)
+
+    def _update(self) -> dict:
+        counters, in_progress = parse_diskstats(self._read(), self.exclude)
+        return {
+            device: disk_io_from_rates(rates, in_progress[device])
+            for device, rates in self.rates.update(counters).items()
+        }
+
+
+class RunDelaySampler(_RateSampler):
+    """Espera en cola por CPU desde /proc/schedstat."""
+
+    path = PROC_SCHEDSTAT
+
+    def _update(self) -> dict:
+        counters = parse_schedstat(self._read())
+        result = {}
+        for cpu, (_, delay_ns, slices) in self.rates.update(counters).items():
+            result[cpu] = RunDelay(
+                round(delay_ns / 1e9, 3),
+                round(delay_ns / slices / 1e6, 3) if slices else 0.0,
+            )
+        return result
+
+
+class NetIOSampler(_RateSampler):
+    """Bytes, paquetes, errores y descartes por interfaz desde /proc/net/dev."""
+
+    path = PROC_NET_DEV
+
+    def __init__(self, window: float = CPU_SAMPLE_WINDOW, exclude: str = NET_DEVICES_EXCLUDE):
+        super().__init__(window, exclude)
+
+    def _update(self) -> dict:
+        counters = parse_net_dev(self._read(), self.exclude)
+        return {
+            name: NetIO(*(round(rate, 2) for rate in rates))
+            for name, rates in self.rates.update(counters).items()
+        }
+
+
+class ProcessUsage(NamedTuple):
+    pid: int
+    name: str
+    cpu_percent: float
+    rss_bytes: int
+
+
+def parse_pid_stat(data: bytes) -> tuple:
+    """
+    Extrae lo necesario de /proc/[pid]/stat sin parsear toda la línea.
+
+    El nombre (comm) va entre paréntesis y puede contener espacios o
+    paréntesis, así que se corta por el último ')'. De lo que sigue solo
+    se separan los primeros campos (hasta rss) y el resto se ignora.
+
+    Returns:
+        Tupla (comm en bytes, ticks user+system, starttime, rss en páginas)
+    """
+    start = data.index(b"(")
+    end = data.rindex(b")")
+    # Tras ") ": state(0) ... utime(11) stime(12) ... starttime(19) vsize(20) rss(21)
+    fields = data[end + 2:].split(b" ", 22)
+    return (
+        data[start + 1:end],
+        int(fields[11]) + int(fields[12]),
+        int(fields[19]),
+        int(fields[21]),
+    )
+
+
+def _read_small(path: str) -> bytes:
+    """Lectura directa con os.open/os.read (sin objetos de archivo)."""
+    fd = os.open(path, os.O_RDONLY)
+    try:
+        return os.read(fd, 1024)
+    finally:
+        os.close(fd)
+
+
+class ProcessSampler:
+    """
+    Top N de procesos por CPU y por RSS a partir de /proc/[pid]/stat.
+
+    Cada pasada lee un solo archivo pequeño por proceso (stat incluye
+    ya la RSS, no hace falta statm) y guarda los ticks de cada pid para
+    calcular el % de CPU por delta con la pasada anterior. starttime
+    distingue un pid reutilizado por otro proceso. Los nombres solo se
+    decodifican para los procesos del top.
+    """
+
+    def __init__(
+        self,
+        top_n: int = TOP_PROCESSES,
+        proc_dir: str = PROC_DIR,
+        window: float = CPU_SAMPLE_WINDOW,
+        max_age: float = PROCESS_SAMPLE_MAX_AGE
+    ):
+        """
+        Args:
+            top_n: Procesos a devolver en cada ranking
+            proc_dir: Raíz de /proc (configurable para tests)
+            window: Espera entre dos pasadas si no hay una anterior válida
+            max_age: Si la pasada anterior es más vieja, se descarta
+        """
+        self.top_n = top_n
+        self.proc_dir = proc_dir
+        self.window = window
+        self.max_age = max_age
+        # pid -> (starttime, ticks) de la pasada anterior
+        self._previous = {}
+        self._previous_at = None
+
+    def scan(self) -> list:
+        """
+        Lee todos los procesos una vez.
+
+        Returns:
+            Lista de tuplas (pid, comm, ticks, starttime, rss_pages)
+        """
+        processes = []
+        with os.scandir(self.proc_dir) as entries:
+            for entry in entries:
+                name = entry.name
+                if not name.isdigit():
+                    continue
+                try:
+                    comm, ticks, starttime, rss = parse_pid_stat(
+                        _read_small(f"{self.proc_dir}/{name}/stat")
+                    )
+                except (OSError, ValueError, IndexError):
+                    # El proceso terminó durante la pasada (o stat ilegible)
+                    continue
+                processes.append((int(name), comm, ticks, starttime, rss))
+        return processes
+
+    def sample(self, cpu: bool = True) -> tuple:
+        """
+        Devuelve los procesos que más CPU y más memoria usan.
+
+        Args:
+            cpu: Calcular también el ranking de CPU (necesita dos pasadas;
+                si la anterior no sirve se hace otra tras `window`)
+
+        Returns:
+            Tupla (top por CPU, top por RSS), listas de ProcessUsage
+        """
+        processes = self.scan()
+        now = time.monotonic()
+
+        if cpu and (self._previous_at is None or now - self._previous_at > self.max_age):
+            self._remember(processes, now)
+            time.sleep(self.window)
+            processes = self.scan()
+            now = time.monotonic()
+
+        top_cpu = []
+        if cpu:
+            elapsed = now - self._previous_at
+            previous = self._previous
+            scale = 100 / (CLK_TCK * elapsed) if elapsed > 0 else 0
+
+            def cpu_percent(proc):
+                before = previous.get(proc[0])
+                # Proceso nuevo o pid reutilizado: sin delta comparable
+                if before is None or before[0] != proc[3]:
+                    return 0.0
+                return (proc[2] - before[1]) * scale
+
+            ranked = heapq.nlargest(
+                self.top_n,
+                ((cpu_percent(p), p) for p in processes),
+                key=operator.itemgetter(0)
+            )
+            top_cpu = [
+                ProcessUsage(p[0], p[1].decode(errors="replace"), round(percent, 1), p[4] * PAGE_SIZE)
+                for percent, p in ranked if percent > 0
+            ]
+            self._remember(processes, now)
+
+        ranked = heapq.nlargest(self.top_n, processes, key=operator.itemgetter(4))
+        top_rss = [
+            ProcessUsage(p[0], p[1].decode(errors="replace"), 0.0, p[4] * PAGE_SIZE)
+            for p in ranked
+        ]
+        return top_cpu, top_rss
+
+    def _remember(self, processes: list, now: float) -> None:
+        # Se reemplaza entero: los pids que ya no existen desaparecen
+        self._previous = {p[0]: (p[3], p[2]) for p in processes}
+        self._previous_at = now
+
+
+def format_processes(processes: list, by: str = "cpu") -> str:
+    """
+    Resume un top de procesos para mensajes de alerta.
+
+    Args:
+        processes: Lista de ProcessUsage
+        by: "cpu" (muestra % de CPU) o "rss" (muestra memoria)
+    """
+    if by == "cpu":
+        items = (f"{p.name} ({p.pid}) {p.cpu_percent}%" for p in processes)
+    else:
+        items = (f"{p.name} ({p.pid}) {p.rss_bytes / 1024 ** 2:.0f}MB" for p in processes)
+    return ", ".join(items)
@@ -5,86 +5,272 @@ Autor: Iriome
 Fecha: 02/02/2026
 """
 
-import subprocess
 import sys
 import os
-import re
+import json
+import time
 import logging
 
-from base_check import BaseCheck
+from base_check import BaseCheck, STATE_DIR, get_threshold
+from collectors import (
+    CPU_SAMPLE_WINDOW,
+    CpuSampler,
+    ProcessSampler,
+    TOP_PROCESSES,
+    format_processes,
+)
+from sample_cache import cached_cpu
 
 # Configuración
-WARNING_THRESHOLD = int(os.environ.get("WARNING", "20"))
-CRITICAL_THRESHOLD = int(os.environ.get("CRITICAL", "10"))
+WARNING_THRESHOLD = get_threshold("cpu", "WARNING", "20")
+CRITICAL_THRESHOLD = get_threshold("cpu", "CRITICAL", "10")
 
-def main():
-    check = BaseCheck("cpu")
+# Saturación por core: % ocupado a partir del cual un core está saturado
+# (0 = desactivado) y durante cuántos segundos debe mantenerse
+CORE_SATURATION = float(os.environ.get("CPU_CORE_SATURATION", "0"))
+CORE_SATURATION_SECONDS = float(os.environ.get("CPU_CORE_SATURATION_SECONDS", "30"))
+
+# Inicio de la saturación de cada core, persistido entre ejecuciones de
+# cron. Si la muestra anterior tiene más de MAX_GAP segundos se descarta;
+# por defecto el doble del periodo de cron (5 min), para que el retraso
+# normal entre ejecuciones no corte la acumulación
+CORE_SATURATION_STATE = os.environ.get(
+    "CPU_CORE_SATURATION_STATE", f"{STATE_DIR}/cpu.cores.json"
+)
+CORE_SATURATION_MAX_GAP = float(os.environ.get("CPU_CORE_SATURATION_MAX_GAP", "600"))
+
+
+class CoreSaturation:
+    """
+    Inicio de la saturación de cada core, acumulado entre muestras.
     
-    # Validar (invertido: más idle = mejor)
-    check.validate_thresholds(WARNING_THRESHOLD, CRITICAL_THRESHOLD, inverted=True)
+    Se persiste en CORE_SATURATION_STATE para que también se acumule
+    entre ejecuciones de cron. Lo usan CoreSaturationCheck y la fuente
+    cpu_cores del registro.
+    """
     
-    logging.info(
-        f"Chequeando CPU "
-        f"(warning={WARNING_THRESHOLD}% idle, "
-        f"critical={CRITICAL_THRESHOLD}% idle)"
-    )
+    def __init__(self, window: float = CPU_SAMPLE_WINDOW, path: str = None):
+        """
+        Args:
+            window: Segundos que cubre la primera muestra del proceso
+            path: Archivo de estado (por defecto CORE_SATURATION_STATE)
+        """
+        self.window = window
+        self.path = path or CORE_SATURATION_STATE
+        # Core -> instante (epoch) desde el que está saturado
+        self.since = {}
+        self._last_sample = None
+        self._loaded = False
     
-    # Ejecutar top
-    result = subprocess.run(
-        ["top", "-bn1"],
-        capture_output=True,
-        text=True
-    )
+    def load(self, now: float) -> None:
+        """
+        Recupera los inicios de saturación de la ejecución anterior.
+        
+        Se descartan si la última muestra es de hace más de
+        CPU_CORE_SATURATION_MAX_GAP segundos: no se sabe qué pasó entre
+        medias.
+        """
+        self._loaded = True
+        try:
+            with open(self.path) as f:
+                state = json.load(f)
+            updated = float(state["updated"])
+            since = {cpu: float(ts) for cpu, ts in state["since"].items()}
+        except FileNotFoundError:
+            return
+        except (OSError, ValueError, KeyError, TypeError, AttributeError) as e:
+            logging.warning(f"Estado de cores ilegible ({self.path}): {e}")
+            return
+        
+        if 0 <= now - updated <= CORE_SATURATION_MAX_GAP:
+            self.since = since
     
-    if result.returncode != 0:
-        logging.error("Fallo al ejecutar top")
-        logging.error(result.stderr.strip())
-        sys.exit(2)
+    def save(self, now: float) -> None:
+        """Persiste los inicios de saturación (escritura atómica)."""
+        tmp = f"{self.path}.tmp"
+        try:
+            with open(tmp, "w") as f:
+                json.dump({"updated": now, "since": self.since}, f)
+            os.replace(tmp, self.path)
+        except OSError as e:
+            logging.warning(f"No se pudo guardar el estado de cores: {e}")
     
-    # Buscar línea de CPU
-    cpu_line = None
-    for line in result.stdout.splitlines():
-        if "Cpu(s)" in line:
-            cpu_line = line
-            break
+    def saturated(self, cores, now: float, elapsed: float) -> list:
+        """
+        Devuelve los cores saturados de forma sostenida.
+        
+        Un core cuenta como saturado cuando su % ocupado supera
+        CPU_CORE_SATURATION durante al menos CPU_CORE_SATURATION_SECONDS,
+        acumulando entre muestras consecutivas.
+        
+        Args:
+            cores: PerCoreCpu de la última muestra
+            now: Instante actual (epoch)
+            elapsed: Segundos que cubre la muestra
+        
+        Returns:
+            Lista de tuplas (core, % ocupado)
+        """
+        sustained = []
+        for cpu, busy in zip(cores.cpus, cores.busy()):
+            if busy < CORE_SATURATION:
+                self.since.pop(cpu, None)
+                continue
+            
+            # La muestra ya cubre `elapsed` segundos saturados
+            since = self.since.setdefault(cpu, now - elapsed)
+            if now - since >= CORE_SATURATION_SECONDS:
+                sustained.append((cpu, round(busy, 1)))
+        return sustained
     
-    if cpu_line is None:
-        logging.error("No se encontró información de CPU")
-        sys.exit(2)
+    def update(self, cores, now: float = None) -> list:
+        """
+        Registra una muestra por core y persiste el estado.
+        
+        Returns:
+            Lista de tuplas (core, % ocupado) saturados de forma sostenida
+        """
+        now = now or time.time()
+        if not self._loaded:
+            self.load(now)
+        
+        if self._last_sample is None:
+            # Primera muestra del proceso: cubre la ventana del sampler
+            elapsed = self.window
+        else:
+            elapsed = now - self._last_sample
+        self._last_sample = now
+        
+        sustained = self.saturated(cores, now, elapsed)
+        self.save(now)
+        return sustained
+
+
+class CpuCheck(BaseCheck):
+    """Check de CPU idle."""
     
-    # Extraer idle con regex
-    match = re.search(r'(\d+\.?\d*)\s*id', cpu_line)
+    def __init__(self):
+        super().__init__("cpu")
+        
+        # Validar (invertido: más idle = mejor)
+        self.validate_thresholds(WARNING_THRESHOLD, CRITICAL_THRESHOLD, inverted=True)
+        
+        # En el runner el sampler vive entre ejecuciones y cada run()
+        # mide el delta desde la anterior
+        self.sampler = CpuSampler()
+        
+        # Procesos con más CPU para nombrarlos en la alerta. Solo se
+        # recorre /proc si la CPU no está OK: la primera vez con dos
+        # pasadas separadas por la ventana del sampler de CPU
+        self.process_sampler = None
+        if TOP_PROCESSES > 0:
+            self.process_sampler = ProcessSampler(window=self.sampler.window)
     
-    if not match:
-        logging.error("No se pudo extraer el valor idle")
-        logging.error(f"Línea parseada: {cpu_line}")
-        sys.exit(2)
+    def run(self) -> int:
+        logging.info(
+            f"Chequeando CPU "
+            f"(warning={WARNING_THRESHOLD}% idle, "
+            f"critical={CRITICAL_THRESHOLD}% idle)"
+        )
+        
+        # Última muestra del exporter si es reciente; si no, deltas de /proc/stat
+        cpu = cached_cpu()
+        try:
+            cpu = cpu or self.sampler.sample()
+        except (OSError, ValueError) as e:
+            logging.error(f"Error leyendo /proc/stat: {e}")
+            return 2
+        
+        idle_percent = cpu["idle"]
+        usage_percent = round(100 - idle_percent, 1)
+        
+        # Determinar estado (sostenido y con histéresis, ver evaluate)
+        current_state = self.evaluate(
+            idle_percent, WARNING_THRESHOLD, CRITICAL_THRESHOLD, inverted=True
+        )
+        
+        # Manejar estado
+        return self.handle_state_change(
+            current_state,
+            "CPU idle",
+            f"{idle_percent}% idle ({usage_percent}% uso: "
+            f"user {cpu['user']}%, system {cpu['system']}%, "
+            f"iowait {cpu['iowait']}%, steal {cpu['steal']}%)",
+            details=self.top_processes() if current_state != "OK" else None
+        )
     
-    try:
-        idle_percent = round(float(match.group(1)), 1)
-    except ValueError:
-        logging.error("Error al convertir idle a número")
-        sys.exit(2)
+    def top_processes(self) -> str:
+        """Procesos que más CPU han usado desde la muestra anterior."""
+        if self.process_sampler is None:
+            return None
+        try:
+            top_cpu, _ = self.process_sampler.sample()
+        except OSError as e:
+            logging.error(f"Error leyendo procesos de /proc: {e}")
+            return None
+        return f"Top CPU: {format_processes(top_cpu)}" if top_cpu else None
+
+
+class CoreSaturationCheck(BaseCheck):
+    """
+    Check de cores saturados (solo WARNING).
     
-    usage_percent = round(100 - idle_percent, 1)
+    Check aparte (cpu_cores) para que cron, --modules y el registro
+    compartan el mismo estado. Con CPU_CORE_SATURATION=0 no hace nada.
+    """
     
-    # Determinar estado
-    if idle_percent >= WARNING_THRESHOLD:
-        current_state = "OK"
-    elif idle_percent >= CRITICAL_THRESHOLD:
-        current_state = "WARNING"
-    else:
-        current_state = "CRITICAL"
+    def __init__(self):
+        super().__init__("cpu_cores")
+        self.sampler = CpuSampler(per_core=True)
+        self.saturation = CoreSaturation(window=self.sampler.window)
     
-    # Manejar estado
-    exit_code = check.handle_state_change(
-        current_state,
-        "CPU idle",
-        f"{idle_percent}% idle ({usage_percent}% uso)"
-    )
+    def run(self) -> int:
+        if CORE_SATURATION <= 0:
+            return 0
+        
+        logging.info(
+            f"Chequeando saturación por core "
+            f"(>= {CORE_SATURATION:g}% durante {CORE_SATURATION_SECONDS:g}s)"
+        )
+        
+        try:
+            self.sampler.sample()
+        except (OSError, ValueError) as e:
+            logging.error(f"Error leyendo /proc/stat: {e}")
+            return 2
+        
+        # Sin muestra por core (cores añadidos o retirados): esperar a la siguiente
+        if self.sampler.cores is None:
+            return 0
+        return self.check_cores(self.sampler.cores)
     
+    def check_cores(self, cores, now: float = None) -> int:
+        """Alerta (WARNING) si algún core está saturado de forma sostenida."""
+        sustained = self.saturation.update(cores, now)
+        
+        if sustained:
+            detail = ", ".join(f"cpu{cpu} {busy}%" for cpu, busy in sustained)
+            return self.handle_state_change(
+                "WARNING",
+                "Cores saturados",
+                f"{detail} durante al menos {CORE_SATURATION_SECONDS:g}s"
+            )
+        
+        return self.handle_state_change(
+            "OK",
+            "Cores saturados",
+            f"ningún core por encima de {CORE_SATURATION:g}%"
+        )
+
+
+def main():
+    # Una sola ejecución con la ventana corta acotada. La saturación por
+    # core se acumula entre ejecuciones con CORE_SATURATION_STATE
+    exit_code = CpuCheck().run_check()
+    if CORE_SATURATION > 0:
+        exit_code = max(exit_code, CoreSaturationCheck().run_check())
     sys.exit(exit_code)
 
 
 if __name__ == "__main__":
-    main()
\ No newline at end of file
+    main()
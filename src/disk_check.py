@@ -5,81 +5,113 @@ Autor: Iriome
 Fecha: 02/02/2026
 """
 
-import subprocess
 import sys
 import os
 import logging
 from base_check import *
+from collectors import (
+    DISK_DISCOVERY,
+    read_disk_usage,
+    read_all_mounts_usage,
+    mount_table_from_env,
+)
+from sample_cache import cached_disk_usage
 
 
 DISK_PATH = os.environ.get("DISK_PATH", "/")
-WARNING_THRESHOLD = int(os.environ.get("WARNING", "80"))
-CRITICAL_THRESHOLD = int(os.environ.get("CRITICAL", "90"))
+WARNING_THRESHOLD = get_threshold("disk", "WARNING", "80")
+CRITICAL_THRESHOLD = get_threshold("disk", "CRITICAL", "90")
 
-def main():
-    # Crear instancia del check
-    check = BaseCheck("disk")
-    
-    # Validar thresholds
-    check.validate_thresholds(WARNING_THRESHOLD, CRITICAL_THRESHOLD)
-    
-    # Log inicio
-    logging.info(
-        f"Chequeando disco en '{DISK_PATH}' "
-        f"(warning={WARNING_THRESHOLD}%, critical={CRITICAL_THRESHOLD}%)"
-    )
-    
-    # Ejecutar comando df
-    result = subprocess.run(
-        ["df", "-h", DISK_PATH],
-        capture_output=True,
-        text=True
-    )
-    
-    if result.returncode != 0:
-        logging.error("Fallo al ejecutar df")
-        logging.error(result.stderr.strip())
-        sys.exit(2)
-    
-    # Parsear output
-    lines = result.stdout.splitlines()
-    
-    if len(lines) < 2:
-        logging.error("Salida inesperada de df")
-        sys.exit(2)
-    
-    parts = lines[1].split()
+# Inodos: por defecto los mismos thresholds que el espacio
+INODE_WARNING_THRESHOLD = get_threshold("disk_inode", "WARNING", "80", fallbacks=("disk",))
+INODE_CRITICAL_THRESHOLD = get_threshold("disk_inode", "CRITICAL", "90", fallbacks=("disk",))
+
+
+class DiskCheck(BaseCheck):
+    """
+    Check de uso de disco (espacio e inodos).
     
-    if len(parts) < 5:
-        logging.error("No se pudo extraer Use%")
-        sys.exit(2)
+    Por defecto vigila DISK_PATH. Con DISK_DISCOVERY=true vigila todos
+    los montajes reales de /proc/mounts y cada uno alerta por separado.
+    """
     
-    # Extraer porcentaje
-    use_percent_str = parts[4]
+    def __init__(self):
+        super().__init__("disk")
+        
+        # Validar thresholds
+        self.validate_thresholds(WARNING_THRESHOLD, CRITICAL_THRESHOLD)
+        self.validate_thresholds(INODE_WARNING_THRESHOLD, INODE_CRITICAL_THRESHOLD)
+        
+        self.mount_table = mount_table_from_env() if DISK_DISCOVERY else None
     
-    try:
-        use_percent = int(use_percent_str.strip('%'))
-    except ValueError:
-        logging.error(f"Valor inválido de uso de disco: {use_percent_str}")
-        sys.exit(2)
+    def check_usage(self, mountpoint: str, usage, key: str = None) -> int:
+        """Evalúa espacio e inodos de un montaje y gestiona su estado."""
+        
+        # Determinar estado: el peor entre espacio e inodos
+        states = (
+            self.evaluate(usage.use_percent, WARNING_THRESHOLD, CRITICAL_THRESHOLD,
+                          key=key, metric="espacio"),
+            self.evaluate(usage.inodes_percent, INODE_WARNING_THRESHOLD,
+                          INODE_CRITICAL_THRESHOLD, key=key, metric="inodos"),
+        )
+        current_state = max(states, key=LEVELS.index)
+        
+        metric_name = "Uso de disco" if key is None else f"Uso de disco {mountpoint}"
+        
+        return self.handle_state_change(
+            current_state,
+            metric_name,
+            f"{usage.use_percent}% en {mountpoint} (inodos {usage.inodes_percent}%)",
+            key
+        )
     
-    # Determinar estado
-    if use_percent < WARNING_THRESHOLD:
-        current_state = "OK"
-    elif use_percent < CRITICAL_THRESHOLD:
-        current_state = "WARNING"
-    else:
-        current_state = "CRITICAL"
+    def run(self) -> int:
+        if self.mount_table is None:
+            return self.run_path()
+        return self.run_discovery()
     
-    # Manejar estado y salir
-    exit_code = check.handle_state_change(
-        current_state,
-        "Uso de disco",
-        f"{use_percent}% en {DISK_PATH}"
-    )
+    def run_path(self) -> int:
+        # Log inicio
+        logging.info(
+            f"Chequeando disco en '{DISK_PATH}' "
+            f"(warning={WARNING_THRESHOLD}%, critical={CRITICAL_THRESHOLD}%)"
+        )
+        
+        # Última muestra del exporter si es reciente; si no, statvfs
+        try:
+            usage = cached_disk_usage(DISK_PATH) or read_disk_usage(DISK_PATH)
+        except OSError as e:
+            logging.error(f"Error leyendo uso de disco en {DISK_PATH}: {e}")
+            return 2
+        
+        return self.check_usage(DISK_PATH, usage)
     
-    sys.exit(exit_code)
+    def run_discovery(self) -> int:
+        logging.info(
+            f"Chequeando disco en todos los montajes "
+            f"(warning={WARNING_THRESHOLD}%, critical={CRITICAL_THRESHOLD}%)"
+        )
+        
+        try:
+            results = read_all_mounts_usage(self.mount_table)
+        except OSError as e:
+            logging.error(f"Error leyendo /proc/mounts: {e}")
+            return 2
+        
+        if not results:
+            logging.error("No se encontró ningún montaje que vigilar")
+            return 2
+        
+        # Exit code: el peor de todos los montajes
+        return max(
+            self.check_usage(mount.mountpoint, usage, key=mount.mountpoint)
+            for mount, usage in results
+        )
+
+
+def main():
+    sys.exit(DiskCheck().run_check())
 
 
 if __name__ == "__main__":
-    main()
\ No newline at end of file
+    main()
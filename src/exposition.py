@@ -0,0 +1,231 @@
+#!/usr/bin/env python3
+"""
+Exposición de /metrics pre-renderizada.
+
+start_http_server de prometheus_client recorre el registry entero en
+cada petición. Aquí el exporter renderiza una vez por ciclo de
+recolección los payloads text y OpenMetrics (con su variante gzip) y
+el servidor HTTP solo copia bytes, así varias réplicas de Prometheus
+y los curl de turno no multiplican el coste.
+
+Cada payload lleva un ETag calculado sobre su contenido: un scraper
+que repite la petición dentro del mismo ciclo (reintentos, varias
+réplicas detrás de un balanceador) con If-None-Match recibe un 304 sin
+body. Entre ciclos el ETag cambia casi siempre, porque el render
+incluye valores que se mueven en cada recolección (edad de los
+collectors, CPU...).
+
+En modo ondemand la cache sigue al OnDemandCollector: cada petición le
+pide refrescar (recolecta solo si pasó su CACHE_TTL) y se renderiza de
+nuevo solo si hubo recolección, así los valores servidos nunca tienen
+más de CACHE_TTL. Solo una petición renderiza y el resto espera y
+reutiliza el resultado.
+"""
+
+import gzip
+import hashlib
+import logging
+import os
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import NamedTuple
+from urllib.parse import urlparse
+
+from prometheus_client import REGISTRY, CONTENT_TYPE_LATEST, generate_latest
+from prometheus_client.openmetrics.exposition import (
+    CONTENT_TYPE_LATEST as OPENMETRICS_CONTENT_TYPE,
+    generate_latest as generate_openmetrics,
+)
+
+# Nivel de gzip: los payloads se comprimen una vez por ciclo, no por petición
+GZIP_LEVEL = int(os.environ.get("METRICS_GZIP_LEVEL", "6"))
+
+FORMATS = {
+    "text": (generate_latest, CONTENT_TYPE_LATEST),
+    "openmetrics": (generate_openmetrics, OPENMETRICS_CONTENT_TYPE),
+}
+
+
+class Payload(NamedTuple):
+    body: bytes
+    content_type: str
+    encoding: str
+    etag: str
+
+
+def render(registry=REGISTRY) -> dict:
+    """
+    Serializa el registry en todos los formatos y codificaciones.
+
+    Returns:
+        (formato, codificación) -> Payload, con codificación "" o "gzip"
+    """
+    payloads = {}
+    for name, (generate, content_type) in FORMATS.items():
+        body = generate(registry)
+        digest = hashlib.blake2b(body, digest_size=12).hexdigest()
+        payloads[(name, "")] = Payload(body, content_type, "", f'"{digest}"')
+        # mtime=0: el mismo contenido da siempre los mismos bytes
+        payloads[(name, "gzip")] = Payload(
+            gzip.compress(body, GZIP_LEVEL, mtime=0), content_type, "gzip", f'"{digest}-gz"'
+        )
+    return payloads
+
+
+def negotiate(accept: str, accept_encoding: str) -> tuple:
+    """
+    Elige formato y codificación a partir de las cabeceras del scraper.
+
+    Returns:
+        Tupla (formato, codificación) como clave de render()
+    """
+    fmt = "openmetrics" if "application/openmetrics-text" in accept else "text"
+    encoding = ""
+    for item in accept_encoding.split(","):
+        coding, _, params = item.strip().partition(";")
+        if coding.strip().lower() == "gzip" and params.replace(" ", "") not in ("q=0", "q=0.0"):
+            encoding = "gzip"
+    return fmt, encoding
+
+
+def etag_matches(if_none_match: str, etag: str) -> bool:
+    """Comparación débil de If-None-Match (admite "*" y listas)."""
+    if not if_none_match:
+        return False
+    if if_none_match.strip() == "*":
+        return True
+    return any(tag.strip().removeprefix("W/") == etag for tag in if_none_match.split(","))
+
+
+class MetricsCache:
+    """
+    Último render del registry, compartido por todas las peticiones.
+    """
+
+    def __init__(self, registry=REGISTRY, source=None):
+        """
+        Args:
+            registry: Registry a serializar
+            source: Collector ondemand (con refresh() y el contador
+                `collections`); el render vale mientras no recolecte de
+                nuevo. None: hasta la siguiente llamada a refresh(), modo loop
+        """
+        self.registry = registry
+        self.source = source
+        self.renders = 0
+        self._payloads = None
+        self._generation = None
+        self._lock = threading.Lock()
+
+    def refresh(self) -> None:
+        """Renderiza de nuevo y reemplaza los payloads de una vez."""
+        with self._lock:
+            self._render()
+
+    def _render(self) -> None:
+        start = time.monotonic()
+        # La recolección que se va a serializar (si el registry recolecta
+        # otra vez durante el render, la siguiente petición renderiza)
+        generation = self.source.collections if self.source is not None else None
+        payloads = render(self.registry)
+        self._payloads = payloads
+        self._generation = generation
+        self.renders += 1
+        logging.debug(
+            f"Métricas renderizadas en {time.monotonic() - start:.4f}s "
+            f"({len(payloads[('text', '')].body)} bytes)"
+        )
+
+    def _is_fresh(self) -> bool:
+        if self._payloads is None:
+            return False
+        return self.source is None or self._generation == self.source.collections
+
+    def get(self, fmt: str = "text", encoding: str = "") -> Payload:
+        """Payload vigente, renderizando antes si no hay o hubo otra recolección."""
+        if self.source is not None:
+            self.source.refresh()
+        if not self._is_fresh():
+            with self._lock:
+                # Otra petición renderizó mientras esperábamos el lock
+                if not self._is_fresh():
+                    self._render()
+        return self._payloads[(fmt, encoding)]
+
+
+class MetricsHandler(BaseHTTPRequestHandler):
+    """Sirve /metrics desde la MetricsCache (una instancia por petición)."""
+
+    # Keep-alive: los scrapers reutilizan la conexión. Sin Nagle las
+    # cabeceras y el body (dos writes) no esperan al ACK retardado (~40 ms)
+    protocol_version = "HTTP/1.1"
+    disable_nagle_algorithm = True
+
+    cache = None
+
+    def do_GET(self):
+        self._serve(head=False)
+
+    def do_HEAD(self):
+        self._serve(head=True)
+
+    def _serve(self, head: bool):
+        if urlparse(self.path).path not in ("/", "/metrics"):
+            body = b"not found\n"
+            self.send_response(404)
+            self.send_header("Content-Type", "text/plain")
+            self.send_header("Content-Length", str(len(body)))
+            self.end_headers()
+            if not head:
+                self.wfile.write(body)
+            return
+
+        fmt, encoding = negotiate(
+            self.headers.get("Accept", ""), self.headers.get("Accept-Encoding", "")
+        )
+        payload = self.cache.get(fmt, encoding)
+
+        if etag_matches(self.headers.get("If-None-Match"), payload.etag):
+            self.send_response(304)
+            self.send_header("ETag", payload.etag)
+            self.send_header("Vary", "Accept, Accept-Encoding")
+            self.end_headers()
+            return
+
+        self.send_response(200)
+        self.send_header("Content-Type", payload.content_type)
+        if payload.encoding:
+            self.send_header("Content-Encoding", payload.encoding)
+        self.send_header("Content-Length", str(len(payload.body)))
+        self.send_header("ETag", payload.etag)
+        self.send_header("Vary", "Accept, Accept-Encoding")
+        self.end_headers()
+        if not head:
+            self.wfile.write(payload.body)
+
+    def log_message(self, format, *args):
+        # Sin una línea de log por scrape
+        pass
+
+
+def make_server(port: int, cache: MetricsCache, host: str = ""):
+    """
+    Crea el servidor de /metrics (sin arrancarlo).
+
+    Returns:
+        ThreadingHTTPServer con la cache accesible en server.cache
+    """
+    handler = type("Handler", (MetricsHandler,), {"cache": cache})
+    server = ThreadingHTTPServer((host, port), handler)
+    server.daemon_threads = True
+    server.cache = cache
+    return server
+
+
+def start_server(port: int, cache: MetricsCache, host: str = ""):
+    """Arranca el servidor en un hilo daemon y lo devuelve."""
+    server = make_server(port, cache, host)
+    thread = threading.Thread(target=server.serve_forever, name="metrics-http", daemon=True)
+    thread.start()
+    return server
@@ -0,0 +1,138 @@
+#!/usr/bin/env python3
+"""
+Script de monitoreo de carga y contención del scheduler.
+
+Dos checks con los mismos nombres y estado que las entradas "load" y
+"run_delay" de config/checks.toml:
+- load: load average de 1 minuto por CPU online (/proc/loadavg)
+- run_delay: espera en cola de cada CPU (/proc/schedstat, requiere
+  CONFIG_SCHEDSTATS); detecta colas profundas en pocos cores aunque
+  la CPU total tenga idle
+"""
+
+import sys
+import os
+import logging
+
+from base_check import BaseCheck, get_setting
+from collectors import (
+    PROC_SCHEDSTAT,
+    ProcessSampler,
+    RunDelaySampler,
+    TOP_PROCESSES,
+    format_processes,
+    load_per_cpu,
+    online_cpus,
+    read_loadavg,
+)
+
+# Sin las genéricas WARNING/CRITICAL: están pensadas para porcentajes
+LOAD_WARNING = get_setting("load", "WARNING", "1.5", generic=False)
+LOAD_CRITICAL = get_setting("load", "CRITICAL", "3", generic=False)
+
+# Segundos de espera en cola por segundo (1 = en media siempre hay una
+# tarea esperando en esa CPU)
+RUN_DELAY_WARNING = get_setting("run_delay", "WARNING", "0.5", generic=False)
+RUN_DELAY_CRITICAL = get_setting("run_delay", "CRITICAL", "1", generic=False)
+
+
+class LoadCheck(BaseCheck):
+    """Check de load average normalizado por CPUs online."""
+
+    def __init__(self):
+        super().__init__("load")
+
+        self.validate_thresholds(LOAD_WARNING, LOAD_CRITICAL)
+
+        # Procesos con más CPU para nombrarlos en la alerta (solo si no OK)
+        self.process_sampler = ProcessSampler() if TOP_PROCESSES > 0 else None
+
+    def run(self) -> int:
+        logging.info(
+            f"Chequeando carga "
+            f"(warning={LOAD_WARNING:g}, critical={LOAD_CRITICAL:g} por CPU)"
+        )
+
+        try:
+            load = read_loadavg()
+        except (OSError, ValueError, IndexError) as e:
+            logging.error(f"Error leyendo /proc/loadavg: {e}")
+            return 2
+
+        cpus = online_cpus()
+        per_cpu = load_per_cpu(load, cpus)["load1_per_cpu"]
+
+        current_state = self.evaluate(per_cpu, LOAD_WARNING, LOAD_CRITICAL)
+
+        return self.handle_state_change(
+            current_state,
+            "Carga",
+            f"{per_cpu} por CPU (load {load.load1} {load.load5} {load.load15}, "
+            f"{cpus} CPUs, {load.runnable}/{load.tasks} tareas ejecutables)",
+            details=self.top_processes() if current_state != "OK" else None
+        )
+
+    def top_processes(self) -> str:
+        """Procesos que más CPU han usado (dos pasadas por /proc)."""
+        if self.process_sampler is None:
+            return None
+        try:
+            top_cpu, _ = self.process_sampler.sample()
+        except OSError as e:
+            logging.error(f"Error leyendo procesos de /proc: {e}")
+            return None
+        return f"Top CPU: {format_processes(top_cpu)}" if top_cpu else None
+
+
+class RunDelayCheck(BaseCheck):
+    """
+    Check de espera en cola por CPU (una clave por CPU).
+
+    Sin /proc/schedstat (kernel sin CONFIG_SCHEDSTATS) no hace nada.
+    """
+
+    def __init__(self):
+        super().__init__("run_delay")
+
+        self.validate_thresholds(RUN_DELAY_WARNING, RUN_DELAY_CRITICAL)
+
+        # En el runner el sampler vive entre ejecuciones y cada run()
+        # mide la tasa desde la anterior
+        self.sampler = RunDelaySampler()
+
+    def run(self) -> int:
+        if not os.path.exists(self.sampler.path):
+            return 0
+
+        logging.info(
+            f"Chequeando espera en cola "
+            f"(warning={RUN_DELAY_WARNING:g}s/s, critical={RUN_DELAY_CRITICAL:g}s/s)"
+        )
+
+        try:
+            delays = self.sampler.sample()
+        except (OSError, ValueError) as e:
+            logging.error(f"Error leyendo {PROC_SCHEDSTAT}: {e}")
+            return 2
+
+        # Exit code: la peor CPU
+        exit_code = 0
+        for cpu, delay in delays.items():
+            current_state = self.evaluate(
+                delay.delay_per_sec, RUN_DELAY_WARNING, RUN_DELAY_CRITICAL, key=cpu
+            )
+            exit_code = max(exit_code, self.handle_state_change(
+                current_state,
+                f"Espera en cola de CPU {cpu}",
+                f"{delay.delay_per_sec}s/s de espera ({delay.avg_wait_ms}ms por timeslice)",
+                key=cpu
+            ))
+        return exit_code
+
+
+def main():
+    sys.exit(max(LoadCheck().run_check(), RunDelayCheck().run_check()))
+
+
+if __name__ == "__main__":
+    main()
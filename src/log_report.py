@@ -0,0 +1,460 @@
+#!/usr/bin/env python3
+"""
+Reporte diario a partir de los logs de los checks.
+
+Lee en una sola pasada (streaming) los logs de texto y los .gz que
+deja cleanup_logs.sh, en formato texto o JSON (LOG_FORMAT=json), y
+agrega por check y por día:
+- número de checks y de muestras por estado (OK/WARNING/CRITICAL)
+- transiciones de estado (ej: OK -> WARNING)
+- min/max y percentiles del valor de la métrica (histograma por bins)
+
+Un archivo de checkpoint guarda el offset en bytes de cada log y los
+agregados acumulados, así cada ejecución solo procesa líneas nuevas.
+
+Uso:
+    python3 src/log_report.py                 # reporte de hoy
+    python3 src/log_report.py --days 7        # últimos 7 días
+    python3 src/log_report.py --rebuild       # ignorar el checkpoint
+"""
+
+import argparse
+import glob
+import gzip
+import json
+import os
+import re
+from array import array
+from collections import Counter
+from datetime import date, timedelta
+
+LOG_DIR = os.environ.get("LOG_DIR", os.path.expanduser("~/sre-monitoring-suite/logs"))
+# Por defecto <directorio de logs>/.report_checkpoint.json
+CHECKPOINT_FILE = os.environ.get("REPORT_CHECKPOINT")
+
+# Días de agregados que se conservan en el checkpoint
+RETENTION_DAYS = int(os.environ.get("REPORT_RETENTION_DAYS", "35"))
+
+# Histograma de valores: bins de 0.1 puntos entre 0 y 100 (porcentajes)
+BIN_WIDTH = 0.1
+BIN_COUNT = 1001
+
+STATES = ("OK", "WARNING", "CRITICAL")
+
+# "2026-02-02 10:00:00 - INFO - mensaje"
+LINE_RE = re.compile(rb"^(\d{4}-\d{2}-\d{2}) \d{2}:\d{2}:\d{2} - \w+ - (.*?)\r?$")
+
+# Primera línea de cada ejecución: identifica el check
+CHECK_MARKERS = {
+    b"Chequeando disco": "disk",
+    b"Chequeando memoria": "memory",
+    b"Chequeando CPU": "cpu",
+    "Chequeando saturación por core".encode(): "cpu_cores",
+    "Chequeando presión de memoria".encode(): "memory_pressure",
+    b"Chequeando carga": "load",
+    b"Chequeando espera en cola": "run_delay",
+}
+
+# "Uso de disco: 85% en / ...", "Memoria disponible: 45% (...)", "CPU idle: 80.5% idle"
+METRIC_RE = re.compile(rb"^[^:]+: (-?\d+(?:\.\d+)?)%")
+
+
+class Histogram:
+    """Min, max y percentiles aproximados con memoria constante."""
+
+    __slots__ = ("count", "min", "max", "bins")
+
+    def __init__(self):
+        self.count = 0
+        self.min = None
+        self.max = None
+        self.bins = array("L", [0]) * BIN_COUNT
+
+    def add(self, value: float) -> None:
+        self.count += 1
+        self.min = value if self.min is None else min(self.min, value)
+        self.max = value if self.max is None else max(self.max, value)
+        index = min(max(int(round(value / BIN_WIDTH)), 0), BIN_COUNT - 1)
+        self.bins[index] += 1
+
+    def merge(self, other: "Histogram") -> None:
+        """Suma otro histograma a este (ej: varios días)."""
+        if not other.count:
+            return
+        self.count += other.count
+        self.min = other.min if self.min is None else min(self.min, other.min)
+        self.max = other.max if self.max is None else max(self.max, other.max)
+        for index, n in enumerate(other.bins):
+            if n:
+                self.bins[index] += n
+
+    def percentile(self, p: float):
+        """Percentil p (0-100) con la resolución de un bin."""
+        if not self.count:
+            return None
+        target = max(1, round(self.count * p / 100))
+        seen = 0
+        for index, n in enumerate(self.bins):
+            seen += n
+            if seen >= target:
+                # Los valores fuera de rango se acumulan en los extremos
+                return min(max(round(index * BIN_WIDTH, 1), self.min), self.max)
+        return self.max
+
+    def to_dict(self) -> dict:
+        # Solo los bins no vacíos: el checkpoint se mantiene pequeño
+        return {
+            "count": self.count,
+            "min": self.min,
+            "max": self.max,
+            "bins": {str(i): n for i, n in enumerate(self.bins) if n},
+        }
+
+    @classmethod
+    def from_dict(cls, data: dict) -> "Histogram":
+        hist = cls()
+        hist.count = data["count"]
+        hist.min = data["min"]
+        hist.max = data["max"]
+        for index, n in data["bins"].items():
+            hist.bins[int(index)] = n
+        return hist
+
+
+class CheckDay:
+    """Agregados de un check en un día."""
+
+    __slots__ = ("runs", "states", "transitions", "values", "last_state")
+
+    def __init__(self):
+        self.runs = 0
+        self.states = Counter()
+        self.transitions = Counter()
+        self.values = Histogram()
+        self.last_state = None
+
+    def merge(self, other: "CheckDay") -> None:
+        self.runs += other.runs
+        self.states.update(other.states)
+        self.transitions.update(other.transitions)
+        self.values.merge(other.values)
+        self.last_state = other.last_state or self.last_state
+
+    def to_dict(self) -> dict:
+        return {
+            "runs": self.runs,
+            "states": dict(self.states),
+            "transitions": dict(self.transitions),
+            "values": self.values.to_dict(),
+            "last_state": self.last_state,
+        }
+
+    @classmethod
+    def from_dict(cls, data: dict) -> "CheckDay":
+        stats = cls()
+        stats.runs = data["runs"]
+        stats.states.update(data["states"])
+        stats.transitions.update(data["transitions"])
+        stats.values = Histogram.from_dict(data["values"])
+        stats.last_state = data.get("last_state")
+        return stats
+
+
+class LogReport:
+    """
+    Agregador incremental de logs de checks.
+
+    `days` es un diccionario día (YYYY-MM-DD) -> check -> CheckDay y
+    `offsets` guarda por archivo hasta dónde se ha leído.
+    """
+
+    def __init__(self):
+        self.days = {}
+        self.offsets = {}
+
+    def stats(self, day: str, check: str) -> CheckDay:
+        checks = self.days.setdefault(day, {})
+        stats = checks.get(check)
+        if stats is None:
+            stats = checks[check] = CheckDay()
+        return stats
+
+    def consume(self, lines, check: str) -> None:
+        """
+        Procesa líneas de log (bytes) de un archivo.
+
+        Args:
+            lines: Iterable de líneas en bytes
+            check: Check por defecto (según el nombre del archivo); en
+                checks.log del runner lo decide cada "Chequeando ..."
+        """
+        previous_state = None
+        current = check
+
+        for raw in lines:
+            if raw.startswith(b"{"):
+                parsed = _parse_json_line(raw)
+                if parsed is None:
+                    continue
+                day, message = parsed
+            else:
+                match = LINE_RE.match(raw)
+                if match is None:
+                    continue
+                day, message = match.groups()
+
+            if message.startswith(b"Chequeando "):
+                # Un check sin marcador no se atribuye al anterior
+                current = None
+                for marker, name in CHECK_MARKERS.items():
+                    if message.startswith(marker):
+                        current = name
+                        break
+                if current is not None:
+                    self.stats(day.decode(), current).runs += 1
+                continue
+
+            if current is None:
+                continue
+
+            if message.startswith(b"Estado anterior: "):
+                previous_state = message[17:].decode(errors="replace")
+            elif message.startswith(b"Estado actual: "):
+                state = message[15:].decode(errors="replace")
+                if state not in STATES:
+                    continue
+                stats = self.stats(day.decode(), current)
+                stats.states[state] += 1
+                stats.last_state = state
+                if previous_state is not None and previous_state != state:
+                    stats.transitions[f"{previous_state} -> {state}"] += 1
+                previous_state = None
+            else:
+                metric = METRIC_RE.match(message)
+                if metric is not None:
+                    self.stats(day.decode(), current).values.add(float(metric.group(1)))
+
+    def process_file(self, path: str) -> int:
+        """
+        Procesa las líneas nuevas de un log desde el último offset.
+
+        Los .gz son logs ya rotados: si el archivo original estaba a medio
+        leer se salta la parte ya procesada y después no se vuelve a leer.
+
+        Returns:
+            Bytes (descomprimidos) procesados
+        """
+        name = os.path.basename(path)
+        check = name.split("_check.log")[0] if "_check.log" in name else None
+        st = os.stat(path)
+
+        if path.endswith(".gz"):
+            if path in self.offsets:
+                return 0
+            # Un .gz nuevo es el log original ya rotado (gzip lo borra):
+            # continuar desde donde se quedó la lectura del original
+            plain = self.offsets.pop(path[:-3], None)
+            start = plain["offset"] if plain is not None else 0
+
+            with gzip.open(path, "rb") as f:
+                f.seek(start)
+                processed = self._read(f, check, final=True)
+            self.offsets[path] = {"done": True, "size": st.st_size}
+            return processed
+
+        entry = self.offsets.get(path)
+        start = 0
+        if entry is not None and _same_file(path, entry) and st.st_size >= entry["offset"]:
+            start = entry["offset"]
+
+        with open(path, "rb") as f:
+            f.seek(start)
+            processed = self._read(f, check)
+        self.offsets[path] = {
+            "offset": start + processed,
+            "inode": st.st_ino,
+            "head": _head(path),
+        }
+        return processed
+
+    def _read(self, f, check: str, final: bool = False) -> int:
+        """
+        Consume líneas completas; devuelve los bytes consumidos.
+
+        Args:
+            final: El archivo ya no crece (.gz), la última línea cuenta
+                aunque no termine en salto de línea
+        """
+        processed = 0
+
+        def complete_lines():
+            nonlocal processed
+            for line in f:
+                # Una línea sin salto final se está escribiendo: se lee la próxima vez
+                if not line.endswith(b"\n") and not final:
+                    break
+                processed += len(line)
+                yield line.rstrip(b"\n")
+
+        self.consume(complete_lines(), check)
+        return processed
+
+    def scan(self, log_dir: str = LOG_DIR) -> int:
+        """
+        Procesa todos los logs del directorio (primero los .gz, más antiguos).
+
+        Returns:
+            Bytes procesados en total
+        """
+        paths = sorted(glob.glob(os.path.join(log_dir, "*.log.gz")), key=os.path.getmtime)
+        paths += sorted(glob.glob(os.path.join(log_dir, "*.log")))
+
+        # Olvidar archivos que ya no existen (borrados por la retención)
+        for path in list(self.offsets):
+            if not os.path.exists(path) and not os.path.exists(f"{path}.gz"):
+                del self.offsets[path]
+
+        return sum(self.process_file(path) for path in paths)
+
+    def prune(self, keep_days: int = RETENTION_DAYS, today: date = None) -> None:
+        """Descarta los agregados de días anteriores a la retención."""
+        cutoff = ((today or date.today()) - timedelta(days=keep_days)).isoformat()
+        for day in [d for d in self.days if d < cutoff]:
+            del self.days[day]
+
+    def save(self, path: str) -> None:
+        """Guarda offsets y agregados (escritura atómica)."""
+        data = {
+            "offsets": self.offsets,
+            "days": {
+                day: {check: stats.to_dict() for check, stats in checks.items()}
+                for day, checks in self.days.items()
+            },
+        }
+        tmp_path = f"{path}.tmp"
+        with open(tmp_path, "w") as f:
+            json.dump(data, f)
+        os.replace(tmp_path, path)
+
+    @classmethod
+    def load(cls, path: str) -> "LogReport":
+        """Carga el checkpoint; si no existe o está corrupto empieza de cero."""
+        report = cls()
+        try:
+            with open(path) as f:
+                data = json.load(f)
+        except (FileNotFoundError, ValueError):
+            return report
+
+        report.offsets = data.get("offsets", {})
+        report.days = {
+            day: {check: CheckDay.from_dict(stats) for check, stats in checks.items()}
+            for day, checks in data.get("days", {}).items()
+        }
+        return report
+
+    def render(self, days: list) -> str:
+        """Genera el texto del reporte para los días indicados."""
+        names = {"disk": "DISCO", "memory": "MEMORIA", "cpu": "CPU", "memory_pressure": "PRESIÓN DE MEMORIA",
+                 "cpu_cores": "SATURACIÓN POR CORE", "load": "CARGA", "run_delay": "ESPERA EN COLA"}
+        lines = [
+            "=" * 40,
+            "    REPORTE DE MONITOREO",
+            f"    {days[0]}" + (f" a {days[-1]}" if len(days) > 1 else ""),
+            "=" * 40,
+            "",
+        ]
+
+        checks = sorted({c for day in days for c in self.days.get(day, {})})
+        if not checks:
+            lines.append("No hay datos disponibles")
+
+        for check in checks:
+            total = CheckDay()
+            for day in days:
+                stats = self.days.get(day, {}).get(check)
+                if stats is not None:
+                    total.merge(stats)
+
+            lines += [
+                f"--- MONITOREO DE {names.get(check, check.upper())} ---",
+                "",
+                f"Checks totales: {total.runs}",
+                f"OK: {total.states['OK']}",
+                f"Warnings: {total.states['WARNING']}",
+                f"Críticos: {total.states['CRITICAL']}",
+            ]
+            if total.transitions:
+                lines.append("Transiciones: " + ", ".join(
+                    f"{t} ({n})" for t, n in sorted(total.transitions.items())
+                ))
+            if total.values.count:
+                v = total.values
+                lines.append(
+                    f"Valor: min {v.min:g}%, p50 {v.percentile(50):g}%, "
+                    f"p95 {v.percentile(95):g}%, max {v.max:g}%"
+                )
+            if total.last_state:
+                lines.append(f"Último estado: {total.last_state}")
+            lines += ["", "=" * 40, ""]
+
+        return "\n".join(lines)
+
+
+def _parse_json_line(raw: bytes):
+    """
+    Extrae día y mensaje de una línea de log JSON (logging_setup.py).
+
+    Returns:
+        Tupla (día, mensaje) en bytes, o None si la línea no es válida
+    """
+    try:
+        event = json.loads(raw)
+        return event["ts"][:10].encode(), event["msg"].encode()
+    except (ValueError, KeyError, TypeError, AttributeError):
+        return None
+
+
+def _head(path: str) -> str:
+    """Primeros bytes del archivo (huella para detectar rotaciones)."""
+    with open(path, "rb") as f:
+        return f.read(64).hex()
+
+
+def _same_file(path: str, entry: dict) -> bool:
+    """
+    True si el archivo sigue siendo el mismo (no rotado) que el del checkpoint.
+
+    El inodo solo no basta: al rotar, el log nuevo puede reutilizar el
+    inodo del anterior, así que también se comparan los primeros bytes.
+    """
+    try:
+        same_inode = os.stat(path).st_ino == entry.get("inode")
+    except FileNotFoundError:
+        return False
+    head = entry.get("head", "")
+    return same_inode and _head(path)[:len(head)] == head
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Reporte diario a partir de los logs")
+    parser.add_argument("--log-dir", default=LOG_DIR)
+    parser.add_argument("--checkpoint", default=CHECKPOINT_FILE)
+    parser.add_argument("--days", type=int, default=1, help="Días a incluir (por defecto hoy)")
+    parser.add_argument("--rebuild", action="store_true", help="Ignorar el checkpoint y releer todo")
+    args = parser.parse_args()
+
+    checkpoint = args.checkpoint or os.path.join(args.log_dir, ".report_checkpoint.json")
+
+    report = LogReport() if args.rebuild else LogReport.load(checkpoint)
+    report.scan(args.log_dir)
+    report.prune()
+    report.save(checkpoint)
+
+    today = date.today()
+    days = [(today - timedelta(days=n)).isoformat() for n in range(args.days - 1, -1, -1)]
+    print(report.render(days))
+
+
+if __name__ == "__main__":
+    main()
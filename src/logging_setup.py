@@ -0,0 +1,111 @@
+#!/usr/bin/env python3
+"""
+Configuración de logging compartida por checks, runner y exporter.
+
+Dos formatos (LOG_FORMAT):
+- text: el formato de siempre ("fecha - NIVEL - mensaje")
+- json: un objeto JSON por línea con los campos estructurados que
+  se pasen en `extra` (check, key, state, previous_state, value,
+  duration...), para que otras herramientas no tengan que parsear
+  los mensajes con regex
+
+En ambos casos los handlers reales (archivo, consola) se ejecutan en
+el hilo de un QueueListener: el código que loguea solo encola el
+registro y nunca se bloquea escribiendo en disco.
+"""
+
+import atexit
+import json
+import logging
+import os
+import queue
+from datetime import datetime
+from logging.handlers import QueueHandler, QueueListener
+
+LOG_FORMAT = os.environ.get("LOG_FORMAT", "text")
+
+TEXT_FORMAT = "%(asctime)s - %(levelname)s - %(message)s"
+DATE_FORMAT = "%Y-%m-%d %H:%M:%S"
+
+# Campos estructurados que se copian al JSON si el registro los trae
+FIELDS = (
+    "event", "check", "key", "state", "previous_state",
+    "metric", "value", "duration", "exit_code", "collector",
+)
+
+_listener = None
+
+
+class JsonFormatter(logging.Formatter):
+    """Formatea cada registro como una línea JSON."""
+
+    def format(self, record: logging.LogRecord) -> str:
+        event = {
+            "ts": datetime.fromtimestamp(record.created).astimezone().isoformat(
+                timespec="milliseconds"
+            ),
+            "level": record.levelname,
+            "logger": record.name,
+            "msg": record.getMessage(),
+        }
+        for field in FIELDS:
+            value = getattr(record, field, None)
+            if value is not None:
+                event[field] = value
+        if record.exc_info:
+            event["exc"] = self.formatException(record.exc_info)
+        return json.dumps(event, ensure_ascii=False, default=str)
+
+
+def make_formatter(fmt: str = None) -> logging.Formatter:
+    """Devuelve el formatter del formato indicado (por defecto LOG_FORMAT)."""
+    if (fmt or LOG_FORMAT) == "json":
+        return JsonFormatter()
+    return logging.Formatter(TEXT_FORMAT, datefmt=DATE_FORMAT)
+
+
+def setup_logging(handlers: list = None, fmt: str = None, level: int = logging.INFO):
+    """
+    Configura el logger raíz con un QueueHandler.
+
+    Igual que logging.basicConfig, no hace nada si el logger raíz ya
+    tiene handlers (ej: una segunda llamada o pytest).
+
+    Args:
+        handlers: Handlers reales (por defecto solo consola)
+        fmt: "text" o "json" (por defecto LOG_FORMAT)
+        level: Nivel del logger raíz
+
+    Returns:
+        El QueueListener en marcha, o None si ya estaba configurado
+    """
+    global _listener
+
+    root = logging.getLogger()
+    if root.handlers:
+        return None
+
+    formatter = make_formatter(fmt)
+    handlers = handlers or [logging.StreamHandler()]
+    for handler in handlers:
+        handler.setFormatter(formatter)
+
+    log_queue = queue.SimpleQueue()
+    root.addHandler(QueueHandler(log_queue))
+    root.setLevel(level)
+
+    _listener = QueueListener(log_queue, *handlers, respect_handler_level=True)
+    _listener.start()
+
+    # Al salir se vacía la cola antes de cerrar los handlers
+    atexit.register(stop_logging)
+    return _listener
+
+
+def stop_logging() -> None:
+    """Vacía la cola y detiene el listener (se puede llamar varias veces)."""
+    global _listener
+
+    listener, _listener = _listener, None
+    if listener is not None:
+        listener.stop()
@@ -5,80 +5,142 @@ Autor: Iriome
 Fecha: 03/02/2026
 """
 
-import subprocess
 import sys
-import os
 import logging
 
-from base_check import BaseCheck
-
-WARNING_THRESHOLD = int(os.environ.get("WARNING", "20"))
-CRITICAL_THRESHOLD = int(os.environ.get("CRITICAL", "10"))
+from base_check import BaseCheck, get_threshold, get_setting
+from rolling_window import LEVELS
+from collectors import (
+    read_meminfo,
+    memory_usage_from_meminfo,
+    read_pressure,
+    ProcessSampler,
+    TOP_PROCESSES,
+    format_processes,
+)
+from sample_cache import open_reader, cached_memory_usage, cached_memory_pressure
+
+WARNING_THRESHOLD = get_threshold("memory", "WARNING", "20")
+CRITICAL_THRESHOLD = get_threshold("memory", "CRITICAL", "10")
+
+# Presión de memoria (PSI, avg10 en %): "some" = algún proceso esperando
+# por memoria (reclaim, swap-in), "full" = todos los procesos parados.
+# Sin las genéricas: WARNING/CRITICAL son thresholds de memoria disponible
+PRESSURE_SOME_WARNING = get_setting("memory_pressure_some", "WARNING", "10", generic=False)
+PRESSURE_SOME_CRITICAL = get_setting("memory_pressure_some", "CRITICAL", "40", generic=False)
+PRESSURE_FULL_WARNING = get_setting("memory_pressure_full", "WARNING", "5", generic=False)
+PRESSURE_FULL_CRITICAL = get_setting("memory_pressure_full", "CRITICAL", "20", generic=False)
+
+
+class MemoryCheck(BaseCheck):
+    """Check de memoria disponible (MemAvailable)."""
+
+    def __init__(self):
+        super().__init__("memory")
+
+        self.validate_thresholds(WARNING_THRESHOLD, CRITICAL_THRESHOLD, inverted=True)
+
+    def run(self) -> int:
+        logging.info(
+            f"Chequeando memoria "
+            f"(warning={WARNING_THRESHOLD}% disponible, "
+            f"critical={CRITICAL_THRESHOLD}% disponible)"
+        )
+
+        # Última muestra del exporter si es reciente; si no, /proc/meminfo
+        try:
+            memory = cached_memory_usage(open_reader()) or memory_usage_from_meminfo(read_meminfo())
+        except (OSError, ValueError) as e:
+            logging.error(f"Error leyendo /proc/meminfo: {e}")
+            return 2
+
+        total_mb = memory.total_kb // 1024
+        available_mb = memory.available_kb // 1024
+        available_percent = memory.available_percent
+        swap = ""
+        if memory.swap_total_kb:
+            swap = f", swap {memory.swap_used_kb // 1024}MB de {memory.swap_total_kb // 1024}MB"
+
+        current_state = self.evaluate(
+            available_percent, WARNING_THRESHOLD, CRITICAL_THRESHOLD, inverted=True
+        )
+
+        return self.handle_state_change(
+            current_state,
+            "Memoria disponible",
+            f"{available_percent}% ({available_mb}MB de {total_mb}MB{swap})",
+            details=top_processes() if current_state != "OK" else None
+        )
+
+
+class MemoryPressureCheck(BaseCheck):
+    """
+    Check de presión de memoria (PSI avg10 de some y full).
+
+    La presión sube con el reclaim y el swap-in antes de que
+    MemAvailable llegue a los thresholds, y también refleja los
+    límites del cgroup. Es un check aparte (memory_pressure) con el
+    mismo estado que la entrada del registro.
+    """
+
+    def __init__(self):
+        super().__init__("memory_pressure")
+
+        self.validate_thresholds(PRESSURE_SOME_WARNING, PRESSURE_SOME_CRITICAL)
+        self.validate_thresholds(PRESSURE_FULL_WARNING, PRESSURE_FULL_CRITICAL)
+
+    def run(self) -> int:
+        # Última muestra del exporter si es reciente; si no, /proc/pressure
+        try:
+            pressure = cached_memory_pressure(open_reader()) or read_pressure().get("memory")
+        except (OSError, ValueError) as e:
+            logging.error(f"Error leyendo /proc/pressure/memory: {e}")
+            return 2
+
+        # Kernel sin PSI: nada que evaluar
+        if pressure is None:
+            return 0
+        return self.check_pressure(pressure)
+
+    def check_pressure(self, pressure: dict) -> int:
+        """Evalúa some y full por separado; gana el estado más grave."""
+        # Marcador propio para que log_report no lo cuente como memoria
+        logging.info(
+            f"Chequeando presión de memoria "
+            f"(some warning={PRESSURE_SOME_WARNING:g}%, full warning={PRESSURE_FULL_WARNING:g}%)"
+        )
+
+        some = pressure["some"]["avg10"]
+        full = pressure.get("full", {}).get("avg10", 0.0)
+
+        states = (
+            self.evaluate(some, PRESSURE_SOME_WARNING, PRESSURE_SOME_CRITICAL, metric="some"),
+            self.evaluate(full, PRESSURE_FULL_WARNING, PRESSURE_FULL_CRITICAL, metric="full"),
+        )
+        current_state = max(states, key=LEVELS.index)
+
+        return self.handle_state_change(
+            current_state,
+            "Presión de memoria",
+            f"some {some}%, full {full}% (avg10)",
+            details=top_processes() if current_state != "OK" else None
+        )
+
+
+def top_processes() -> str:
+    """Procesos con más memoria residente (una sola pasada por /proc)."""
+    if TOP_PROCESSES <= 0:
+        return None
+    try:
+        _, top_rss = ProcessSampler().sample(cpu=False)
+    except OSError as e:
+        logging.error(f"Error leyendo procesos de /proc: {e}")
+        return None
+    return f"Top RSS: {format_processes(top_rss, by='rss')}" if top_rss else None
 
 
 def main():
-    
-    check = BaseCheck("memory")
-    
-    check.validate_thresholds(WARNING_THRESHOLD, CRITICAL_THRESHOLD, inverted=True)
-
-    logging.info(
-        f"Chequeando memoria "
-        f"(warning={WARNING_THRESHOLD}% disponible, "
-        f"critical={CRITICAL_THRESHOLD}% disponible)"
-    )
-
-    result= subprocess.run(
-        ["free", "-m"],
-        capture_output=True,
-        text=True
-    )
-
-    if result.returncode != 0:
-        logging.error("Fallo al ejecutar free (el comando)")
-        logging.error(result.stderr.strip())
-        sys.exit(2)
-    
-    lines = result.stdout.splitlines()
-
-    if len(lines) < 2:
-        logging.error("Salida inesperada de free")
-        sys.exit(2)
-    
-    mem_line = lines[1].split()
-
-    if len(mem_line) < 7:
-        logging.error("No se puedo parsear la salida")
-        sys.exit(2)
-    
-    try:
-        total_mb = int(mem_line[1])
-        available_mb = int(mem_line[6])
-    except (ValueError, IndexError):
-        logging.error("Error en convertir los valores de la memoria")
-        sys.exit(2)
-    
-    available_percent = round((available_mb / total_mb) * 100, 1)
-
-    if available_percent >= WARNING_THRESHOLD:
-        current_state= "OK"
-    
-    elif available_percent >= CRITICAL_THRESHOLD:
-        current_state= "WARNING"
-    
-    else:
-        current_state= "CRITICAL"
-
-    exit_code = check.handle_state_change(
-        current_state,
-        "Memoria disponible",
-        f"{available_percent}% ({available_mb}MB de {total_mb}MB)"
-
-    )
-    
-    sys.exit(exit_code)
+    sys.exit(max(MemoryCheck().run_check(), MemoryPressureCheck().run_check()))
 
 if __name__ == "__main__":
     main()
-    
-
@@ -8,162 +8,923 @@ Este script corre de manera INDEPENDIENTE a los checks de cron.
 Mientras disk_check.py maneja alertas, este expone métricas para grafana.
 """
 
-from prometheus_client import start_http_server, Gauge
-import subprocess
+from prometheus_client import start_http_server, Counter, Gauge, Histogram, REGISTRY
+from prometheus_client.core import CounterMetricFamily, GaugeMetricFamily
+import threading
 import time
 import logging
-import re
+import struct
+import sys
 import os
 
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+from collectors import (
+    DISK_DISCOVERY,
+    read_disk_usage,
+    read_meminfo,
+    memory_usage_from_meminfo,
+    meminfo_bytes,
+    read_pressure,
+    read_all_mounts_usage,
+    mount_table_from_env,
+    CpuSampler,
+    CPU_MODES,
+    DiskIOSampler,
+    NetIOSampler,
+    RunDelaySampler,
+    PROC_SCHEDSTAT,
+    read_loadavg,
+    online_cpus,
+    ProcessSampler,
+    TOP_PROCESSES,
+)
+from collector_pool import CollectorPool
+from sample_cache import SAMPLE_CACHE_PATH, SampleCacheWriter
+from exposition import MetricsCache, start_server
+from scheduler import Ticker
+import logging_setup
+
 METRICS_PORT = int(os.environ.get("METRICS_PORT", "8000"))
 SCRAPE_INTERVAL = int(os.environ.get("SCRAPE_INTERVAL", "15"))
 
+# Cada cuántos ciclos se escribe el resumen en el log
+SUMMARY_EVERY = int(os.environ.get("SUMMARY_EVERY", "5"))  # 0 = sin resumen
+
 DISK_PATH = os.environ.get("DISK_PATH", "/")
+
+# loop: recolecta cada SCRAPE_INTERVAL; ondemand: recolecta al scrapear /metrics
+EXPORTER_MODE = os.environ.get("EXPORTER_MODE", "loop")
+CACHE_TTL = float(os.environ.get("CACHE_TTL", "5"))
+
+# Publicar las muestras en STATE_DIR para los checks (ver sample_cache.py)
+SAMPLE_CACHE = os.environ.get("SAMPLE_CACHE", "true").lower() == "true"
+
+# Servir /metrics pre-renderizado una vez por ciclo (ver exposition.py);
+# false vuelve a start_http_server, que renderiza en cada petición
+METRICS_PRERENDER = os.environ.get("METRICS_PRERENDER", "true").lower() == "true"
+
+# Exportar porcentajes por core y modo (sre_cpu_core_*)
+CPU_PER_CORE = os.environ.get("CPU_PER_CORE", "true").lower() == "true"
 LOG_DIR = os.path.expanduser("~/sre-monitoring-suite/logs")
 
-os.makedirs(LOG_DIR, exist_ok=True)
 
-logging.basicConfig(
-    level=logging.INFO,
-    format="%(asctime)s - %(levelname)s - %(message)s",
-    handlers=[
+def setup_logging():
+    os.makedirs(LOG_DIR, exist_ok=True)
+
+    # El FileHandler escribe desde el hilo del QueueListener, no desde
+    # el bucle de recolección
+    logging_setup.setup_logging(handlers=[
         logging.FileHandler(f"{LOG_DIR}/metrics_exporter.log"),
         logging.StreamHandler()
     ])
 
 def collect_disk_usage():
-    """Recoge el uso de disco usando df."""
+    """Recoge el uso de disco (DiskUsage) con os.statvfs."""
     
     try:
-        result = subprocess.run(
-            ["df", "-h", DISK_PATH],
-            capture_output=True,
-            text=True,
-            timeout=5
-        )
-        
-        if result.returncode == 0:
-            lines = result.stdout.splitlines()
-            if len(lines) >= 2:
-                parts = lines[1].split()
-                if len(parts) >= 5:
-                    use_percent_str = parts[4]
-                    use_percent = int(use_percent_str.strip('%'))
-                    return use_percent
-        
-        logging.error("Error parseando salida de df")
-        return -1
+        return read_disk_usage(DISK_PATH)
     
     except Exception as e:
         logging.error(f"Error en collect_disk_usage: {e}")
-        return -1
+        return None
     
-def collect_cpu_idle():
-    """Recoge el porcentaje de CPU idle usando top."""
+# Sampler de larga duración: cada ciclo mide el delta desde el anterior
+cpu_sampler = CpuSampler(per_core=CPU_PER_CORE)
+
+def collect_cpu_modes():
+    """
+    Recoge el porcentaje de cada modo de CPU desde /proc/stat.
+    
+    Returns:
+        Tupla (modos agregados, PerCoreCpu o None)
+    """
     
     try:
-        result = subprocess.run(
-            ["top", "-bn1"],
-            capture_output=True,
-            text=True,
-            timeout=5
-        )
-        
-        if result.returncode == 0:
-            for line in result.stdout.splitlines():
-                if "Cpu(s)" in line:
-                    match = re.search(r'(\d+\.?\d*)\s*id', line)
-                    if match:
-                        idle_percent = round(float(match.group(1)), 1)
-                        return idle_percent
-        
-        logging.error("Error parseando salida de top")
-        return -1
+        return cpu_sampler.sample(), cpu_sampler.cores
     
     except Exception as e:
-        logging.error(f"Error en collect_cpu_idle: {e}")
-        return -1
+        logging.error(f"Error en collect_cpu_modes: {e}")
+        return None
     
-def collect_memory_available():
-    """Recoge el porcentaje de memoria disponible usando free."""
+def collect_memory():
+    """
+    Recoge la memoria desde /proc/meminfo (una sola lectura).
+    
+    Returns:
+        Tupla (MemoryUsage, campos de meminfo en bytes) o None
+    """
     
     try:
-        result = subprocess.run(
-            ["free", "-m"],
-            capture_output=True,
-            text=True,
-            timeout=5
-        )
-        
-        if result.returncode == 0:
-            lines = result.stdout.splitlines()
-            if len(lines) >= 2:
-                mem_line = lines[1].split()
-                if len(mem_line) >= 7:
-                    total_mb = int(mem_line[1])
-                    available_mb = int(mem_line[6])
-                    available_percent = round((available_mb / total_mb) * 100, 1)
-                    return available_percent
-        
-        logging.error("Error parseando salida de free")
-        return -1
+        fields = read_meminfo()
+        return memory_usage_from_meminfo(fields), meminfo_bytes(fields)
+    
+    except Exception as e:
+        logging.error(f"Error en collect_memory: {e}")
+        return None
+
+def collect_pressure():
+    """Recoge la presión (PSI) de CPU, memoria e IO desde /proc/pressure."""
+    
+    try:
+        return read_pressure()
+    
+    except Exception as e:
+        logging.error(f"Error en collect_pressure: {e}")
+        return None
+
+# Samplers de contadores: cada ciclo lee /proc/diskstats y /proc/net/dev
+# una vez y calcula las tasas desde el ciclo anterior
+disk_io_sampler = DiskIOSampler()
+net_io_sampler = NetIOSampler()
+
+def collect_disk_io():
+    """Recoge IOPS, throughput, await y utilización de /proc/diskstats."""
+    
+    try:
+        return disk_io_sampler.sample()
+    
+    except Exception as e:
+        logging.error(f"Error en collect_disk_io: {e}")
+        return None
+
+def collect_network():
+    """Recoge bytes, paquetes, errores y descartes de /proc/net/dev."""
+    
+    try:
+        return net_io_sampler.sample()
+    
+    except Exception as e:
+        logging.error(f"Error en collect_network: {e}")
+        return None
+
+run_delay_sampler = RunDelaySampler()
+
+def collect_load():
+    """
+    Recoge /proc/loadavg y las CPUs online.
+    
+    Returns:
+        Tupla (LoadAverage, CPUs online) o None
+    """
+    
+    try:
+        return read_loadavg(), online_cpus()
     
     except Exception as e:
-        logging.error(f"Error en collect_memory_available: {e}")
-        return -1
+        logging.error(f"Error en collect_load: {e}")
+        return None
+
+def collect_run_delay():
+    """Recoge la espera en cola por CPU de /proc/schedstat."""
     
-logging.info(f"Creando métricas de Prometheus")
+    try:
+        return run_delay_sampler.sample()
+    
+    except Exception as e:
+        logging.error(f"Error en collect_run_delay: {e}")
+        return None
 
+# Cache de muestras para los checks de cron (se abre en main())
+sample_cache = None
+
+# Render de /metrics compartido por los scrapes (None sin METRICS_PRERENDER)
+metrics_cache = None
+
+# Tabla de montajes cacheada: solo se reparsea cuando cambia /proc/mounts
+mount_table = None
+
+def collect_mounts():
+    """Recoge bytes e inodos de todos los montajes reales en una pasada."""
+    global mount_table
+    
+    try:
+        if mount_table is None:
+            mount_table = mount_table_from_env()
+        return read_all_mounts_usage(mount_table)
+    
+    except Exception as e:
+        logging.error(f"Error en collect_mounts: {e}")
+        return None
+
+# Top N de procesos por CPU (delta entre ciclos) y por RSS
+process_sampler = ProcessSampler()
+
+def collect_processes():
+    """
+    Recoge el top N de procesos por CPU y por RSS desde /proc/[pid]/stat.
+    
+    Returns:
+        Tupla (top por CPU, top por RSS) o None
+    """
+    
+    try:
+        return process_sampler.sample()
+    
+    except Exception as e:
+        logging.error(f"Error en collect_processes: {e}")
+        return None
+
+COLLECTORS = {
+    "disk": collect_disk_usage,
+    "memory": collect_memory,
+    "cpu": collect_cpu_modes,
+    "pressure": collect_pressure,
+    "diskio": collect_disk_io,
+    "network": collect_network,
+    "load": collect_load,
+}
+
+if DISK_DISCOVERY:
+    COLLECTORS["mounts"] = collect_mounts
+
+if TOP_PROCESSES > 0:
+    COLLECTORS["processes"] = collect_processes
+
+# /proc/schedstat solo existe con CONFIG_SCHEDSTATS
+if os.path.exists(PROC_SCHEDSTAT):
+    COLLECTORS["schedstat"] = collect_run_delay
+
+# Las métricas no se registran al importar: main() las registra
+# directamente (modo loop) o a través de OnDemandCollector
 disk_usage_metric = Gauge("sre_disk_usage_percent",
-                          "Porcentaje de uso del disco")
+                          "Porcentaje de uso del disco",
+                          registry=None)
 
 cpu_idle_metric = Gauge("sre_cpu_idle_percent",
-                        "Porcentaje de CPU idle")
+                        "Porcentaje de CPU idle",
+                        registry=None)
+
+cpu_mode_metric = Gauge("sre_cpu_mode_percent",
+                        "Porcentaje de CPU por modo (user, system, iowait...)",
+                        ["mode"],
+                        registry=None)
 
 memory_available_metric = Gauge("sre_memory_available_percent",
-                                "Porcentaje de memoria disponible")
+                                "Porcentaje de memoria disponible",
+                                registry=None)
+
+cpu_core_metric = Gauge("sre_cpu_core_percent",
+                        "Porcentaje de cada modo de CPU por core",
+                        ["cpu", "mode"],
+                        registry=None)
+
+cpu_core_busy_metric = Gauge("sre_cpu_core_busy_percent",
+                             "Porcentaje ocupado de cada core (sin idle ni iowait)",
+                             ["cpu"],
+                             registry=None)
+
+MOUNT_LABELS = ["mountpoint", "device", "fstype"]
+
+disk_used_percent_metric = Gauge("sre_disk_used_percent",
+                                 "Porcentaje de uso de cada montaje",
+                                 MOUNT_LABELS,
+                                 registry=None)
+
+disk_inodes_used_percent_metric = Gauge("sre_disk_inodes_used_percent",
+                                        "Porcentaje de inodos usados de cada montaje",
+                                        MOUNT_LABELS,
+                                        registry=None)
+
+disk_size_bytes_metric = Gauge("sre_disk_size_bytes",
+                               "Tamaño total de cada montaje en bytes",
+                               MOUNT_LABELS,
+                               registry=None)
+
+disk_avail_bytes_metric = Gauge("sre_disk_avail_bytes",
+                                "Bytes disponibles (no root) de cada montaje",
+                                MOUNT_LABELS,
+                                registry=None)
+
+meminfo_metric = Gauge("sre_meminfo_bytes",
+                       "Campos de /proc/meminfo en bytes",
+                       ["field"],
+                       registry=None)
+
+pressure_metric = Gauge("sre_pressure_percent",
+                        "Pressure Stall Information: % de tiempo con tareas paradas",
+                        ["resource", "kind", "window"],
+                        registry=None)
+
+pressure_stalled_metric = Gauge("sre_pressure_stalled_seconds",
+                                "Tiempo acumulado con tareas paradas (usar rate())",
+                                ["resource", "kind"],
+                                registry=None)
+
+disk_iops_metric = Gauge("sre_disk_io_ops_per_second",
+                         "Operaciones de IO completadas por segundo",
+                         ["device", "direction"],
+                         registry=None)
+
+disk_throughput_metric = Gauge("sre_disk_io_bytes_per_second",
+                               "Bytes leídos/escritos por segundo",
+                               ["device", "direction"],
+                               registry=None)
+
+disk_await_metric = Gauge("sre_disk_io_await_milliseconds",
+                          "Tiempo medio por operación (cola + servicio), como await de iostat",
+                          ["device", "direction"],
+                          registry=None)
+
+disk_util_metric = Gauge("sre_disk_io_utilization_percent",
+                         "% del tiempo con IO en curso (%util de iostat)",
+                         ["device"],
+                         registry=None)
+
+disk_in_progress_metric = Gauge("sre_disk_io_in_progress",
+                                "Peticiones de IO en curso",
+                                ["device"],
+                                registry=None)
+
+DISK_IO_METRICS = [disk_iops_metric, disk_throughput_metric, disk_await_metric,
+                   disk_util_metric, disk_in_progress_metric]
+
+net_bytes_metric = Gauge("sre_network_bytes_per_second",
+                         "Bytes recibidos/enviados por segundo",
+                         ["interface", "direction"],
+                         registry=None)
+
+net_packets_metric = Gauge("sre_network_packets_per_second",
+                           "Paquetes recibidos/enviados por segundo",
+                           ["interface", "direction"],
+                           registry=None)
+
+net_errors_metric = Gauge("sre_network_errors_per_second",
+                          "Errores de recepción/envío por segundo",
+                          ["interface", "direction"],
+                          registry=None)
+
+net_drops_metric = Gauge("sre_network_drops_per_second",
+                         "Paquetes descartados por segundo",
+                         ["interface", "direction"],
+                         registry=None)
+
+NET_METRICS = [net_bytes_metric, net_packets_metric, net_errors_metric, net_drops_metric]
+
+load_metric = Gauge("sre_load_average",
+                    "Load average de /proc/loadavg",
+                    ["window"],
+                    registry=None)
+
+load_per_cpu_metric = Gauge("sre_load_per_cpu",
+                            "Load average dividido entre las CPUs online",
+                            ["window"],
+                            registry=None)
+
+online_cpus_metric = Gauge("sre_online_cpus",
+                           "CPUs online",
+                           registry=None)
+
+runnable_tasks_metric = Gauge("sre_runnable_tasks",
+                              "Tareas ejecutables (en CPU o en cola)",
+                              registry=None)
+
+run_delay_metric = Gauge("sre_cpu_run_delay_seconds_per_second",
+                         "Segundos de espera en la cola de cada CPU por segundo",
+                         ["cpu"],
+                         registry=None)
+
+run_wait_metric = Gauge("sre_cpu_run_wait_milliseconds",
+                        "Espera media en cola por timeslice en cada CPU",
+                        ["cpu"],
+                        registry=None)
+
+# Solo el top N: la cardinalidad de pid/name está acotada
+process_cpu_metric = Gauge("sre_process_cpu_percent",
+                           "Porcentaje de CPU de los procesos del top N por CPU",
+                           ["pid", "name"],
+                           registry=None)
+
+process_rss_metric = Gauge("sre_process_rss_bytes",
+                           "Memoria residente de los procesos del top N por RSS",
+                           ["pid", "name"],
+                           registry=None)
+
+MOUNT_METRICS = [
+    disk_used_percent_metric,
+    disk_inodes_used_percent_metric,
+    disk_size_bytes_metric,
+    disk_avail_bytes_metric,
+]
+
+collector_stale_metric = Gauge("sre_collector_stale",
+                               "1 si el collector no respondió a tiempo y se sirve su último valor bueno",
+                               ["collector"],
+                               registry=None)
+
+collector_age_metric = Gauge("sre_collector_value_age_seconds",
+                             "Segundos desde el último valor bueno del collector",
+                             ["collector"],
+                             registry=None)
+
+METRICS = [
+    disk_usage_metric,
+    cpu_idle_metric,
+    cpu_mode_metric,
+    cpu_core_metric,
+    cpu_core_busy_metric,
+    memory_available_metric,
+    meminfo_metric,
+    pressure_metric,
+    pressure_stalled_metric,
+    collector_stale_metric,
+    collector_age_metric,
+    process_cpu_metric,
+    process_rss_metric,
+    load_metric,
+    load_per_cpu_metric,
+    online_cpus_metric,
+    runnable_tasks_metric,
+    run_delay_metric,
+    run_wait_metric,
+] + MOUNT_METRICS + DISK_IO_METRICS + NET_METRICS
+
+# Auto-instrumentación: coste de la propia recolección. Se registran
+# siempre aparte de METRICS para que scrapearlas no dispare una recolección
+collector_duration_metric = Histogram("sre_exporter_collector_duration_seconds",
+                                      "Duración de cada ejecución de un collector",
+                                      ["collector"],
+                                      buckets=(.0005, .001, .0025, .005, .01, .025,
+                                               .05, .1, .25, .5, 1, 2.5, 5, 10),
+                                      registry=None)
+
+# Un ciclo lento cuenta en las dos: overruns cuenta ciclos cuyo trabajo
+# pasó de SCRAPE_INTERVAL (coste de recolección); missed_ticks cuenta
+# muestras perdidas en la rejilla, también sin overrun (proceso parado,
+# espera que despierta tarde)
+loop_overruns_metric = Counter("sre_exporter_loop_overruns",
+                               "Ciclos de recolección que duraron más que SCRAPE_INTERVAL",
+                               registry=None)
+
+loop_missed_ticks_metric = Counter("sre_exporter_loop_missed_ticks",
+                                   "Ticks de SCRAPE_INTERVAL saltados (por ciclos lentos o esperas atrasadas)",
+                                   registry=None)
+
+
+class PoolStatsCollector:
+    """
+    Expone los contadores del CollectorPool al scrapear.
+    
+    El pool solo suma enteros en cada ciclo; aquí se traducen a métricas,
+    así registrarlos no añade coste a la recolección.
+    """
+    
+    def __init__(self, pool):
+        self.pool = pool
+    
+    def collect(self):
+        errors = CounterMetricFamily("sre_exporter_collector_errors",
+                                     "Ejecuciones de collectors que fallaron o devolvieron un valor inválido",
+                                     labels=["collector"])
+        timeouts = CounterMetricFamily("sre_exporter_collector_timeouts",
+                                       "Ejecuciones de collectors que superaron su deadline",
+                                       labels=["collector"])
+        last_success = GaugeMetricFamily("sre_exporter_collector_last_success_timestamp_seconds",
+                                         "Timestamp (epoch) del último valor bueno de cada collector",
+                                         labels=["collector"])
+        
+        for name in self.pool.collectors:
+            errors.add_metric([name], self.pool.error_count[name])
+            timeouts.add_metric([name], self.pool.timeout_count[name])
+            if name in self.pool.last_success:
+                last_success.add_metric([name], self.pool.last_success[name])
+        
+        yield errors
+        yield timeouts
+        yield last_success
+
+
+def observe_duration(name, seconds):
+    collector_duration_metric.labels(collector=name).observe(seconds)
+
+
+def make_pool():
+    """CollectorPool del exporter con la duración de cada collector instrumentada."""
+    return CollectorPool(COLLECTORS, on_duration=observe_duration)
+
+
+def register_self_metrics(pool, registry=REGISTRY):
+    """
+    Registra las métricas del propio exporter.
+    
+    El uso de CPU y la RSS del proceso (process_cpu_seconds_total,
+    process_resident_memory_bytes...) ya los expone el ProcessCollector
+    que prometheus_client registra por defecto en REGISTRY.
+    """
+    registry.register(collector_duration_metric)
+    registry.register(loop_overruns_metric)
+    registry.register(loop_missed_ticks_metric)
+    registry.register(PoolStatsCollector(pool))
+
+
+# Montajes exportados en el ciclo anterior (para retirar los desmontados)
+exported_mounts = set()
+
+# Procesos exportados en el ciclo anterior por cada métrica (para retirar
+# los que salen del top)
+exported_processes = {process_cpu_metric: set(), process_rss_metric: set()}
+
+
+def update_mount_metrics(results):
+    """Publica las métricas etiquetadas de cada montaje."""
+    
+    current = set()
+    for mount, usage in results:
+        labels = (mount.mountpoint, mount.device, mount.fstype)
+        current.add(labels)
+        disk_used_percent_metric.labels(*labels).set(usage.use_percent)
+        disk_inodes_used_percent_metric.labels(*labels).set(usage.inodes_percent)
+        disk_size_bytes_metric.labels(*labels).set(usage.total_bytes)
+        disk_avail_bytes_metric.labels(*labels).set(usage.available_bytes)
+    
+    for labels in exported_mounts - current:
+        for metric in MOUNT_METRICS:
+            metric.remove(*labels)
+    
+    exported_mounts.clear()
+    exported_mounts.update(current)
+
+
+# Dispositivos e interfaces exportados en el ciclo anterior (hot-plug)
+exported_disk_devices = set()
+exported_interfaces = set()
+exported_run_delay_cpus = set()
+exported_cores = set()
+
+
+def remove_devices(exported, current, directional, directions, single=()):
+    """
+    Retira de las métricas los dispositivos que ya no existen.
+    
+    Args:
+        exported: Dispositivos exportados en el ciclo anterior (se actualiza)
+        current: Dispositivos de este ciclo
+        directional: Gauges etiquetados por (dispositivo, dirección)
+        directions: Valores del label de dirección
+        single: Gauges etiquetados solo por dispositivo
+    """
+    for device in exported - current:
+        for metric in directional:
+            for direction in directions:
+                metric.remove(device, direction)
+        for metric in single:
+            metric.remove(device)
+    exported.clear()
+    exported.update(current)
 
-logging.info("Métricas creadas")
 
-logging.info(f"Iniciando servidor HTTP en puerto {METRICS_PORT}")
+def update_disk_io_metrics(devices):
+    """Publica la actividad de IO de cada dispositivo de bloque."""
+    for device, io in devices.items():
+        disk_iops_metric.labels(device, "read").set(io.reads_per_sec)
+        disk_iops_metric.labels(device, "write").set(io.writes_per_sec)
+        disk_throughput_metric.labels(device, "read").set(io.read_bytes_per_sec)
+        disk_throughput_metric.labels(device, "write").set(io.write_bytes_per_sec)
+        disk_await_metric.labels(device, "read").set(io.read_await_ms)
+        disk_await_metric.labels(device, "write").set(io.write_await_ms)
+        disk_util_metric.labels(device).set(io.util_percent)
+        disk_in_progress_metric.labels(device).set(io.in_progress)
+    
+    remove_devices(
+        exported_disk_devices, set(devices),
+        (disk_iops_metric, disk_throughput_metric, disk_await_metric), ("read", "write"),
+        single=(disk_util_metric, disk_in_progress_metric)
+    )
+
+
+def update_network_metrics(interfaces):
+    """Publica el tráfico de cada interfaz de red."""
+    for name, net in interfaces.items():
+        net_bytes_metric.labels(name, "rx").set(net.rx_bytes_per_sec)
+        net_bytes_metric.labels(name, "tx").set(net.tx_bytes_per_sec)
+        net_packets_metric.labels(name, "rx").set(net.rx_packets_per_sec)
+        net_packets_metric.labels(name, "tx").set(net.tx_packets_per_sec)
+        net_errors_metric.labels(name, "rx").set(net.rx_errors_per_sec)
+        net_errors_metric.labels(name, "tx").set(net.tx_errors_per_sec)
+        net_drops_metric.labels(name, "rx").set(net.rx_drops_per_sec)
+        net_drops_metric.labels(name, "tx").set(net.tx_drops_per_sec)
+    
+    remove_devices(exported_interfaces, set(interfaces), NET_METRICS, ("rx", "tx"))
+
+
+def update_load_metrics(load, cpus):
+    """Publica el load average, total y por CPU online."""
+    for window, value in (("1m", load.load1), ("5m", load.load5), ("15m", load.load15)):
+        load_metric.labels(window).set(value)
+        load_per_cpu_metric.labels(window).set(round(value / cpus, 3))
+    online_cpus_metric.set(cpus)
+    runnable_tasks_metric.set(load.runnable)
+
+
+def update_run_delay_metrics(delays):
+    """Publica la espera en cola de cada CPU."""
+    for cpu, delay in delays.items():
+        run_delay_metric.labels(cpu).set(delay.delay_per_sec)
+        run_wait_metric.labels(cpu).set(delay.avg_wait_ms)
+    
+    remove_devices(exported_run_delay_cpus, set(delays), (), (),
+                   single=(run_delay_metric, run_wait_metric))
+
+
+def update_process_metrics(metric, processes, value):
+    """
+    Publica el top N de procesos en una métrica y retira los que salieron.
+    
+    Args:
+        metric: process_cpu_metric o process_rss_metric
+        processes: Lista de ProcessUsage
+        value: Función que extrae el valor de un ProcessUsage
+    """
+    current = set()
+    for process in processes:
+        labels = (str(process.pid), process.name)
+        current.add(labels)
+        metric.labels(*labels).set(value(process))
+    
+    for labels in exported_processes[metric] - current:
+        metric.remove(*labels)
+    exported_processes[metric] = current
 
-try:
-    start_http_server(METRICS_PORT)
-    logging.info(f"Servidor HTTP iniciado en http://localhost:{METRICS_PORT}/metrics")
-except Exception as e:
-    logging.error(f"Error iniciando servidor HTTP: {e}")
-    exit(1)
+
+def update_core_metrics(cores):
+    """Publica los porcentajes por core y modo."""
+    
+    for mode, column in cores.columns.items():
+        for cpu, percent in zip(cores.cpus, column):
+            cpu_core_metric.labels(cpu, mode).set(round(percent, 1))
     
-logging.info(f"Iniciando recolección cada {SCRAPE_INTERVAL} segundos...")
-logging.info("Ctrl+C para detener")
+    for cpu, busy in zip(cores.cpus, cores.busy()):
+        cpu_core_busy_metric.labels(cpu).set(round(busy, 1))
+    
+    # Cores retirados (hotplug): fuera sus series
+    remove_devices(
+        exported_cores, set(cores.cpus), (cpu_core_metric,), tuple(cores.columns),
+        single=(cpu_core_busy_metric,)
+    )
+
 
-try:
+def update_metrics(pool):
+    """
+    Publica los últimos valores buenos del pool y su estado de staleness.
+    
+    Returns:
+        Tupla (disk, memory, cpu) para logging (-1 si nunca hubo valor)
+    """
+    values = pool.values
+    disk_usage = values.get("disk")
+    disk = disk_usage.use_percent if disk_usage is not None else -1
+    memory_usage, meminfo = values.get("memory", (None, None))
+    memory = memory_usage.available_percent if memory_usage is not None else -1
+    cpu_modes, cpu_cores = values.get("cpu", (None, None))
+    cpu = cpu_modes["idle"] if cpu_modes else -1
+    
+    if disk >= 0:
+        disk_usage_metric.set(disk)
+    
+    if memory >= 0:
+        memory_available_metric.set(memory)
+    
+    if meminfo is not None:
+        for field, value in meminfo.items():
+            meminfo_metric.labels(field=field).set(value)
+    
+    for resource, kinds in values.get("pressure", {}).items():
+        for kind, pressure in kinds.items():
+            for window in ("avg10", "avg60", "avg300"):
+                pressure_metric.labels(resource, kind, window).set(pressure[window])
+            pressure_stalled_metric.labels(resource, kind).set(pressure["total"] / 1e6)
+    
+    if cpu >= 0:
+        cpu_idle_metric.set(cpu)
+        for mode, percent in cpu_modes.items():
+            cpu_mode_metric.labels(mode=mode).set(percent)
+    
+    if cpu_cores is not None:
+        update_core_metrics(cpu_cores)
+    
+    if "mounts" in values:
+        update_mount_metrics(values["mounts"])
+    
+    if "diskio" in values:
+        update_disk_io_metrics(values["diskio"])
+    
+    if "network" in values:
+        update_network_metrics(values["network"])
+    
+    if "load" in values:
+        update_load_metrics(*values["load"])
+    
+    if "schedstat" in values:
+        update_run_delay_metrics(values["schedstat"])
+    
+    if "processes" in values:
+        top_cpu, top_rss = values["processes"]
+        update_process_metrics(process_cpu_metric, top_cpu, lambda p: p.cpu_percent)
+        update_process_metrics(process_rss_metric, top_rss, lambda p: p.rss_bytes)
+    
+    for name in pool.collectors:
+        collector_stale_metric.labels(collector=name).set(int(pool.stale[name]))
+        age = pool.age(name)
+        if age != float("inf"):
+            collector_age_metric.labels(collector=name).set(round(age, 3))
+    
+    if sample_cache is not None:
+        publish_samples(pool)
+    
+    return disk, memory, cpu
+
+
+def publish_samples(pool):
+    """
+    Publica los últimos valores del pool en la cache de muestras para
+    que los checks de cron no vuelvan a recolectarlos.
+    
+    El timestamp de cada grupo es el de su última recolección buena,
+    así un collector stale no parece reciente.
+    """
+    values = pool.values
+    now = time.time()
+    samples = {}
+    
+    if "disk" in values:
+        samples["disk"] = (now - pool.age("disk"), values["disk"])
+    if "memory" in values:
+        samples["memory"] = (now - pool.age("memory"), values["memory"][0])
+    if "cpu" in values:
+        modes = values["cpu"][0]
+        samples["cpu"] = (now - pool.age("cpu"), [modes[mode] for mode in CPU_MODES])
+    memory_pressure = values.get("pressure", {}).get("memory")
+    if memory_pressure is not None:
+        samples["pressure"] = (
+            now - pool.age("pressure"),
+            (memory_pressure["some"]["avg10"], memory_pressure.get("full", {}).get("avg10", 0.0))
+        )
+    
+    try:
+        sample_cache.publish(samples)
+    except (OSError, ValueError, struct.error) as e:
+        logging.error(f"Error publicando la cache de muestras: {e}")
+
+
+class OnDemandCollector:
+    """
+    Collector de prometheus_client que recolecta al scrapear /metrics.
+    
+    Los valores se cachean durante `ttl` segundos. Si varios scrapers
+    llegan a la vez, solo uno recolecta (single-flight) y el resto
+    espera y reutiliza su resultado.
+    """
+    
+    def __init__(self, pool, ttl: float = CACHE_TTL, metrics: list = METRICS):
+        self.pool = pool
+        self.ttl = ttl
+        self.metrics = metrics
+        self.collections = 0
+        self._collected_at = None
+        self._lock = threading.Lock()
+    
+    def _is_fresh(self) -> bool:
+        return (
+            self._collected_at is not None
+            and time.monotonic() - self._collected_at < self.ttl
+        )
+    
+    def refresh(self) -> None:
+        """Recolecta si la cache expiró, deduplicando llamadas concurrentes."""
+        if self._is_fresh():
+            return
+        
+        generation = self.collections
+        with self._lock:
+            # Otro scraper recolectó mientras esperábamos el lock
+            if self.collections != generation or self._is_fresh():
+                return
+            
+            self.pool.collect()
+            update_metrics(self.pool)
+            self._collected_at = time.monotonic()
+            self.collections += 1
+    
+    def describe(self):
+        # Evita que el registry llame a collect() al registrar
+        for metric in self.metrics:
+            yield from metric.describe()
+    
+    def collect(self):
+        self.refresh()
+        for metric in self.metrics:
+            yield from metric.collect()
+
+
+def run_loop(pool, ticker: Ticker = None, stop: threading.Event = None):
+    """
+    Recolecta cada SCRAPE_INTERVAL y actualiza los Gauges.
+    
+    Los ciclos van sobre deadlines fijos (ver scheduler.py): el periodo
+    no deriva con la duración de la recolección y los ticks que se come
+    un ciclo lento se saltan y se cuentan.
+    """
+    
+    logging.info(f"Iniciando recolección cada {SCRAPE_INTERVAL} segundos...")
+    logging.info("Ctrl+C para detener")
+    
+    ticker = ticker or Ticker(SCRAPE_INTERVAL)
+    
     while True:
-        disk = collect_disk_usage()
-        memory = collect_memory_available()
-        cpu = collect_cpu_idle()
+        start = time.monotonic()
+        
+        pool.collect()
+        disk, memory, cpu = update_metrics(pool)
         
-        if disk >= 0:
-            disk_usage_metric.set(disk)
-            logging.info(f"Disk usage: {disk}%")
+        if metrics_cache is not None:
+            try:
+                metrics_cache.refresh()
+            except Exception as e:
+                # Se sigue sirviendo el render anterior
+                logging.error(f"Error renderizando /metrics: {e}")
         
-        if memory >= 0:
-            memory_available_metric.set(memory)
-            logging.info(f"Memory available: {memory}%")
+        logging.info(f"Disk usage: {disk}%")
+        logging.info(f"Memory available: {memory}%")
+        logging.info(f"CPU idle: {cpu}%")
         
-        if cpu >= 0:
-            cpu_idle_metric.set(cpu)
-            logging.info(f"CPU idle: {cpu}%")
+        stale = [name for name, is_stale in pool.stale.items() if is_stale]
+        if stale:
+            logging.warning(f"Collectors stale: {', '.join(stale)}")
             
-        if int(time.time()) % (SCRAPE_INTERVAL * 5) == 0:
+        if SUMMARY_EVERY > 0 and ticker.ticks % SUMMARY_EVERY == 0:
             logging.info(f"Métricas actualizadas - Disco: {disk}%, Memoria: {memory}%, CPU: {cpu}%")
-            
-        time.sleep(SCRAPE_INTERVAL)
-
-except KeyboardInterrupt:
-    logging.info("Deteniendo exporter por interrupción del usuario")
-except Exception as e:
-    logging.error(f"Error en el loop principal: {e}")
-    exit(1)
         
+        elapsed = time.monotonic() - start
+        if elapsed > SCRAPE_INTERVAL:
+            loop_overruns_metric.inc()
+            logging.warning(
+                f"El ciclo de recolección duró {elapsed:.2f}s "
+                f"(más que SCRAPE_INTERVAL={SCRAPE_INTERVAL}s)"
+            )
+        logging.debug(
+            f"Ciclo de recolección en {elapsed:.3f}s",
+            extra={"event": "collect", "duration": round(elapsed, 4)}
+        )
+        
+        missed = ticker.advance()
+        if missed:
+            loop_missed_ticks_metric.inc(missed)
+            logging.warning(f"Saltados {missed} ticks por un ciclo atrasado")
         
+        if ticker.wait(stop):
+            return
+
+
+def main():
+    global sample_cache, metrics_cache
+    setup_logging()
+    
+    pool = make_pool()
+    register_self_metrics(pool)
+    
+    if SAMPLE_CACHE:
+        try:
+            sample_cache = SampleCacheWriter(SAMPLE_CACHE_PATH, DISK_PATH)
+            logging.info(f"Publicando muestras en {SAMPLE_CACHE_PATH}")
+        except OSError as e:
+            logging.error(f"No se pudo crear la cache de muestras: {e}")
+    
+    ondemand = None
+    if EXPORTER_MODE == "ondemand":
+        ondemand = OnDemandCollector(pool)
+        REGISTRY.register(ondemand)
+        logging.info(f"Modo ondemand: recolección al scrapear (cache {CACHE_TTL}s)")
+    else:
+        for metric in METRICS:
+            REGISTRY.register(metric)
+    
+    logging.info(f"Iniciando servidor HTTP en puerto {METRICS_PORT}")
+    
+    try:
+        if METRICS_PRERENDER:
+            # En ondemand se renderiza de nuevo solo tras cada recolección
+            metrics_cache = MetricsCache(REGISTRY, source=ondemand)
+            start_server(METRICS_PORT, metrics_cache)
+        else:
+            start_http_server(METRICS_PORT)
+        logging.info(f"Servidor HTTP iniciado en http://localhost:{METRICS_PORT}/metrics")
+    except Exception as e:
+        logging.error(f"Error iniciando servidor HTTP: {e}")
+        exit(1)
+    
+    try:
+        if EXPORTER_MODE == "ondemand":
+            threading.Event().wait()
+        else:
+            run_loop(pool)
+    
+    except KeyboardInterrupt:
+        logging.info("Deteniendo exporter por interrupción del usuario")
+    except Exception as e:
+        logging.error(f"Error en el loop principal: {e}")
+        exit(1)
+    finally:
+        pool.shutdown()
+
+
+if __name__ == "__main__":
+    main()
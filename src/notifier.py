@@ -5,39 +5,110 @@ Soporta múltiples canales: Discord, Slack, archivos.
 """
 
 import requests
+from requests.adapters import HTTPAdapter
+import atexit
 import json
+import logging
 import os
+import random
+import sys
+import threading
+import time
 from datetime import datetime
 
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+from alert_spool import AlertSpool
+
+# Ventana (segundos) para agrupar alertas concurrentes en un solo POST
+COALESCE_WINDOW = float(os.environ.get("NOTIFY_COALESCE_WINDOW", "0.5"))
+
+# Discord acepta como máximo 10 embeds por mensaje de webhook
+MAX_EMBEDS = 10
+
+# Reintentos ante 429 y espera máxima que aceptamos de Retry-After
+MAX_RETRIES = 3
+MAX_RETRY_AFTER = 30.0
+
+# Spool en disco: las alertas se registran antes de enviarse y un hilo
+# en segundo plano las reintenta con backoff exponencial + jitter
+SPOOL_ENABLED = os.environ.get("ALERT_SPOOL", "true").lower() == "true"
+BACKOFF_BASE = float(os.environ.get("SPOOL_BACKOFF_BASE", "2"))
+BACKOFF_MAX = float(os.environ.get("SPOOL_BACKOFF_MAX", "300"))
+
+# Timeout del último intento de entrega al terminar el proceso
+EXIT_TIMEOUT = float(os.environ.get("SPOOL_EXIT_TIMEOUT", "3"))
+
+
+def is_retryable(status):
+    """
+    Indica si un envío fallido puede salir bien más tarde.
+
+    Args:
+        status (int): Código HTTP de la respuesta, None si hubo error de red
+
+    Returns:
+        bool: True para errores de red, 408, 429 y 5xx; False para el
+        resto de 4xx (embed inválido, webhook borrado...), que fallarían
+        igual en cada reintento
+    """
+    return status is None or status in (408, 429) or status >= 500
+
+
 class Notifier:
     """
     Clase para enviar notificaciones a diferentes canales.
+
+    Reutiliza una sesión HTTP (keep-alive) entre envíos y agrupa las
+    alertas que llegan dentro de la ventana de coalescing en un único
+    payload con varios embeds.
+
+    Con el spool activado, cada alerta se registra en disco antes de
+    enviarse y solo se da por entregada cuando Discord responde 204.
     """
-    
-    def __init__(self):
+
+    def __init__(self, spool=None):
         """
         Inicializa el notificador leyendo configuración.
         """
         # Leer webhook de Discord desde variable de entorno
         self.discord_webhook = os.environ.get("DISCORD_WEBHOOK", "")
-        
+
         # Flag para habilitar/deshabilitar notificaciones
         self.enabled = os.environ.get("NOTIFICATIONS_ENABLED", "true").lower() == "true"
-    
-    def send_discord(self, title, message, level="INFO"):
+
+        # Sesión con pool de conexiones: evita un handshake TCP+TLS por alerta
+        self.session = requests.Session()
+        self.session.mount("https://", HTTPAdapter(pool_connections=1, pool_maxsize=4))
+
+        self.coalesce_window = COALESCE_WINDOW
+        self._pending = []
+        self._lock = threading.Lock()
+        self._timer = None
+
+        if spool is None and SPOOL_ENABLED:
+            spool = AlertSpool()
+        self.spool = spool
+        self.failures = 0
+        self._wakeup = threading.Event()
+        self._drainer = None
+
+        # Alertas que quedaron pendientes de ejecuciones anteriores
+        if self.spool is not None and self._can_send() and not self.spool.is_empty():
+            self._start_drainer()
+            self._wakeup.set()
+
+    def _can_send(self):
+        return self.enabled and bool(self.discord_webhook)
+
+    def build_embed(self, title, message, level="INFO"):
         """
-        Envía notificación a Discord.
-        
+        Construye el embed de Discord de una alerta.
+
         Args:
             title (str): Título de la alerta
             message (str): Mensaje detallado
             level (str): Nivel de severidad (INFO, WARNING, CRITICAL)
         """
-        # Si no está habilitado o no hay webhook, no hacer nada
-        if not self.enabled or not self.discord_webhook:
-            print("WARNING: DISCORD_WEBHOOK no definido, no se enviará alerta")
-            return False
-        
         # Colores según severidad (en hexadecimal)
         colors = {
             "INFO": 3447003,      # Azul
@@ -45,7 +116,7 @@ class Notifier:
             "WARNING": 16776960,  # Amarillo
             "CRITICAL": 15158332  # Rojo
         }
-        
+
         # Emojis según severidad
         emojis = {
             "INFO": "ℹ️",
@@ -53,9 +124,9 @@ class Notifier:
             "WARNING": "⚠️",
             "CRITICAL": "🔥"
         }
-        
+
         # Construir el mensaje para Discord (formato embed)
-        embed = {
+        return {
             "title": f"{emojis.get(level, '📊')} {title}",
             "description": message,
             "color": colors.get(level, 3447003),
@@ -64,35 +135,227 @@ class Notifier:
                 "text": f"Monitor SRE | {level}"
             }
         }
-        
-        payload = {
-            "embeds": [embed]
-        }
-        
-        try:
-            # Enviar POST request al webhook
-            response = requests.post(
-                self.discord_webhook,
-                data=json.dumps(payload),
-                headers={"Content-Type": "application/json"},
-                timeout=10
-            )
-            
+
+    def _post_payload(self, payload, timeout=10, retry=True):
+        """
+        Envía un payload al webhook respetando los 429 de Discord.
+
+        Args:
+            payload (dict): Cuerpo del mensaje
+            timeout (float): Timeout de la petición HTTP
+            retry (bool): Reintentar tras un 429 esperando Retry-After
+
+        Returns:
+            bool: True si Discord respondió 204
+        """
+        return self._post(payload, timeout, retry) == 204
+
+    def _post(self, payload, timeout=10, retry=True):
+        """
+        Como _post_payload, pero devuelve el código HTTP de la última
+        respuesta (None si la petición no llegó a completarse).
+        """
+        retries = MAX_RETRIES if retry else 0
+        for attempt in range(retries + 1):
+            try:
+                response = self.session.post(
+                    self.discord_webhook,
+                    data=json.dumps(payload),
+                    headers={"Content-Type": "application/json"},
+                    timeout=timeout
+                )
+            except Exception as e:
+                print(f"Excepción al enviar a Discord: {e}")
+                return None
+
             # Verificar si fue exitoso
             if response.status_code == 204:
-                return True
-            else:
-                print(f"Error al enviar a Discord: {response.status_code}")
-                return False
-                
-        except Exception as e:
-            print(f"Excepción al enviar a Discord: {e}")
+                return 204
+
+            if response.status_code == 429 and attempt < retries:
+                retry_after = self._retry_after(response)
+                print(f"Discord rate limit, reintentando en {retry_after}s")
+                time.sleep(retry_after)
+                continue
+
+            print(f"Error al enviar a Discord: {response.status_code}")
+            return response.status_code
+
+        return None
+
+    @staticmethod
+    def _retry_after(response):
+        """Segundos a esperar según la cabecera Retry-After o el body."""
+        value = response.headers.get("Retry-After")
+        if value is None:
+            try:
+                value = response.json().get("retry_after")
+            except ValueError:
+                value = None
+        try:
+            return min(max(float(value), 0.0), MAX_RETRY_AFTER)
+        except (TypeError, ValueError):
+            return 1.0
+
+    def post_embeds(self, embeds):
+        """
+        Envía embeds a Discord en payloads de hasta MAX_EMBEDS.
+
+        Returns:
+            bool: True si todos los payloads se entregaron
+        """
+        ok = True
+        for i in range(0, len(embeds), MAX_EMBEDS):
+            ok = self._post_payload({"embeds": embeds[i:i + MAX_EMBEDS]}) and ok
+        return ok
+
+    def send_discord(self, title, message, level="INFO"):
+        """
+        Envía notificación a Discord de inmediato.
+
+        Args:
+            title (str): Título de la alerta
+            message (str): Mensaje detallado
+            level (str): Nivel de severidad (INFO, WARNING, CRITICAL)
+        """
+        # Si no está habilitado o no hay webhook, no hacer nada
+        if not self.enabled or not self.discord_webhook:
+            print("WARNING: DISCORD_WEBHOOK no definido, no se enviará alerta")
             return False
-    
+
+        return self.post_embeds([self.build_embed(title, message, level)])
+
+    def queue_discord(self, title, message, level="INFO"):
+        """
+        Encola una alerta para enviarla agrupada con las que lleguen
+        dentro de la ventana de coalescing.
+        """
+        if not self._can_send():
+            print("WARNING: DISCORD_WEBHOOK no definido, no se enviará alerta")
+            return
+
+        if self.spool is not None:
+            # Persistir primero: el envío lo hace el drainer en segundo plano
+            self.spool.append(self.build_embed(title, message, level))
+            self._start_drainer()
+            self._wakeup.set()
+            return
+
+        with self._lock:
+            self._pending.append(self.build_embed(title, message, level))
+            full = len(self._pending) >= MAX_EMBEDS
+
+            if self._timer is None and not full:
+                self._timer = threading.Timer(self.coalesce_window, self.flush)
+                self._timer.daemon = True
+                self._timer.start()
+
+        if full:
+            self.flush()
+
+    def _start_drainer(self):
+        with self._lock:
+            if self._drainer is None:
+                self._drainer = threading.Thread(
+                    target=self._drain_loop, name="alert-drainer", daemon=True
+                )
+                self._drainer.start()
+
+    def backoff_delay(self):
+        """Backoff exponencial con jitter según los fallos consecutivos."""
+        delay = min(BACKOFF_MAX, BACKOFF_BASE * 2 ** max(self.failures - 1, 0))
+        return delay / 2 + random.uniform(0, delay / 2)
+
+    def _drain_loop(self):
+        """Hilo que entrega el spool y reintenta con backoff si falla."""
+        while True:
+            if self.failures:
+                time.sleep(self.backoff_delay())
+            else:
+                self._wakeup.wait()
+                self._wakeup.clear()
+                # Dar tiempo a que lleguen más alertas del mismo ciclo
+                time.sleep(self.coalesce_window)
+
+            result = self.drain_once()
+            if result is False:
+                self.failures += 1
+                print(f"Entrega de alertas fallida ({self.failures}), reintentando con backoff")
+            else:
+                self.failures = 0
+
+    def drain_once(self, timeout=10, retry=True, wait=0):
+        """
+        Intenta entregar todas las alertas del spool.
+
+        Args:
+            timeout (float): Timeout de cada petición HTTP
+            retry (bool): Reintentar tras un 429
+            wait (float): Segundos que se espera el bloqueo de entrega
+                si lo tiene otro proceso o el drainer
+
+        Un lote rechazado de forma permanente (4xx salvo 408/429) se
+        registra en el log como dead-letter y se descarta, para que no
+        bloquee las alertas que vienen detrás.
+
+        Returns:
+            True si se entregaron (o descartaron), False si alguna falló
+            y hay que reintentar, None si no había nada (u otro proceso
+            está entregando)
+        """
+        with self.spool.drain_lock(wait) as acquired:
+            if not acquired:
+                return None
+
+            pending = self.spool.pending()
+            if not pending:
+                return None
+
+            for i in range(0, len(pending), MAX_EMBEDS):
+                batch = pending[i:i + MAX_EMBEDS]
+                payload = {"embeds": [embed for _, embed in batch]}
+                status = self._post(payload, timeout=timeout, retry=retry)
+                if status != 204:
+                    if is_retryable(status):
+                        return False
+                    logging.error(
+                        f"Discord rechazó el lote ({status}), se descartan "
+                        f"{len(batch)} alertas: {json.dumps(payload, ensure_ascii=False)}"
+                    )
+                self.spool.ack([alert_id for alert_id, _ in batch])
+            return True
+
+    def flush(self):
+        """
+        Envía ya todas las alertas pendientes.
+
+        Con spool hace un único intento corto: si el drainer (u otro
+        proceso) está entregando, espera hasta EXIT_TIMEOUT a que suelte
+        el bloqueo. Lo que no se entregue queda en disco para el
+        siguiente proceso.
+
+        Returns:
+            bool: True si se entregaron (o no había nada pendiente)
+        """
+        if self.spool is not None:
+            if not self._can_send():
+                return True
+            return self.drain_once(timeout=EXIT_TIMEOUT, retry=False, wait=EXIT_TIMEOUT) is not False
+
+        with self._lock:
+            embeds, self._pending = self._pending, []
+            if self._timer is not None:
+                self._timer.cancel()
+                self._timer = None
+
+        if not embeds:
+            return True
+        return self.post_embeds(embeds)
+
     def send_alert(self, title, message, level="INFO"):
         """
         Envía alerta a todos los canales configurados.
-        
+
         Args:
             title (str): Título de la alerta
             message (str): Mensaje detallado
@@ -100,18 +363,36 @@ class Notifier:
         """
         if not self.enabled:
             return
-        
+
         # Enviar a Discord
-        self.send_discord(title, message, level)
-        
+        if self.coalesce_window > 0:
+            self.queue_discord(title, message, level)
+        else:
+            self.send_discord(title, message, level)
+
         # Aquí podrías añadir más canales en el futuro:
         # self.send_slack(title, message, level)
         # self.send_email(title, message, level)
 
+# Instancia compartida por el proceso (sesión y cola reutilizadas)
+_notifier = None
+_notifier_lock = threading.Lock()
+
+def get_notifier():
+    """
+    Devuelve el Notifier compartido del proceso.
+    Al salir se envían las alertas que sigan en la ventana de coalescing.
+    """
+    global _notifier
+    with _notifier_lock:
+        if _notifier is None:
+            _notifier = Notifier()
+            atexit.register(_notifier.flush)
+        return _notifier
+
 # Función helper para uso rápido
 def send_alert(title, message, level="INFO"):
     """
     Función de conveniencia para enviar alertas rápidamente.
     """
-    notifier = Notifier()
-    notifier.send_alert(title, message, level)
\ No newline at end of file
+    get_notifier().send_alert(title, message, level)
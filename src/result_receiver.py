@@ -0,0 +1,311 @@
+#!/usr/bin/env python3
+"""
+Receptor central de resultados de checks.
+
+Los agentes (BaseCheck con RESULT_SINK_URL) envían lotes de resultados
+comprimidos con gzip a POST /results. El receptor guarda en memoria
+el último estado de cada (host, check, clave) y expone en GET /metrics
+gauges agregados de toda la flota:
+
+- sre_fleet_hosts / sre_fleet_stale_hosts: hosts vistos y hosts sin
+  reportar desde hace más de FLEET_STALE_AFTER segundos
+- sre_fleet_checks{check,state}: objetivos en cada estado
+- sre_fleet_results_received_total / sre_fleet_batches_received_total
+
+GET /state devuelve el detalle en JSON (opcionalmente ?host=...).
+
+Los objetivos que no se reportan desde hace más de FLEET_EXPIRE_AFTER
+segundos (un montaje que ya no existe, un host dado de baja) se olvidan,
+así la memoria no crece con cada objetivo que pasó por la flota.
+
+Uso:
+    python3 src/result_receiver.py    # escucha en RECEIVER_PORT (9200)
+"""
+
+import json
+import logging
+import os
+import sys
+import threading
+import time
+import zlib
+from collections import Counter
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import parse_qs, urlparse
+
+from prometheus_client import CollectorRegistry, generate_latest, CONTENT_TYPE_LATEST
+from prometheus_client.core import CounterMetricFamily, GaugeMetricFamily
+
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+from logging_setup import setup_logging
+
+RECEIVER_PORT = int(os.environ.get("RECEIVER_PORT", "9200"))
+STALE_AFTER = float(os.environ.get("FLEET_STALE_AFTER", "300"))
+EXPIRE_AFTER = float(os.environ.get("FLEET_EXPIRE_AFTER", "86400"))
+
+# Tamaño máximo de un lote (comprimido y descomprimido)
+MAX_BODY = 8 * 1024 * 1024
+
+STATES = ("OK", "WARNING", "CRITICAL")
+
+
+def decompress(body: bytes) -> bytes:
+    """
+    Descomprime un body gzip sin pasar de MAX_BODY bytes.
+
+    Raises:
+        ValueError: Si el contenido descomprimido es demasiado grande
+        zlib.error: Si no es gzip válido
+    """
+    decompressor = zlib.decompressobj(16 + zlib.MAX_WBITS)
+    data = decompressor.decompress(body, MAX_BODY)
+    if decompressor.unconsumed_tail:
+        raise ValueError("lote demasiado grande")
+    return data
+
+
+class FleetState:
+    """
+    Último estado de cada (host, check, clave) de la flota.
+
+    Los conteos por (check, estado) se mantienen incrementalmente en
+    cada actualización, así el scrape no recorre todos los resultados.
+    """
+
+    def __init__(self):
+        # (host, check, key) -> (state, value, ts)
+        self.latest = {}
+        # host -> instante (epoch) del último lote recibido
+        self.last_seen = {}
+        # (host, check, key) -> instante (epoch) en que se reportó por última vez
+        self.target_seen = {}
+        self.counts = Counter()
+        self.results_received = 0
+        self.batches_received = 0
+        self._lock = threading.Lock()
+        self._next_expiry = 0.0
+
+    def update(self, host: str, results: list, now: float = None) -> int:
+        """
+        Aplica un lote de resultados de un host.
+
+        Returns:
+            Número de resultados válidos aplicados
+        """
+        now = now or time.time()
+        applied = 0
+
+        with self._lock:
+            for result in results:
+                if not isinstance(result, dict):
+                    continue
+                check, state = result.get("check"), result.get("state")
+                if not isinstance(check, str) or state not in STATES:
+                    continue
+
+                key = result.get("key")
+                target = (host, check, key if key is None else str(key))
+                self.target_seen[target] = now
+                previous = self.latest.get(target)
+                ts = result.get("ts")
+                if not isinstance(ts, (int, float)):
+                    ts = now
+
+                # Los lotes pueden llegar desordenados: no retroceder
+                if previous is not None and previous[2] > ts:
+                    continue
+                if previous is not None:
+                    self.counts[(check, previous[0])] -= 1
+
+                self.latest[target] = (state, result.get("value"), ts)
+                self.counts[(check, state)] += 1
+                applied += 1
+
+            self.last_seen[host] = now
+            self.results_received += applied
+            self.batches_received += 1
+        return applied
+
+    def snapshot(self, host: str = None) -> list:
+        """Estado detallado (de un host o de todos) para /state."""
+        with self._lock:
+            items = list(self.latest.items())
+        return [
+            {"host": h, "check": c, "key": k, "state": s, "value": v, "ts": ts}
+            for (h, c, k), (s, v, ts) in items
+            if host is None or h == host
+        ]
+
+    def stale_hosts(self, now: float = None) -> int:
+        now = now or time.time()
+        with self._lock:
+            return sum(1 for seen in self.last_seen.values() if now - seen > STALE_AFTER)
+
+    def expire(self, now: float = None, force: bool = False) -> int:
+        """
+        Olvida los objetivos y hosts sin reportar desde hace más de
+        EXPIRE_AFTER segundos.
+
+        Recorre todos los objetivos, así que sin `force` lo hace como
+        mucho una vez cada EXPIRE_AFTER / 10 segundos.
+
+        Returns:
+            Número de objetivos eliminados
+        """
+        now = now or time.time()
+        with self._lock:
+            if not force and now < self._next_expiry:
+                return 0
+            self._next_expiry = now + EXPIRE_AFTER / 10
+
+            expired = [t for t, seen in self.target_seen.items() if now - seen > EXPIRE_AFTER]
+            for target in expired:
+                del self.target_seen[target]
+                previous = self.latest.pop(target, None)
+                if previous is not None:
+                    self.counts[(target[1], previous[0])] -= 1
+
+            for host in [h for h, seen in self.last_seen.items() if now - seen > EXPIRE_AFTER]:
+                del self.last_seen[host]
+
+            # Fuera los conteos de checks que ya no tiene ningún objetivo
+            present = {check for _, check, _ in self.latest}
+            for group in [g for g, n in self.counts.items() if n <= 0 and g[0] not in present]:
+                del self.counts[group]
+        return len(expired)
+
+
+class FleetCollector:
+    """Gauges agregados de la flota para prometheus_client."""
+
+    def __init__(self, fleet: FleetState):
+        self.fleet = fleet
+
+    def collect(self):
+        fleet = self.fleet
+        fleet.expire()
+
+        hosts = GaugeMetricFamily("sre_fleet_hosts", "Hosts que han enviado resultados")
+        hosts.add_metric([], len(fleet.last_seen))
+        yield hosts
+
+        stale = GaugeMetricFamily(
+            "sre_fleet_stale_hosts",
+            f"Hosts sin enviar resultados desde hace más de {STALE_AFTER:g}s"
+        )
+        stale.add_metric([], fleet.stale_hosts())
+        yield stale
+
+        checks = GaugeMetricFamily(
+            "sre_fleet_checks", "Objetivos de la flota en cada estado", labels=["check", "state"]
+        )
+        with fleet._lock:
+            counts = dict(fleet.counts)
+        for (check, state), n in sorted(counts.items()):
+            checks.add_metric([check, state], n)
+        yield checks
+
+        results = CounterMetricFamily("sre_fleet_results_received", "Resultados recibidos")
+        results.add_metric([], fleet.results_received)
+        yield results
+
+        batches = CounterMetricFamily("sre_fleet_batches_received", "Lotes recibidos")
+        batches.add_metric([], fleet.batches_received)
+        yield batches
+
+
+class ReceiverHandler(BaseHTTPRequestHandler):
+    """Handler HTTP del receptor (una instancia por petición)."""
+
+    # Keep-alive: los agentes reutilizan la conexión entre lotes
+    protocol_version = "HTTP/1.1"
+
+    fleet = None
+    registry = None
+
+    def do_POST(self):
+        if urlparse(self.path).path != "/results":
+            return self._reply(404, b"not found\n")
+
+        try:
+            length = int(self.headers.get("Content-Length", 0))
+        except ValueError:
+            return self._reply(400, b"invalid Content-Length\n")
+        if length <= 0 or length > MAX_BODY:
+            return self._reply(413 if length > MAX_BODY else 400, b"invalid body\n")
+
+        body = self.rfile.read(length)
+        try:
+            if self.headers.get("Content-Encoding") == "gzip":
+                body = decompress(body)
+            batch = json.loads(body)
+            host, results = batch["host"], batch["results"]
+            if not isinstance(host, str) or not isinstance(results, list):
+                raise ValueError("formato inválido")
+        except (zlib.error, ValueError, KeyError, TypeError) as e:
+            return self._reply(400, f"invalid batch: {e}\n".encode())
+
+        self.fleet.update(host, results)
+        self._reply(204)
+
+    def do_GET(self):
+        url = urlparse(self.path)
+        if url.path == "/metrics":
+            return self._reply(200, generate_latest(self.registry), CONTENT_TYPE_LATEST)
+        if url.path == "/state":
+            host = parse_qs(url.query).get("host", [None])[0]
+            body = json.dumps(self.fleet.snapshot(host)).encode()
+            return self._reply(200, body, "application/json")
+        self._reply(404, b"not found\n")
+
+    def _reply(self, status: int, body: bytes = b"", content_type: str = "text/plain"):
+        self.send_response(status)
+        if status >= 400:
+            # El body de la petición puede no haberse leído: no reutilizar
+            self.send_header("Connection", "close")
+            self.close_connection = True
+        if status != 204:
+            self.send_header("Content-Type", content_type)
+            self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        if body and status != 204:
+            self.wfile.write(body)
+
+    def log_message(self, format, *args):
+        # Sin una línea de log por petición: con miles de agentes sería el cuello de botella
+        pass
+
+
+def make_server(port: int = RECEIVER_PORT, fleet: FleetState = None, host: str = ""):
+    """
+    Crea el servidor del receptor (sin arrancarlo).
+
+    Returns:
+        ThreadingHTTPServer con `fleet` accesible en server.fleet
+    """
+    fleet = fleet or FleetState()
+    registry = CollectorRegistry()
+    registry.register(FleetCollector(fleet))
+
+    handler = type("Handler", (ReceiverHandler,), {"fleet": fleet, "registry": registry})
+    server = ThreadingHTTPServer((host, port), handler)
+    server.daemon_threads = True
+    server.fleet = fleet
+    return server
+
+
+def main():
+    setup_logging()
+
+    server = make_server()
+    logging.info(f"Receptor de resultados escuchando en :{server.server_address[1]}")
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        logging.info("Deteniendo receptor por interrupción del usuario")
+    finally:
+        server.server_close()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,152 @@
+#!/usr/bin/env python3
+"""
+Envío de resultados de checks a un receptor central (opcional).
+
+Cada handle_state_change deja el resultado (check, clave, estado,
+valor) en un buffer en memoria. El buffer se envía por HTTP POST como
+JSON comprimido con gzip cuando se llena, cuando pasa RESULT_SINK_INTERVAL
+o al terminar el proceso. Se activa definiendo RESULT_SINK_URL
+(ej: http://monitor:9200/results, ver result_receiver.py).
+
+El envío es best-effort: si el receptor no responde los resultados se
+descartan (el siguiente ciclo enviará el estado actualizado).
+"""
+
+import atexit
+import gzip
+import json
+import logging
+import os
+import socket
+import threading
+import time
+from collections import deque
+
+import requests
+
+RESULT_SINK_URL = os.environ.get("RESULT_SINK_URL", "")
+RESULT_SINK_BATCH = int(os.environ.get("RESULT_SINK_BATCH", "100"))
+RESULT_SINK_INTERVAL = float(os.environ.get("RESULT_SINK_INTERVAL", "5"))
+RESULT_SINK_TIMEOUT = float(os.environ.get("RESULT_SINK_TIMEOUT", "3"))
+HOST_NAME = os.environ.get("RESULT_SINK_HOST", socket.gethostname())
+
+# Límite del buffer si el receptor no está disponible
+MAX_BUFFER = 10000
+
+
+def encode_batch(host: str, results: list) -> bytes:
+    """Serializa y comprime un lote de resultados."""
+    payload = {"host": host, "sent_at": time.time(), "results": results}
+    return gzip.compress(json.dumps(payload, separators=(",", ":")).encode(), compresslevel=5)
+
+
+class ResultSink:
+    """
+    Buffer de resultados con envío por lotes.
+
+    Atributos:
+        sent: resultados entregados
+        dropped: resultados descartados (receptor caído o buffer lleno)
+    """
+
+    def __init__(
+        self,
+        url: str = RESULT_SINK_URL,
+        host: str = HOST_NAME,
+        batch_size: int = RESULT_SINK_BATCH,
+        interval: float = RESULT_SINK_INTERVAL
+    ):
+        self.url = url
+        self.host = host
+        self.batch_size = batch_size
+        self.interval = interval
+
+        # Conexión reutilizada entre lotes (keep-alive)
+        self.session = requests.Session()
+
+        self.sent = 0
+        self.dropped = 0
+        self._buffer = deque()
+        self._lock = threading.Lock()
+        self._send_lock = threading.Lock()
+        self._timer = None
+
+    def record(self, check: str, state: str, value: str = None, key: str = None) -> None:
+        """Añade un resultado al buffer y lo envía si el lote está lleno."""
+        result = {"check": check, "key": key, "state": state, "value": value, "ts": time.time()}
+
+        with self._lock:
+            if len(self._buffer) >= MAX_BUFFER:
+                self._buffer.popleft()
+                self.dropped += 1
+            self._buffer.append(result)
+            full = len(self._buffer) >= self.batch_size
+
+            if self._timer is None and not full:
+                self._timer = threading.Timer(self.interval, self.flush)
+                self._timer.daemon = True
+                self._timer.start()
+
+        if full:
+            self.flush()
+
+    def flush(self) -> bool:
+        """
+        Envía todo lo pendiente en lotes de batch_size.
+
+        Returns:
+            True si se entregó todo (o no había nada)
+        """
+        with self._lock:
+            results = list(self._buffer)
+            self._buffer.clear()
+            if self._timer is not None:
+                self._timer.cancel()
+                self._timer = None
+
+        ok = True
+        with self._send_lock:
+            for i in range(0, len(results), self.batch_size):
+                batch = results[i:i + self.batch_size]
+                if self._post(batch):
+                    self.sent += len(batch)
+                else:
+                    self.dropped += len(batch)
+                    ok = False
+        return ok
+
+    def _post(self, batch: list) -> bool:
+        try:
+            response = self.session.post(
+                self.url,
+                data=encode_batch(self.host, batch),
+                headers={"Content-Type": "application/json", "Content-Encoding": "gzip"},
+                timeout=RESULT_SINK_TIMEOUT
+            )
+        except requests.RequestException as e:
+            logging.warning(f"No se pudieron enviar {len(batch)} resultados a {self.url}: {e}")
+            return False
+
+        if response.status_code >= 300:
+            logging.warning(f"El receptor de resultados respondió {response.status_code}")
+            return False
+        return True
+
+
+_sink = None
+_sink_lock = threading.Lock()
+
+
+def get_result_sink():
+    """
+    Devuelve el ResultSink compartido del proceso, o None si
+    RESULT_SINK_URL no está definido. Al salir se envía lo pendiente.
+    """
+    global _sink
+    if not RESULT_SINK_URL:
+        return None
+    with _sink_lock:
+        if _sink is None:
+            _sink = ResultSink()
+            atexit.register(_sink.flush)
+        return _sink
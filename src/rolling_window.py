@@ -0,0 +1,107 @@
+#!/usr/bin/env python3
+"""
+Ventana deslizante compacta de muestras recientes.
+
+Buffer circular de tamaño fijo sobre array('d') con estadísticas en
+O(1): media (suma acumulada), mínimo y máximo (colas monótonas) y
+conteo de muestras por nivel de estado para reglas "N de las últimas M".
+La memoria no crece aunque el proceso corra indefinidamente.
+"""
+
+from array import array
+from collections import deque
+
+# Niveles de estado como enteros (el índice es la severidad)
+LEVELS = ("OK", "WARNING", "CRITICAL")
+
+
+class RollingWindow:
+    """
+    Últimas `capacity` muestras de una métrica y su nivel de estado.
+    """
+
+    __slots__ = (
+        "capacity", "_values", "_levels", "_count", "_total",
+        "_sum", "_min", "_max", "_level_counts",
+    )
+
+    def __init__(self, capacity: int):
+        if capacity < 1:
+            raise ValueError("La ventana necesita al menos una muestra")
+
+        self.capacity = capacity
+        self._values = array("d", bytes(8 * capacity))
+        self._levels = array("b", bytes(capacity))
+        self._count = 0
+        # Número total de muestras añadidas (posición absoluta)
+        self._total = 0
+        self._sum = 0.0
+        # Colas monótonas de posiciones absolutas para min/max
+        self._min = deque()
+        self._max = deque()
+        self._level_counts = array("l", [0] * len(LEVELS))
+
+    def append(self, value: float, level: int = 0) -> None:
+        """Añade una muestra, descartando la más antigua si está llena."""
+        # float: int.__le__(float) devuelve NotImplemented en las colas
+        value = float(value)
+        pos = self._total
+        slot = pos % self.capacity
+
+        if self._count == self.capacity:
+            self._sum -= self._values[slot]
+            self._level_counts[self._levels[slot]] -= 1
+        else:
+            self._count += 1
+
+        self._values[slot] = value
+        self._levels[slot] = level
+        self._sum += value
+        self._level_counts[level] += 1
+        self._total += 1
+
+        # Recalcular la suma en cada vuelta completa evita que se
+        # acumule error de coma flotante (coste amortizado O(1))
+        if slot == self.capacity - 1:
+            self._sum = sum(self._values[:self._count])
+
+        oldest = self._total - self._count
+        for queue, better in ((self._min, value.__le__), (self._max, value.__ge__)):
+            while queue and better(self._values[queue[-1] % self.capacity]):
+                queue.pop()
+            queue.append(pos)
+            while queue[0] < oldest:
+                queue.popleft()
+
+    def __len__(self) -> int:
+        return self._count
+
+    @property
+    def mean(self) -> float:
+        return self._sum / self._count if self._count else 0.0
+
+    @property
+    def min(self) -> float:
+        return self._values[self._min[0] % self.capacity] if self._count else 0.0
+
+    @property
+    def max(self) -> float:
+        return self._values[self._max[0] % self.capacity] if self._count else 0.0
+
+    @property
+    def last(self) -> float:
+        return self._values[(self._total - 1) % self.capacity] if self._count else 0.0
+
+    def count_at_least(self, level: int) -> int:
+        """Número de muestras de la ventana con nivel >= level."""
+        return sum(self._level_counts[level:])
+
+    def sustained_level(self, min_samples: int) -> int:
+        """
+        Nivel más alto alcanzado por al menos `min_samples` muestras
+        de la ventana (regla "N de las últimas M").
+        """
+        for level in range(len(LEVELS) - 1, 0, -1):
+            if self.count_at_least(level) >= min_samples:
+                return level
+        return 0
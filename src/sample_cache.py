@@ -0,0 +1,219 @@
+#!/usr/bin/env python3
+"""
+Cache de muestras en memoria compartida.
+
+metrics_exporter.py publica en cada ciclo sus últimas lecturas de
+disco, memoria, CPU y presión en un archivo de layout fijo mapeado en
+memoria (STATE_DIR/samples.cache). Los checks de cron lo leen con mmap
+y, si la muestra es reciente (SAMPLE_CACHE_MAX_AGE), la usan en lugar
+de volver a recolectar. Si el archivo no existe o está viejo, cada
+check recolecta por su cuenta como siempre.
+
+Layout (little endian):
+
+    0   magic "SREC" | versión (uint32) | secuencia (uint64)
+    16  ruta de disco del exporter (256 bytes, UTF-8 rellenado con \\0)
+    272 por cada grupo de GROUPS: timestamp (double, epoch) + valores (double)
+
+Seqlock: el único escritor (el exporter) pone la secuencia impar,
+escribe y la vuelve a poner par. El lector repite la lectura si la
+secuencia era impar o cambió entre el principio y el final, así nunca
+ve una muestra a medio escribir.
+"""
+
+import logging
+import mmap
+import os
+import struct
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+from collectors import CPU_MODES, DiskUsage, MemoryUsage
+
+STATE_DIR = os.environ.get("STATE_DIR", "/tmp")
+SAMPLE_CACHE_PATH = os.environ.get("SAMPLE_CACHE_PATH", f"{STATE_DIR}/samples.cache")
+
+# Edad máxima (s) de una muestra para que los checks la usen
+SAMPLE_CACHE_MAX_AGE = float(os.environ.get("SAMPLE_CACHE_MAX_AGE", "30"))
+
+MAGIC = b"SREC"
+VERSION = 1
+
+HEADER = struct.Struct("<4sIQ")
+SEQ_OFFSET = 8
+PATH_SIZE = 256
+PATH_OFFSET = HEADER.size
+
+# Grupo -> campos, en el orden del layout
+GROUPS = {
+    "disk": DiskUsage._fields,
+    "memory": MemoryUsage._fields,
+    "cpu": CPU_MODES,
+    "pressure": ("memory_some_avg10", "memory_full_avg10"),
+}
+
+
+def _layout() -> tuple:
+    """Offset y struct de cada grupo, y tamaño total del archivo."""
+    offsets = {}
+    offset = PATH_OFFSET + PATH_SIZE
+    for group, fields in GROUPS.items():
+        layout = struct.Struct(f"<d{len(fields)}d")
+        offsets[group] = (offset, layout)
+        offset += layout.size
+    return offsets, offset
+
+
+GROUP_LAYOUT, CACHE_SIZE = _layout()
+
+# Reintentos del lector si coincide con una escritura
+READ_RETRIES = 100
+
+
+class SampleCacheWriter:
+    """Escritor de la cache (un solo proceso: el exporter)."""
+
+    def __init__(self, path: str = SAMPLE_CACHE_PATH, disk_path: str = "/"):
+        self.path = path
+        self._seq = 0
+
+        # Se crea completo aparte y se renombra: un lector nunca ve un
+        # archivo a medio inicializar
+        tmp = f"{path}.tmp"
+        fd = os.open(tmp, os.O_RDWR | os.O_CREAT | os.O_TRUNC, 0o644)
+        try:
+            os.ftruncate(fd, CACHE_SIZE)
+            self._map = mmap.mmap(fd, CACHE_SIZE)
+        finally:
+            os.close(fd)
+
+        HEADER.pack_into(self._map, 0, MAGIC, VERSION, 0)
+        encoded = disk_path.encode()[:PATH_SIZE]
+        self._map[PATH_OFFSET:PATH_OFFSET + len(encoded)] = encoded
+        os.replace(tmp, path)
+
+    def publish(self, samples: dict) -> None:
+        """
+        Publica varias muestras en una sola escritura protegida.
+
+        Args:
+            samples: Grupo -> (timestamp epoch, valores en el orden de GROUPS)
+        """
+        self._seq += 1
+        struct.pack_into("<Q", self._map, SEQ_OFFSET, self._seq)
+        for group, (ts, values) in samples.items():
+            offset, layout = GROUP_LAYOUT[group]
+            layout.pack_into(self._map, offset, ts, *values)
+        self._seq += 1
+        struct.pack_into("<Q", self._map, SEQ_OFFSET, self._seq)
+
+    def close(self) -> None:
+        self._map.close()
+
+
+class SampleCacheReader:
+    """Lector de la cache: las lecturas van directas sobre el mmap."""
+
+    def __init__(self, path: str = SAMPLE_CACHE_PATH):
+        """
+        Raises:
+            OSError: Si la cache no existe
+            ValueError: Si el archivo no tiene el layout esperado
+        """
+        with open(path, "rb") as f:
+            self._map = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+
+        if len(self._map) < CACHE_SIZE:
+            self._map.close()
+            raise ValueError("cache de muestras truncada")
+        magic, version, _ = HEADER.unpack_from(self._map, 0)
+        if magic != MAGIC or version != VERSION:
+            self._map.close()
+            raise ValueError(f"cache de muestras con formato desconocido ({magic!r} v{version})")
+
+    @property
+    def disk_path(self) -> str:
+        raw = self._map[PATH_OFFSET:PATH_OFFSET + PATH_SIZE]
+        return raw.rstrip(b"\0").decode(errors="replace")
+
+    def read(self, group: str, max_age: float = SAMPLE_CACHE_MAX_AGE):
+        """
+        Lee la última muestra de un grupo si es reciente.
+
+        Returns:
+            Tupla (edad en segundos, valores) o None si no hay muestra,
+            es más vieja que max_age o no se pudo leer sin colisión
+        """
+        offset, layout = GROUP_LAYOUT[group]
+        for _ in range(READ_RETRIES):
+            before = struct.unpack_from("<Q", self._map, SEQ_OFFSET)[0]
+            if before & 1:
+                continue
+            ts, *values = layout.unpack_from(self._map, offset)
+            if struct.unpack_from("<Q", self._map, SEQ_OFFSET)[0] == before:
+                break
+        else:
+            return None
+
+        age = time.time() - ts
+        if ts <= 0 or age > max_age or age < -max_age:
+            return None
+        return age, values
+
+    def close(self) -> None:
+        self._map.close()
+
+
+def open_reader(path: str = SAMPLE_CACHE_PATH):
+    """Abre la cache para lectura, o None si no existe o no es válida."""
+    try:
+        return SampleCacheReader(path)
+    except (OSError, ValueError) as e:
+        logging.debug(f"Cache de muestras no disponible: {e}")
+        return None
+
+
+def cached_disk_usage(path: str, reader=None):
+    """DiskUsage de la cache si el exporter mide la misma ruta, o None."""
+    reader = reader or open_reader()
+    if reader is None or reader.disk_path != path:
+        return None
+    sample = reader.read("disk")
+    if sample is None:
+        return None
+    age, values = sample
+    logging.info(f"Uso de disco de la cache del exporter (hace {age:.1f}s)")
+    return DiskUsage(*(int(v) for v in values))
+
+
+def cached_memory_usage(reader=None):
+    """MemoryUsage de la cache, o None."""
+    reader = reader or open_reader()
+    sample = reader.read("memory") if reader is not None else None
+    if sample is None:
+        return None
+    age, (total, available, percent, swap_total, swap_free) = sample
+    logging.info(f"Memoria de la cache del exporter (hace {age:.1f}s)")
+    return MemoryUsage(int(total), int(available), percent, int(swap_total), int(swap_free))
+
+
+def cached_cpu(reader=None):
+    """% por modo de CPU (último ciclo del exporter) de la cache, o None."""
+    reader = reader or open_reader()
+    sample = reader.read("cpu") if reader is not None else None
+    if sample is None:
+        return None
+    age, values = sample
+    logging.info(f"CPU de la cache del exporter (hace {age:.1f}s)")
+    return dict(zip(CPU_MODES, values))
+
+
+def cached_memory_pressure(reader=None):
+    """Presión de memoria (avg10 de some y full) de la cache, o None."""
+    reader = reader or open_reader()
+    sample = reader.read("pressure") if reader is not None else None
+    if sample is None:
+        return None
+    _, (some, full) = sample
+    return {"some": {"avg10": some}, "full": {"avg10": full}}
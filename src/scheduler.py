@@ -0,0 +1,70 @@
+#!/usr/bin/env python3
+"""
+Planificación con deadlines monotónicos.
+
+Los deadlines se calculan sobre una rejilla fija (inicio + n * intervalo)
+y no como "dormir el intervalo tras terminar", así el periodo no deriva
+con lo que tarde cada ciclo. Si un ciclo se come uno o más deadlines,
+esos ticks se cuentan como perdidos y se salta al siguiente de la
+rejilla en lugar de encadenar ejecuciones atrasadas.
+"""
+
+import threading
+import time
+
+
+def next_deadline(due: float, interval: float, now: float) -> tuple:
+    """
+    Siguiente deadline de la rejilla que aún no ha pasado.
+
+    Args:
+        due: Deadline del tick que se acaba de ejecutar
+        interval: Segundos entre ticks
+        now: Tiempo monotónico actual
+
+    Returns:
+        Tupla (deadline, ticks perdidos)
+    """
+    deadline = due + interval
+    if deadline > now:
+        return deadline, 0
+    missed = int((now - deadline) // interval) + 1
+    return deadline + missed * interval, missed
+
+
+class Ticker:
+    """
+    Cadencia fija para un bucle: en cada vuelta, trabajo, advance() y wait().
+    """
+
+    def __init__(self, interval: float, clock=time.monotonic):
+        self.interval = interval
+        self.clock = clock
+        self.deadline = clock()
+        self.ticks = 0
+        self.missed = 0
+
+    def advance(self) -> int:
+        """
+        Cierra el tick actual y programa el siguiente.
+
+        Returns:
+            Ticks perdidos desde el anterior (0 si se llegó a tiempo)
+        """
+        self.ticks += 1
+        self.deadline, missed = next_deadline(self.deadline, self.interval, self.clock())
+        self.missed += missed
+        return missed
+
+    def wait(self, stop: threading.Event = None) -> bool:
+        """
+        Espera al siguiente deadline.
+
+        Returns:
+            True si `stop` se activó durante la espera
+        """
+        delay = max(self.deadline - self.clock(), 0)
+        if stop is not None:
+            return stop.wait(delay)
+        time.sleep(delay)
+        return False
@@ -0,0 +1,295 @@
+#!/usr/bin/env python3
+"""
+Backends de almacenamiento del estado de los checks.
+
+- file: un archivo <check>.state por check (comportamiento original),
+  ahora con escritura atómica (archivo temporal + rename).
+- sqlite: una base de datos en modo WAL con el estado actual y el
+  histórico de transiciones (con timestamp y valor de la métrica).
+  Dentro de batch() todas las escrituras van en una sola transacción.
+
+Se elige con STATE_BACKEND=file|sqlite.
+
+Uso (histórico):
+    python3 src/state_store.py history [check] [--limit 20]
+"""
+
+import os
+import re
+import threading
+import time
+from contextlib import contextmanager
+from urllib.parse import quote
+
+STATE_DIR = os.environ.get("STATE_DIR", "/tmp")
+STATE_BACKEND = os.environ.get("STATE_BACKEND", "file")
+STATE_DB = os.environ.get("STATE_DB", f"{STATE_DIR}/state.db")
+
+VALID_STATES = ("OK", "WARNING", "CRITICAL")
+
+
+class StateBackend:
+    """
+    Interfaz común de los backends de estado.
+
+    La clave identifica un objetivo dentro del check (ej: un montaje);
+    None es el estado general del check.
+    """
+
+    def load(self, check_name: str, key: str = None):
+        """Devuelve el último estado guardado o None si no hay."""
+        raise NotImplementedError
+
+    def save(self, check_name: str, state: str, key: str = None, value: str = None) -> None:
+        """Guarda el estado actual (y la transición si cambió)."""
+        raise NotImplementedError
+
+    def history(self, check_name: str = None, key: str = None,
+                since: float = None, limit: int = 100) -> list:
+        """Devuelve las últimas transiciones, de más reciente a más antigua."""
+        return []
+
+    @contextmanager
+    def batch(self):
+        """Agrupa varias escrituras; por defecto no hace nada especial."""
+        yield self
+
+
+class FileStateBackend(StateBackend):
+    """Un archivo de texto por check y clave (formato original)."""
+
+    def __init__(self, state_dir: str = STATE_DIR):
+        self.state_dir = state_dir
+        os.makedirs(state_dir, exist_ok=True)
+
+    def path_for(self, check_name: str, key: str = None) -> str:
+        if key is None:
+            return f"{self.state_dir}/{check_name}.state"
+        # Codificación reversible: dos claves distintas nunca comparten
+        # archivo ("/" -> %2F, "/var/lib" -> %2Fvar%2Flib)
+        return f"{self.state_dir}/{check_name}.{quote(key, safe='')}.state"
+
+    def legacy_path_for(self, check_name: str, key: str) -> str:
+        """Nombre de las versiones anteriores ("/var/lib" y "/var_lib" -> var_lib)."""
+        safe_key = re.sub(r"[^A-Za-z0-9_.-]", "_", key.strip("/")) or "root"
+        return f"{self.state_dir}/{check_name}.{safe_key}.state"
+
+    def load(self, check_name: str, key: str = None):
+        paths = [self.path_for(check_name, key)]
+        if key is not None:
+            # Estado guardado antes del cambio de nombre: se usa hasta
+            # que el check lo reescriba con el nombre nuevo
+            paths.append(self.legacy_path_for(check_name, key))
+        for path in paths:
+            try:
+                with open(path) as f:
+                    state = f.read().strip()
+            except FileNotFoundError:
+                continue
+            # Validar que sea un estado válido
+            return state if state in VALID_STATES else None
+        return None
+
+    def save(self, check_name: str, state: str, key: str = None, value: str = None) -> None:
+        path = self.path_for(check_name, key)
+        tmp_path = f"{path}.tmp"
+
+        # Escribir aparte y renombrar: nunca queda un archivo a medias
+        with open(tmp_path, "w") as f:
+            f.write(state)
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(tmp_path, path)
+
+
+class SQLiteStateBackend(StateBackend):
+    """Estado actual + histórico de transiciones en SQLite (WAL)."""
+
+    SCHEMA = """
+        CREATE TABLE IF NOT EXISTS current_state (
+            check_name TEXT NOT NULL,
+            key TEXT NOT NULL DEFAULT '',
+            state TEXT NOT NULL,
+            value TEXT,
+            updated_at REAL NOT NULL,
+            PRIMARY KEY (check_name, key)
+        );
+        CREATE TABLE IF NOT EXISTS transitions (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            check_name TEXT NOT NULL,
+            key TEXT NOT NULL DEFAULT '',
+            from_state TEXT NOT NULL,
+            to_state TEXT NOT NULL,
+            value TEXT,
+            ts REAL NOT NULL
+        );
+        CREATE INDEX IF NOT EXISTS idx_transitions_check_ts
+            ON transitions (check_name, key, ts);
+        CREATE INDEX IF NOT EXISTS idx_transitions_ts
+            ON transitions (ts);
+    """
+
+    def __init__(self, path: str = STATE_DB):
+        self.path = path
+        os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+
+        # Import diferido: el backend file (por defecto) no necesita sqlite3
+        import sqlite3
+
+        # isolation_level=None: las transacciones se controlan a mano
+        self._conn = sqlite3.connect(
+            path, isolation_level=None, check_same_thread=False, timeout=10
+        )
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute("PRAGMA synchronous=NORMAL")
+        self._conn.executescript(self.SCHEMA)
+
+        self._lock = threading.RLock()
+        self._batch_depth = 0
+
+    @contextmanager
+    def _transaction(self):
+        """Transacción propia, o la del batch() en curso si lo hay."""
+        with self._lock:
+            if self._batch_depth:
+                yield self._conn
+                return
+            self._conn.execute("BEGIN IMMEDIATE")
+            try:
+                yield self._conn
+            except BaseException:
+                self._conn.execute("ROLLBACK")
+                raise
+            self._conn.execute("COMMIT")
+
+    @contextmanager
+    def batch(self):
+        """Todas las escrituras dentro del bloque van en una transacción."""
+        with self._lock:
+            if self._batch_depth == 0:
+                self._conn.execute("BEGIN IMMEDIATE")
+            self._batch_depth += 1
+            try:
+                yield self
+            except BaseException:
+                self._batch_depth -= 1
+                if self._batch_depth == 0:
+                    self._conn.execute("ROLLBACK")
+                raise
+            self._batch_depth -= 1
+            if self._batch_depth == 0:
+                self._conn.execute("COMMIT")
+
+    def load(self, check_name: str, key: str = None):
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT state FROM current_state WHERE check_name = ? AND key = ?",
+                (check_name, key or "")
+            ).fetchone()
+        return row[0] if row else None
+
+    def save(self, check_name: str, state: str, key: str = None, value: str = None) -> None:
+        now = time.time()
+        with self._transaction() as conn:
+            row = conn.execute(
+                "SELECT state FROM current_state WHERE check_name = ? AND key = ?",
+                (check_name, key or "")
+            ).fetchone()
+            # Sin estado previo se asume OK, igual que load_last_state
+            previous = row[0] if row else "OK"
+
+            conn.execute(
+                """
+                INSERT INTO current_state (check_name, key, state, value, updated_at)
+                VALUES (?, ?, ?, ?, ?)
+                ON CONFLICT (check_name, key) DO UPDATE SET
+                    state = excluded.state,
+                    value = excluded.value,
+                    updated_at = excluded.updated_at
+                """,
+                (check_name, key or "", state, value, now)
+            )
+
+            if previous != state:
+                conn.execute(
+                    """
+                    INSERT INTO transitions (check_name, key, from_state, to_state, value, ts)
+                    VALUES (?, ?, ?, ?, ?, ?)
+                    """,
+                    (check_name, key or "", previous, state, value, now)
+                )
+
+    def history(self, check_name: str = None, key: str = None,
+                since: float = None, limit: int = 100) -> list:
+        query = "SELECT check_name, key, from_state, to_state, value, ts FROM transitions"
+        conditions, params = [], []
+        if check_name is not None:
+            conditions.append("check_name = ?")
+            params.append(check_name)
+            if key is not None:
+                conditions.append("key = ?")
+                params.append(key)
+        if since is not None:
+            conditions.append("ts >= ?")
+            params.append(since)
+        if conditions:
+            query += " WHERE " + " AND ".join(conditions)
+        query += " ORDER BY ts DESC, id DESC LIMIT ?"
+        params.append(limit)
+
+        with self._lock:
+            rows = self._conn.execute(query, params).fetchall()
+        return [
+            {
+                "check": row[0],
+                "key": row[1] or None,
+                "from": row[2],
+                "to": row[3],
+                "value": row[4],
+                "ts": row[5],
+            }
+            for row in rows
+        ]
+
+    def close(self) -> None:
+        self._conn.close()
+
+
+_backend = None
+_backend_lock = threading.Lock()
+
+
+def get_state_backend() -> StateBackend:
+    """Devuelve el backend configurado (uno por proceso)."""
+    global _backend
+    with _backend_lock:
+        if _backend is None:
+            if STATE_BACKEND == "sqlite":
+                _backend = SQLiteStateBackend()
+            else:
+                _backend = FileStateBackend()
+        return _backend
+
+
+def main():
+    import argparse
+
+    parser = argparse.ArgumentParser(description="Consulta del estado de los checks")
+    subparsers = parser.add_subparsers(dest="command", required=True)
+
+    history_parser = subparsers.add_parser("history", help="Histórico de transiciones")
+    history_parser.add_argument("check", nargs="?")
+    history_parser.add_argument("--key")
+    history_parser.add_argument("--limit", type=int, default=20)
+
+    args = parser.parse_args()
+
+    backend = SQLiteStateBackend()
+    for row in backend.history(args.check, args.key, limit=args.limit):
+        when = time.strftime("%Y-%m-%d %H:%M:%S", time.localtime(row["ts"]))
+        target = row["check"] if row["key"] is None else f"{row['check']} {row['key']}"
+        print(f"{when}  {target}: {row['from']} -> {row['to']}  ({row['value']})")
+
+
+if __name__ == "__main__":
+    main()
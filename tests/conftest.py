@@ -0,0 +1,11 @@
+"""
+Configuración común de pytest.
+
+Los módulos de src/ se importan entre sí sin prefijo (como cuando
+se ejecutan desde cron), así que src/ tiene que estar en el path.
+"""
+
+import os
+import sys
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "src"))
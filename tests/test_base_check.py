@@ -6,8 +6,10 @@ que BaseCheck funciona correctamente.
 """
 
 import pytest
-from src.base_check import BaseCheck
+from src.base_check import BaseCheck, get_setting
 import os
+import subprocess
+import sys
 
 def test_save_and_load_state(tmp_path, monkeypatch):
     """Verifica que se pueda guardar y cargar el estado correctamente."""
@@ -137,3 +139,154 @@ def test_handle_state_change_no_alert_on_same_state(tmp_path, monkeypatch):
     assert exit_code == 1, "handle_state_change debería retornar 1 para WARNING"
     assert check.load_last_state() == "WARNING", "El estado guardado debería seguir siendo WARNING"
     
+
+def test_state_per_key(tmp_path, monkeypatch):
+    """
+    Verifica que cada clave (ej: un montaje) tiene su propio estado.
+    """
+    monkeypatch.setenv("STATE_DIR", str(tmp_path))
+    
+    check = BaseCheck("test_state_per_key")
+    
+    check.handle_state_change("CRITICAL", "Uso de disco /data", "95%", key="/data")
+    check.handle_state_change("OK", "Uso de disco /", "20%", key="/")
+    
+    assert check.load_last_state("/data") == "CRITICAL"
+    assert check.load_last_state("/") == "OK"
+    assert check.load_last_state() == "OK"
+    assert check.state_file_for("/var/lib/docker").endswith("test_state_per_key.%2Fvar%2Flib%2Fdocker.state")
+    
+    for key in ("/data", "/"):
+        os.remove(check.state_file_for(key))
+
+
+def test_classify_hysteresis():
+    """
+    Verifica que para salir de un estado haya que cruzar el threshold
+    de salida (threshold de entrada +/- histéresis).
+    """
+    from src.base_check import classify
+    
+    # Uso de disco: entra en WARNING a 80, sale por debajo de 75
+    assert classify(79, 80, 90) == "OK"
+    assert classify(80, 80, 90) == "WARNING"
+    assert classify(78, 80, 90, previous="WARNING", hysteresis=5) == "WARNING"
+    assert classify(74, 80, 90, previous="WARNING", hysteresis=5) == "OK"
+    assert classify(88, 80, 90, previous="CRITICAL", hysteresis=5) == "CRITICAL"
+    assert classify(84, 80, 90, previous="CRITICAL", hysteresis=5) == "WARNING"
+    
+    # Memoria (invertido): entra en WARNING por debajo de 20, sale desde 25
+    assert classify(19, 20, 10, inverted=True) == "WARNING"
+    assert classify(22, 20, 10, inverted=True, previous="WARNING", hysteresis=5) == "WARNING"
+    assert classify(25, 20, 10, inverted=True, previous="WARNING", hysteresis=5) == "OK"
+
+
+def test_evaluate_ignores_single_spike(tmp_path, monkeypatch):
+    """
+    Verifica que con ALERT_MIN_SAMPLES=3 de ALERT_WINDOW=5 un pico
+    aislado no cambia el estado y uno sostenido sí.
+    """
+    monkeypatch.setenv("STATE_DIR", str(tmp_path))
+    monkeypatch.setenv("TEST_SUSTAINED_ALERT_WINDOW", "5")
+    monkeypatch.setenv("TEST_SUSTAINED_ALERT_MIN_SAMPLES", "3")
+    
+    check = BaseCheck("test_sustained")
+    states = [check.evaluate(v, 80, 90, key="/") for v in (10, 10, 10, 95, 10)]
+    assert states == ["OK"] * 5
+    
+    states = [check.evaluate(v, 80, 90, key="/") for v in (95, 95)]
+    assert states == ["OK", "CRITICAL"]
+    assert len(check.window_for("/")) == 5
+
+
+def test_cron_checks_do_not_import_alert_path():
+    """
+    Verifica que arrancar un check no importa notifier ni requests:
+    solo se cargan cuando una transición tiene que alertar.
+    """
+    src = os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "src")
+    code = (
+        "import sys, cpu_check, memory_check, disk_check, load_check; "
+        "print(','.join(m for m in ('notifier', 'result_sink', 'requests') if m in sys.modules))"
+    )
+    result = subprocess.run([sys.executable, "-c", code], cwd=src,
+                            capture_output=True, text=True, check=True)
+    
+    assert result.stdout.strip() == ""
+
+
+def test_handle_state_change_loads_notifier_on_alert(tmp_path, monkeypatch):
+    """Verifica que la alerta llega al notifier importado en ese momento."""
+    monkeypatch.setenv("STATE_DIR", str(tmp_path))
+    alerts = []
+    monkeypatch.setattr("notifier.send_alert", lambda title, message, level: alerts.append(level))
+    
+    check = BaseCheck("test_lazy_notifier")
+    check.save_state("OK")
+    check.handle_state_change("CRITICAL", "test_metric", "99%")
+    
+    assert alerts == ["CRITICAL"]
+
+
+def test_next_interval_adaptive(tmp_path, monkeypatch):
+    """
+    Verifica que con ADAPTIVE_MARGIN el intervalo se acorta cerca del
+    threshold o en alerta y se alarga lejos de él.
+    """
+    monkeypatch.setenv("STATE_DIR", str(tmp_path))
+    monkeypatch.setenv("ADAPTIVE_TEST_INTERVAL", "20")
+    monkeypatch.setenv("ADAPTIVE_TEST_ADAPTIVE_MARGIN", "0.1")
+    check = BaseCheck("adaptive_test")
+    
+    intervals = []
+    for value in (30, 60, 75, 85):
+        check.evaluate(value, 80, 90)
+        intervals.append(check.next_interval())
+    
+    # 30: lejos; 60: a 25% del warning; 75: a menos del 10%; 85: WARNING
+    assert intervals == [40, 20, 10, 10]
+    assert check.next_interval() == 20  # sin muestras nuevas
+
+
+def test_next_interval_adaptive_far(tmp_path, monkeypatch):
+    """Verifica que ADAPTIVE_FAR fija a partir de qué distancia se alarga el intervalo."""
+    monkeypatch.setenv("STATE_DIR", str(tmp_path))
+    monkeypatch.setenv("ADAPTIVE_TEST_INTERVAL", "20")
+    monkeypatch.setenv("ADAPTIVE_TEST_ADAPTIVE_MARGIN", "0.1")
+    monkeypatch.setenv("ADAPTIVE_TEST_ADAPTIVE_FAR", "7")
+    check = BaseCheck("adaptive_test")
+    
+    # 40: a 50% del warning, lejos con el 3 por defecto pero no con 7
+    check.evaluate(40, 80, 90)
+    assert check.next_interval() == 20
+    check.evaluate(20, 80, 90)
+    assert check.next_interval() == 40
+
+
+def test_get_setting_fallbacks(monkeypatch):
+    """Específica, luego los prefijos de fallback, luego la genérica (si se permite)."""
+    monkeypatch.setenv("WARNING", "70")
+    assert get_setting("disk_inode", "WARNING", "80", fallbacks=("disk",)) == 70
+    assert get_setting("load", "WARNING", "1.5", generic=False) == 1.5
+    
+    monkeypatch.setenv("DISK_WARNING", "85")
+    assert get_setting("disk_inode", "WARNING", "80", fallbacks=("disk",)) == 85
+    
+    monkeypatch.setenv("DISK_INODE_WARNING", "60")
+    assert get_setting("disk_inode", "WARNING", "80", fallbacks=("disk",)) == 60
+
+
+def test_state_event_includes_run_duration(tmp_path, monkeypatch, caplog):
+    """Verifica que el evento de estado lleva la duración de run_check()."""
+    monkeypatch.setenv("STATE_DIR", str(tmp_path))
+    
+    class TimedCheck(BaseCheck):
+        def run(self):
+            return self.handle_state_change("OK", "Métrica", "1%")
+    
+    check = TimedCheck("timed")
+    with caplog.at_level("INFO"):
+        assert check.run_check() == 0
+    
+    event, = [r for r in caplog.records if getattr(r, "event", None) == "state"]
+    assert event.duration >= 0
@@ -0,0 +1,198 @@
+"""
+Tests para el registro declarativo de checks (check_registry.py).
+"""
+
+import json
+import time
+
+import pytest
+
+import src.check_registry as check_registry
+from src.check_registry import Snapshot, load_registry
+from src.collectors import CPU_MODES, PerCoreCpu
+from src.state_store import FileStateBackend
+from src.check_runner import CheckRunner
+
+FAKE_CHECK = """
+[[checks]]
+name = "{name}"
+source = "fake"
+title = "Uso fake"
+message = "{{used}}% en {{key}}"
+
+[[checks.rules]]
+metric = "used"
+comparator = ">="
+warning = 80
+critical = 90
+"""
+
+
+@pytest.fixture
+def fake_source(monkeypatch, tmp_path):
+    """Fuente "fake" con dos objetivos y un contador de lecturas."""
+    monkeypatch.setenv("STATE_DIR", str(tmp_path))
+    alerts = []
+    monkeypatch.setattr("base_check.send_alert", lambda **kwargs: alerts.append(kwargs))
+    values = {"a": {"used": 50}, "b": {"used": 95}}
+    monkeypatch.setitem(check_registry.SOURCES, "fake", lambda snapshot: values)
+    return values, alerts
+
+
+def test_default_registry_declares_builtin_checks():
+    """Verifica que disco, memoria, CPU y carga son entradas del registro."""
+    checks = load_registry()
+    
+    assert [c.check_name for c in checks] == [
+        "disk", "memory", "memory_pressure", "cpu", "cpu_cores", "load", "run_delay"
+    ]
+    assert len({id(c.snapshot) for c in checks}) == 1
+
+
+def test_sources_read_once_per_cycle(tmp_path, fake_source):
+    """Con muchos checks sobre la misma fuente se lee una vez por ciclo."""
+    config = tmp_path / "checks.toml"
+    config.write_text("".join(FAKE_CHECK.format(name=f"fake{i}") for i in range(20)))
+    
+    snapshot = Snapshot()
+    runner = CheckRunner(load_registry(str(config), snapshot), snapshot=snapshot)
+    
+    runner.run_once()
+    runner.run_once()
+    
+    assert snapshot.reads == {"fake": 2}
+    assert set(runner.results.values()) == {2}
+
+
+def test_registry_check_per_key_states(tmp_path, fake_source):
+    """Cada objetivo de la fuente tiene estado y alerta propios."""
+    values, alerts = fake_source
+    config = tmp_path / "checks.toml"
+    config.write_text(FAKE_CHECK.format(name="fake"))
+    
+    check, = load_registry(str(config))
+    
+    assert check.run() == 2
+    assert check.load_last_state("a") == "OK"
+    assert check.load_last_state("b") == "CRITICAL"
+    assert [a["message"] for a in alerts if a["level"] == "CRITICAL"] == ["Uso fake b: 95% en b"]
+
+
+def test_invalid_entries(tmp_path, monkeypatch):
+    """Comparadores o fuentes desconocidas se rechazan al cargar."""
+    monkeypatch.setenv("STATE_DIR", str(tmp_path))
+    config = tmp_path / "checks.toml"
+    
+    config.write_text(FAKE_CHECK.format(name="x").replace('">="', '"=="'))
+    monkeypatch.setitem(check_registry.SOURCES, "fake", lambda snapshot: {})
+    with pytest.raises(ValueError, match="comparador"):
+        load_registry(str(config))
+    
+    config.write_text(FAKE_CHECK.format(name="x").replace('"fake"', '"nope"'))
+    with pytest.raises(ValueError, match="fuente"):
+        load_registry(str(config))
+
+
+def test_env_overrides_thresholds(tmp_path, monkeypatch, fake_source):
+    """El prefijo env de una regla permite sobrescribir sus thresholds."""
+    monkeypatch.setenv("FAKE_WARNING", "96")
+    monkeypatch.setenv("FAKE_CRITICAL", "99")
+    config = tmp_path / "checks.toml"
+    config.write_text(FAKE_CHECK.format(name="fake") + 'env = "FAKE"\n')
+    
+    check, = load_registry(str(config))
+    
+    assert (check.rules[0].warning, check.rules[0].critical) == (96, 99)
+    assert check.run() == 0
+
+
+def test_details_sampled_once_per_cycle(tmp_path, fake_source, monkeypatch):
+    """Dos checks con details = "top_cpu" alertando en el mismo ciclo comparten la muestra de procesos."""
+    monkeypatch.setattr(check_registry, "TOP_PROCESSES", 5)
+    samples = []
+    monkeypatch.setitem(check_registry.DETAILS, "top_cpu", lambda snapshot: samples.append(1) or "Top CPU: x")
+    config = tmp_path / "checks.toml"
+    config.write_text("".join(
+        FAKE_CHECK.format(name=name).replace('title =', 'details = "top_cpu"\ntitle =')
+        for name in ("fake1", "fake2")
+    ))
+    
+    snapshot = Snapshot()
+    runner = CheckRunner(load_registry(str(config), snapshot), snapshot=snapshot)
+    runner.run_once()
+    assert len(samples) == 1
+    
+    runner.run_once()
+    assert len(samples) == 2
+
+
+def test_env_thresholds_match_scripts(monkeypatch):
+    """Registro y scripts resuelven igual DISK_WARNING, las genéricas y los inodos."""
+    monkeypatch.setenv("WARNING", "70")
+    monkeypatch.setenv("DISK_CRITICAL", "95")
+    monkeypatch.setenv("LOAD_WARNING", "2")
+    
+    disk, = load_registry(names="disk")
+    load, = load_registry(names="load")
+    
+    use, inodes = disk.rules
+    assert (use.warning, use.critical) == (70, 95)
+    assert (inodes.warning, inodes.critical) == (70, 95)
+    assert (load.rules[0].warning, load.rules[0].critical) == (2, 3)
+
+
+def test_non_positive_interval_rejected(tmp_path, fake_source):
+    config = tmp_path / "checks.toml"
+    config.write_text(FAKE_CHECK.format(name="fake").replace('title =', 'interval = 0\ntitle ='))
+    
+    with pytest.raises(ValueError, match="interval"):
+        load_registry(str(config))
+
+
+def test_non_numeric_threshold_rejected(tmp_path, fake_source):
+    """Un threshold que no es un número da un ValueError con el check."""
+    config = tmp_path / "checks.toml"
+    config.write_text(FAKE_CHECK.format(name="fake").replace("warning = 80", 'warning = "80"'))
+    
+    with pytest.raises(ValueError, match="fake: warning de used debe ser un número"):
+        load_registry(str(config))
+
+
+class FakeCpuSampler:
+    """Sampler con una muestra por core fija."""
+    
+    window = 0.25
+    
+    def __init__(self, cores):
+        self.cores = cores
+    
+    def sample(self):
+        return {mode: 0.0 for mode in CPU_MODES}
+
+
+def test_cpu_cores_shares_state_with_cpu_check(tmp_path, monkeypatch):
+    """
+    Verifica que la saturación por core del registro alerta con el
+    estado persistido por cpu_check.py y con la regla sin critical.
+    """
+    monkeypatch.setenv("STATE_DIR", str(tmp_path))
+    alerts = []
+    monkeypatch.setattr("base_check.send_alert", lambda **kwargs: alerts.append(kwargs))
+    monkeypatch.setattr(check_registry, "CORE_SATURATION", 95.0)
+    monkeypatch.setattr("cpu_check.CORE_SATURATION", 95.0)
+    monkeypatch.setattr("cpu_check.CORE_SATURATION_SECONDS", 30)
+    state = tmp_path / "cpu.cores.json"
+    monkeypatch.setattr("cpu_check.CORE_SATURATION_STATE", str(state))
+    now = time.time()
+    state.write_text(json.dumps({"updated": now - 10, "since": {"1": now - 60}}))
+    
+    snapshot = Snapshot()
+    cores = PerCoreCpu(("0", "1"), {"idle": [50.0, 1.0], "iowait": [0.0, 0.0]})
+    snapshot.keep("cpu_sampler", lambda: FakeCpuSampler(cores))
+    check, = load_registry(snapshot=snapshot, names="cpu_cores")
+    check.state_backend = FileStateBackend(str(tmp_path))
+    
+    assert check.run() == 1
+    assert check.check_name == "cpu_cores"
+    assert alerts[-1]["level"] == "WARNING"
+    assert "cpu1 99.0%" in alerts[-1]["message"]
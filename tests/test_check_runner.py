@@ -0,0 +1,187 @@
+"""
+Tests para el runner de checks en un solo proceso.
+"""
+
+from contextlib import contextmanager
+
+import pytest
+
+from src.base_check import BaseCheck
+from src.check_runner import CheckRunner, load_checks
+from src.state_store import StateBackend
+
+
+class FakeCheck:
+    """Check mínimo con exit code fijo."""
+    
+    def __init__(self, name, exit_code=0, interval=10):
+        self.check_name = name
+        self.interval = interval
+        self.exit_code = exit_code
+        self.runs = 0
+    
+    def next_interval(self):
+        return self.interval
+    
+    def run(self):
+        self.runs += 1
+        if isinstance(self.exit_code, BaseException):
+            raise self.exit_code
+        return self.exit_code
+
+
+def test_load_checks():
+    """Verifica que se instancian las subclases de BaseCheck de cada módulo."""
+    checks = load_checks("disk,memory,cpu")
+    
+    assert [c.check_name for c in checks] == ["disk", "memory", "memory_pressure", "cpu_cores", "cpu"]
+
+
+def test_run_once_results():
+    """Verifica que los exit codes quedan disponibles por check."""
+    runner = CheckRunner([FakeCheck("disk", 0), FakeCheck("cpu", 2)])
+    
+    assert runner.run_once() == {"disk": 0, "cpu": 2}
+
+
+def test_run_check_isolates_errors():
+    """Verifica que un check que falla no afecta al resto."""
+    runner = CheckRunner([
+        FakeCheck("broken", RuntimeError("boom")),
+        FakeCheck("exits", SystemExit(1)),
+        FakeCheck("memory", 0),
+    ])
+    
+    assert runner.run_once() == {"broken": 2, "exits": 1, "memory": 0}
+
+
+def test_run_pending_respects_intervals():
+    """Verifica que cada check se ejecuta según su propio intervalo."""
+    fast = FakeCheck("fast", interval=10)
+    slow = FakeCheck("slow", interval=30)
+    runner = CheckRunner([fast, slow])
+    start = runner._queue[0][0]
+    
+    for second in range(0, 61):
+        runner.run_pending(start + second)
+    
+    assert fast.runs == 7
+    assert slow.runs == 3
+
+
+def test_run_pending_does_not_pile_up():
+    """Verifica que un retraso largo no provoca ejecuciones en ráfaga."""
+    check = FakeCheck("disk", interval=10)
+    runner = CheckRunner([check])
+    start = runner._queue[0][0]
+    
+    next_run = runner.run_pending(start + 100)
+    
+    assert check.runs == 1
+    assert next_run == start + 110
+
+
+def test_run_pending_counts_missed_runs():
+    """Verifica que las ejecuciones saltadas por un retraso se cuentan."""
+    check = FakeCheck("disk", interval=10)
+    runner = CheckRunner([check])
+    start = runner._queue[0][0]
+    
+    runner.run_pending(start + 35)
+    
+    assert runner.missed == {"disk": 3}
+
+
+def test_run_pending_counts_time_spent_in_the_pass():
+    """Lo que tarda un check lento cuenta como retraso para los siguientes de la pasada."""
+    clock = [0.0]
+    slow = FakeCheck("slow", interval=10)
+    fast = FakeCheck("fast", interval=10)
+    
+    def slow_run():
+        clock[0] += 25
+        return 0
+    slow.run = slow_run
+    runner = CheckRunner([slow, fast], clock=lambda: clock[0])
+    
+    next_run = runner.run_pending(0.0)
+    
+    assert runner.missed == {"slow": 2, "fast": 2}
+    assert next_run == 30
+
+
+def test_non_positive_interval_rejected(tmp_path, monkeypatch):
+    """CHECK_INTERVAL=0 aborta al crear el check en lugar de dividir por cero al planificar."""
+    monkeypatch.setenv("STATE_DIR", str(tmp_path))
+    monkeypatch.setenv("ZERO_INTERVAL", "0")
+    
+    with pytest.raises(SystemExit):
+        BaseCheck("zero")
+
+
+def test_run_pending_uses_adaptive_interval():
+    """Verifica que el runner programa con el intervalo que pide el check."""
+    check = FakeCheck("cpu", interval=10)
+    check.next_interval = lambda: 5
+    runner = CheckRunner([check])
+    start = runner._queue[0][0]
+    
+    assert runner.run_pending(start) == start + 5
+
+
+class RecordingBackend(StateBackend):
+    """Backend en memoria que registra saves y transacciones."""
+    
+    def __init__(self, events):
+        self.events = events
+        self.states = {}
+        self.depth = 0
+    
+    def load(self, check_name, key=None):
+        return self.states.get((check_name, key))
+    
+    def save(self, check_name, state, key=None, value=None):
+        self.events.append(("save", key, state))
+        self.states[(check_name, key)] = state
+    
+    @contextmanager
+    def batch(self):
+        # Como SQLite: los batch() anidados van en la transacción exterior
+        self.depth += 1
+        if self.depth == 1:
+            self.events.append("begin")
+        yield self
+        self.depth -= 1
+        if self.depth == 0:
+            self.events.append("commit")
+
+
+def test_states_written_after_cycle_in_one_batch(tmp_path, monkeypatch):
+    """
+    Verifica que los estados de todos los checks del ciclo se escriben
+    juntos al terminar, no con la transacción abierta durante la medición.
+    """
+    monkeypatch.setenv("STATE_DIR", str(tmp_path))
+    events = []
+    
+    class TwoKeysCheck(BaseCheck):
+        def run(self):
+            events.append("measure")
+            self.save_state("WARNING", key="a")
+            events.append("measure")
+            self.save_state("OK", key="b")
+            assert self.load_last_state("a") == "WARNING"
+            return 1
+    
+    backend = RecordingBackend(events)
+    checks = [TwoKeysCheck("fake1"), TwoKeysCheck("fake2")]
+    for check in checks:
+        check.state_backend = backend
+    
+    assert CheckRunner(checks).run_once() == {"fake1": 1, "fake2": 1}
+    assert events == ["measure"] * 4 + [
+        "begin",
+        ("save", "a", "WARNING"), ("save", "b", "OK"),
+        ("save", "a", "WARNING"), ("save", "b", "OK"),
+        "commit",
+    ]
@@ -0,0 +1,70 @@
+"""
+Tests para el pool de collectors con deadline por collector.
+"""
+
+import threading
+import time
+from src.collector_pool import CollectorPool
+
+
+def test_collect_all_values():
+    """Verifica que se recogen los valores de todos los collectors."""
+    pool = CollectorPool({"disk": lambda: 42, "memory": lambda: 80.5})
+    
+    assert pool.collect() == {"disk": 42, "memory": 80.5}
+    assert pool.stale == {"disk": False, "memory": False}
+    
+    pool.shutdown()
+
+
+def test_hung_collector_is_isolated():
+    """
+    Verifica que un collector colgado no bloquea al resto,
+    se marca como stale y no se vuelve a encolar.
+    """
+    release = threading.Event()
+    calls = []
+    
+    def slow_disk():
+        calls.append(1)
+        if len(calls) > 1:
+            release.wait(5)
+        return 50
+    
+    pool = CollectorPool({"disk": slow_disk, "memory": lambda: 80}, timeout=0.1)
+    pool.collect()
+    
+    start = time.monotonic()
+    values = pool.collect()
+    elapsed = time.monotonic() - start
+    
+    assert elapsed < 1
+    assert values == {"disk": 50, "memory": 80}
+    assert pool.stale["disk"] is True
+    assert pool.stale["memory"] is False
+    
+    # Sigue colgado: no se encola otra llamada
+    pool.collect()
+    assert len(calls) == 2
+    
+    release.set()
+    time.sleep(0.05)
+    pool.collect()
+    assert len(calls) == 3
+    assert pool.stale["disk"] is False
+    
+    pool.shutdown()
+
+
+def test_failed_collector_keeps_last_value():
+    """Verifica que un -1 (error) se marca stale y conserva el último valor."""
+    results = iter([30, -1])
+    pool = CollectorPool({"disk": lambda: next(results)})
+    
+    pool.collect()
+    values = pool.collect()
+    
+    assert values["disk"] == 30
+    assert pool.stale["disk"] is True
+    
+    pool.shutdown()
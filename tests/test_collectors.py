@@ -0,0 +1,397 @@
+"""
+Tests para los collectors nativos (/proc y statvfs).
+"""
+
+import os
+import pytest
+from src.collectors import (
+    parse_meminfo,
+    memory_usage_from_meminfo,
+    parse_cpu_times,
+    cpu_percentages,
+    CpuSampler,
+    read_disk_usage,
+    parse_mounts,
+    filter_mounts,
+    MountTable,
+    parse_per_cpu_times,
+    per_core_percentages,
+    parse_pid_stat,
+    ProcessSampler,
+    PAGE_SIZE,
+    meminfo_bytes,
+    parse_pressure,
+    read_pressure,
+    CounterRates,
+    parse_diskstats,
+    disk_io_from_rates,
+    parse_net_dev,
+    parse_loadavg,
+    parse_schedstat,
+    RunDelaySampler,
+)
+import src.collectors as collectors
+
+MEMINFO = """MemTotal:       16000000 kB
+MemFree:         2000000 kB
+MemAvailable:    4000000 kB
+Buffers:          100000 kB
+HugePages_Total:       0
+"""
+
+PROC_STAT = """cpu  100 0 50 800 50 0 0 0 0 0
+cpu0 50 0 25 400 25 0 0 0 0 0
+intr 12345
+"""
+
+
+def test_parse_meminfo():
+    """Verifica que se parsean los campos de /proc/meminfo."""
+    fields = parse_meminfo(MEMINFO)
+    
+    assert fields["MemTotal"] == 16000000
+    assert fields["MemAvailable"] == 4000000
+    assert fields["HugePages_Total"] == 0
+
+
+def test_memory_usage_from_meminfo():
+    """Verifica el cálculo del porcentaje de memoria disponible."""
+    memory = memory_usage_from_meminfo(parse_meminfo(MEMINFO))
+    
+    assert memory.available_percent == 25.0
+    assert memory.total_kb == 16000000
+
+
+def test_memory_usage_swap():
+    """Verifica que la swap se toma de SwapTotal/SwapFree si existen."""
+    usage = memory_usage_from_meminfo({
+        "MemTotal": 1000, "MemAvailable": 500, "SwapTotal": 400, "SwapFree": 100
+    })
+    assert usage.swap_used_kb == 300
+
+
+def test_meminfo_bytes_skips_counters():
+    """Los contadores de HugePages no son tamaños y no se convierten."""
+    fields = meminfo_bytes(parse_meminfo(MEMINFO))
+    assert fields["MemTotal"] == 16000000 * 1024
+    assert "HugePages_Total" not in fields
+
+
+def test_memory_usage_missing_field():
+    """Verifica que falte MemAvailable provoque ValueError."""
+    with pytest.raises(ValueError):
+        memory_usage_from_meminfo({"MemTotal": 1000})
+
+
+def test_parse_cpu_times():
+    """Verifica que se lee la línea agregada 'cpu'."""
+    times = parse_cpu_times(PROC_STAT)
+    
+    assert times == (100, 0, 50, 800, 50, 0, 0, 0)
+
+
+def test_cpu_percentages():
+    """Verifica que los modos se calculan sobre el delta, no desde el arranque."""
+    before = (100, 0, 50, 800, 50, 0, 0, 0)
+    after = (150, 0, 100, 850, 50, 0, 0, 50)
+    
+    cpu = cpu_percentages(before, after)
+    
+    assert cpu["idle"] == 25.0
+    assert cpu["user"] == 25.0
+    assert cpu["system"] == 25.0
+    assert cpu["steal"] == 25.0
+    assert cpu["iowait"] == 0.0
+
+
+def test_cpu_percentages_no_delta():
+    """Verifica que dos lecturas iguales no producen porcentajes."""
+    times = (100, 0, 50, 800, 50, 0, 0, 0)
+    
+    assert cpu_percentages(times, times) is None
+
+
+def test_cpu_sampler_incremental(monkeypatch):
+    """
+    Verifica que el sampler reutiliza la lectura anterior
+    y solo espera la ventana en la primera muestra.
+    """
+    readings = iter([
+        (0, 0, 0, 100, 0, 0, 0, 0),
+        (10, 0, 0, 190, 0, 0, 0, 0),
+        (110, 0, 0, 190, 0, 0, 0, 0),
+    ])
+    sleeps = []
+    monkeypatch.setattr(collectors, "read_cpu_times", lambda: next(readings))
+    monkeypatch.setattr(collectors.time, "sleep", sleeps.append)
+    
+    sampler = CpuSampler(window=0.1)
+    
+    assert sampler.sample()["idle"] == 90.0
+    assert sampler.sample()["idle"] == 0.0
+    assert sleeps == [0.1]
+
+
+def test_cpu_sampler_per_core_hotplug(monkeypatch):
+    """Un core que sale y otro que entra no dan deltas por core aunque sean los mismos cores."""
+    readings = iter([
+        ((0,) * 8, ("0", "1"), [0] * 16),
+        ((10,) * 8, ("0", "1"), [5] * 16),
+        ((20,) * 8, ("0", "2"), [10] * 8 + [0] * 8),
+        ((30,) * 8, ("0", "2"), [15] * 16),
+    ])
+    monkeypatch.setattr(collectors, "read_per_cpu_times", lambda: next(readings))
+    monkeypatch.setattr(collectors.time, "sleep", lambda s: None)
+    
+    sampler = CpuSampler(window=0.1, per_core=True)
+    
+    sampler.sample()
+    assert sampler.cores.cpus == ("0", "1")
+    sampler.sample()
+    assert sampler.cores is None
+    sampler.sample()
+    assert sampler.cores.cpus == ("0", "2")
+
+
+def test_read_disk_usage(tmp_path):
+    """Verifica que statvfs devuelve un porcentaje coherente."""
+    usage = read_disk_usage(str(tmp_path))
+    
+    assert 0 <= usage.use_percent <= 100
+    assert usage.total_bytes >= usage.used_bytes
+
+
+def test_read_disk_usage_missing_path():
+    """Verifica que un path inexistente lanza OSError."""
+    with pytest.raises(OSError):
+        read_disk_usage("/no/existe/este/path")
+
+
+MOUNTS = """/dev/sda1 / ext4 rw,relatime 0 0
+proc /proc proc rw,nosuid 0 0
+tmpfs /run tmpfs rw,nosuid 0 0
+/dev/sdb1 /var/lib/docker xfs rw 0 0
+/dev/sdb1 /var/lib/docker/bind xfs rw 0 0
+/dev/sdc1 /mnt/data\\040disk ext4 rw 0 0
+overlay /var/lib/docker/overlay2/abc/merged overlay rw 0 0
+"""
+
+
+def test_parse_mounts():
+    """Verifica el parseo de /proc/mounts, incluido el escapado octal."""
+    mounts = parse_mounts(MOUNTS)
+    
+    assert mounts[0].mountpoint == "/"
+    assert mounts[0].fstype == "ext4"
+    assert mounts[5].mountpoint == "/mnt/data disk"
+
+
+def test_filter_mounts_pseudo_and_bind():
+    """Verifica que se descartan pseudo-filesystems y bind mounts repetidos."""
+    mounts = filter_mounts(parse_mounts(MOUNTS))
+    
+    assert [m.mountpoint for m in mounts] == ["/", "/var/lib/docker", "/mnt/data disk"]
+
+
+def test_filter_mounts_include_exclude():
+    """Verifica las listas include/exclude con patrones fnmatch."""
+    mounts = parse_mounts(MOUNTS)
+    
+    included = filter_mounts(mounts, include=("/var/*",))
+    excluded = filter_mounts(mounts, exclude=("/mnt/*",))
+    
+    assert [m.mountpoint for m in included] == ["/var/lib/docker"]
+    assert [m.mountpoint for m in excluded] == ["/", "/var/lib/docker"]
+
+
+def test_mount_table_refreshes_on_change(tmp_path):
+    """Verifica que la tabla solo se reparsea cuando cambia el archivo."""
+    mounts_file = tmp_path / "mounts"
+    mounts_file.write_text("/dev/sda1 / ext4 rw 0 0\n")
+    table = MountTable(path=str(mounts_file))
+    
+    first = table.mounts()
+    assert table.mounts() is first
+    
+    mounts_file.write_text("/dev/sda1 / ext4 rw 0 0\n/dev/sdb1 /data xfs rw 0 0\n")
+    os.utime(mounts_file, ns=(0, 10**18))
+    
+    assert [m.mountpoint for m in table.mounts()] == ["/", "/data"]
+    table.close()
+
+
+def test_parse_per_cpu_times():
+    """Verifica que los contadores por core quedan en un array plano."""
+    aggregate, cpus, flat = parse_per_cpu_times(PROC_STAT)
+    
+    assert aggregate == (100, 0, 50, 800, 50, 0, 0, 0)
+    assert cpus == ("0",)
+    assert list(flat) == [50, 0, 25, 400, 25, 0, 0, 0]
+
+
+def test_per_core_percentages():
+    """Verifica el cálculo por columnas de los porcentajes de cada core."""
+    before = [0] * 16
+    after = [
+        90, 0, 10, 0, 0, 0, 0, 0,     # cpu0: saturado
+        10, 0, 0, 80, 10, 0, 0, 0,    # cpu1: casi libre
+    ]
+    
+    cores = per_core_percentages(("0", "1"), before, after)
+    
+    assert cores.columns["user"] == [90.0, 10.0]
+    assert cores.columns["idle"] == [0.0, 80.0]
+    assert cores.busy() == [100.0, 10.0]
+
+
+def test_per_core_percentages_no_delta():
+    """Verifica que un core sin jiffies nuevos no divide por cero."""
+    cores = per_core_percentages(("0",), [5] * 8, [5] * 8)
+    
+    assert cores.busy() == [100.0]
+    assert cores.columns["idle"] == [0.0]
+
+
+def write_pid_stat(proc_dir, pid, comm, ticks, starttime=1000, rss=10):
+    """Escribe un /proc/[pid]/stat mínimo (utime=ticks, stime=0)."""
+    fields = ["S", "1"] + ["0"] * 9 + [str(ticks), "0"] + ["0"] * 6 + [str(starttime), "0", str(rss)]
+    os.makedirs(proc_dir / str(pid), exist_ok=True)
+    (proc_dir / str(pid) / "stat").write_text(f"{pid} ({comm}) " + " ".join(fields) + "\n")
+
+
+def test_parse_pid_stat_comm_with_spaces(tmp_path):
+    """El nombre puede contener espacios y paréntesis."""
+    write_pid_stat(tmp_path, 42, "my (weird) proc", 150, starttime=777, rss=25)
+    comm, ticks, starttime, rss = parse_pid_stat((tmp_path / "42" / "stat").read_bytes())
+    
+    assert comm == b"my (weird) proc"
+    assert ticks == 150
+    assert starttime == 777
+    assert rss == 25
+
+
+def test_process_sampler_top_n(tmp_path, monkeypatch):
+    """
+    Top por delta de CPU y por RSS; un pid reutilizado no cuenta. Sin
+    pasada anterior sample() hace dos, separadas por `window`.
+    """
+    monkeypatch.setattr(collectors, "CLK_TCK", 100)
+    times = iter([0.0, 1.0])
+    monkeypatch.setattr(collectors.time, "monotonic", lambda: next(times))
+    
+    write_pid_stat(tmp_path, 1, "idle", 500, rss=5)
+    write_pid_stat(tmp_path, 2, "busy", 100, rss=1)
+    write_pid_stat(tmp_path, 3, "reused", 0, starttime=1, rss=100)
+    (tmp_path / "self").mkdir()
+    
+    def window_passes(seconds):
+        write_pid_stat(tmp_path, 2, "busy", 180, rss=1)
+        write_pid_stat(tmp_path, 3, "reused", 5000, starttime=2, rss=100)
+        write_pid_stat(tmp_path, 4, "new", 90, rss=50)
+    monkeypatch.setattr(collectors.time, "sleep", window_passes)
+    
+    sampler = ProcessSampler(top_n=2, proc_dir=str(tmp_path))
+    top_cpu, top_rss = sampler.sample()
+    
+    assert [(p.name, p.cpu_percent) for p in top_cpu] == [("busy", 80.0)]
+    assert [p.pid for p in top_rss] == [3, 4]
+    assert top_rss[0].rss_bytes == 100 * PAGE_SIZE
+
+
+PRESSURE = """some avg10=12.50 avg60=3.10 avg300=0.80 total=987654
+full avg10=4.00 avg60=1.00 avg300=0.20 total=123456
+"""
+
+
+def test_parse_pressure():
+    pressure = parse_pressure(PRESSURE)
+    
+    assert pressure["some"]["avg10"] == 12.5
+    assert pressure["full"]["avg300"] == 0.2
+    assert pressure["full"]["total"] == 123456
+
+
+def test_read_pressure_skips_missing(tmp_path):
+    """Sin PSI (o sin algún recurso) se devuelve lo que haya."""
+    assert read_pressure(str(tmp_path)) == {}
+    
+    (tmp_path / "memory").write_text(PRESSURE)
+    assert list(read_pressure(str(tmp_path))) == ["memory"]
+
+
+DISKSTATS = """   7       0 loop0 10 0 80 5 0 0 0 0 0 4 5 0 0 0 0 0 0
+ 253       0 vda 1000 50 80000 2000 500 20 40000 1500 2 3000 3500 0 0 0 0 0 0
+"""
+
+NET_DEV = """Inter-|   Receive                                                |  Transmit
+ face |bytes    packets errs drop fifo frame compressed multicast|bytes    packets errs drop fifo colls carrier compressed
+    lo: 500 5 0 0 0 0 0 0 500 5 0 0 0 0 0 0
+  eth0: 10000 100 1 2 0 0 0 0 20000 200 3 4 0 0 0 0
+"""
+
+
+def fake_clock(*times):
+    values = iter(times)
+    return lambda: next(values)
+
+
+def test_counter_rates_hotplug():
+    """Un dispositivo nuevo no tiene tasa hasta su segunda muestra; uno retirado se olvida."""
+    rates = CounterRates(clock=fake_clock(0.0, 2.0, 4.0))
+    
+    assert rates.update({"a": (100,)}) == {}
+    assert rates.update({"a": (300,), "b": (50,)}) == {"a": (100.0,)}
+    assert rates.update({"b": (90,)}) == {"b": (20.0,)}
+
+
+def test_counter_rates_wrap_and_reset():
+    """Un contador de 32 bits que da la vuelta sigue dando tasa; un reinicio no."""
+    rates = CounterRates(clock=fake_clock(0.0, 1.0, 2.0))
+    
+    rates.update({"wrap": (2 ** 32 - 10,), "reset": (5_000_000,)})
+    assert rates.update({"wrap": (30,), "reset": (100,)}) == {"wrap": (40.0,)}
+
+
+def test_parse_diskstats_and_rates():
+    counters, in_progress = parse_diskstats(DISKSTATS, exclude=("loop*",))
+    
+    assert list(counters) == ["vda"]
+    assert counters["vda"] == (1000, 80000, 2000, 500, 40000, 1500, 3000)
+    assert in_progress["vda"] == 2
+    
+    # 100 lecturas/s de 4 KiB con 2 ms de media, 50% de utilización
+    io = disk_io_from_rates((100, 800, 200, 0, 0, 0, 500), in_progress=1)
+    assert (io.reads_per_sec, io.read_bytes_per_sec, io.read_await_ms) == (100, 409600, 2.0)
+    assert (io.write_await_ms, io.util_percent) == (0.0, 50.0)
+
+
+def test_parse_net_dev():
+    counters = parse_net_dev(NET_DEV, exclude=("lo",))
+    
+    assert counters == {"eth0": (10000, 20000, 100, 200, 1, 3, 2, 4)}
+
+
+def test_parse_loadavg():
+    load = parse_loadavg("0.34 1.50 2.25 3/72 15162\n")
+    
+    assert (load.load1, load.load5, load.load15) == (0.34, 1.5, 2.25)
+    assert (load.runnable, load.tasks) == (3, 72)
+
+
+def test_run_delay_sampler(tmp_path):
+    """Espera en cola por segundo y media por timeslice a partir de los deltas."""
+    schedstat = tmp_path / "schedstat"
+    sampler = RunDelaySampler(window=0)
+    sampler.path = str(schedstat)
+    sampler.rates = CounterRates(clock=fake_clock(0.0, 1.0, 3.0))
+    
+    schedstat.write_text("version 15\ntimestamp 1\ncpu0 0 0 0 0 0 0 1000 2000 10\ndomain0 3 0 0\n")
+    assert parse_schedstat(schedstat.read_text()) == {"0": (1000, 2000, 10)}
+    assert sampler.sample()["0"].delay_per_sec == 0.0
+    
+    # 1 s de espera en 2 s, repartida en 100 timeslices -> 10 ms de media
+    schedstat.write_text("cpu0 0 0 0 0 0 0 2000000000 1000002000 110\n")
+    delays = sampler.sample()
+    
+    assert delays["0"].delay_per_sec == 0.5
+    assert delays["0"].avg_wait_ms == 10.0
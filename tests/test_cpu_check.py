@@ -0,0 +1,114 @@
+"""
+Tests para la detección de cores saturados en cpu_check.
+"""
+
+import src.cpu_check as cpu_check
+from src.collectors import PerCoreCpu
+
+
+def make_cores(busy_by_cpu):
+    cpus = tuple(busy_by_cpu)
+    idle = [100.0 - busy for busy in busy_by_cpu.values()]
+    return PerCoreCpu(cpus, {"idle": idle, "iowait": [0.0] * len(cpus)})
+
+
+def test_saturated_cores_requires_sustained_period(monkeypatch):
+    """
+    Verifica que un core solo cuenta como saturado tras mantenerse
+    por encima del umbral durante el periodo configurado.
+    """
+    monkeypatch.setattr(cpu_check, "CORE_SATURATION", 95.0)
+    monkeypatch.setattr(cpu_check, "CORE_SATURATION_SECONDS", 30)
+    
+    saturation = cpu_check.CoreSaturation()
+    cores = make_cores({"0": 99.0, "1": 20.0})
+    
+    assert saturation.saturated(cores, now=100, elapsed=10) == []
+    assert saturation.saturated(cores, now=110, elapsed=10) == []
+    assert saturation.saturated(cores, now=120, elapsed=10) == [("0", 99.0)]
+
+
+def test_saturated_cores_resets_when_core_recovers(monkeypatch):
+    """Verifica que una bajada por debajo del umbral reinicia el periodo."""
+    monkeypatch.setattr(cpu_check, "CORE_SATURATION", 95.0)
+    monkeypatch.setattr(cpu_check, "CORE_SATURATION_SECONDS", 30)
+    
+    saturation = cpu_check.CoreSaturation()
+    
+    saturation.saturated(make_cores({"0": 99.0}), now=100, elapsed=20)
+    saturation.saturated(make_cores({"0": 50.0}), now=110, elapsed=10)
+    
+    assert saturation.saturated(make_cores({"0": 99.0}), now=120, elapsed=10) == []
+
+
+def test_saturated_cores_one_shot_window(monkeypatch):
+    """Verifica que una ventana que cubre todo el periodo alerta en una muestra."""
+    monkeypatch.setattr(cpu_check, "CORE_SATURATION", 95.0)
+    monkeypatch.setattr(cpu_check, "CORE_SATURATION_SECONDS", 30)
+    
+    saturation = cpu_check.CoreSaturation()
+    
+    assert saturation.saturated(make_cores({"3": 97.0}), now=500, elapsed=30) == [("3", 97.0)]
+
+
+def test_core_saturation_persists_across_runs(tmp_path, monkeypatch):
+    """
+    Verifica que en cron (un proceso por ejecución) el inicio de la
+    saturación se recupera del estado persistido y alerta en la
+    siguiente ejecución, con el estado del check cpu_cores.
+    """
+    monkeypatch.setenv("STATE_DIR", str(tmp_path))
+    monkeypatch.setattr(cpu_check, "CORE_SATURATION", 95.0)
+    monkeypatch.setattr(cpu_check, "CORE_SATURATION_SECONDS", 30)
+    monkeypatch.setattr(cpu_check, "CORE_SATURATION_STATE", str(tmp_path / "cpu.cores.json"))
+    monkeypatch.setattr("base_check.send_alert", lambda **kwargs: None)
+    
+    cores = make_cores({"0": 99.0})
+    assert cpu_check.CoreSaturationCheck().check_cores(cores, now=1000.0) == 0
+    
+    check = cpu_check.CoreSaturationCheck()
+    assert check.check_cores(cores, now=1060.0) == 1
+    assert check.check_name == "cpu_cores"
+
+
+def test_core_saturation_state_expires(tmp_path, monkeypatch):
+    """Verifica que un estado más viejo que MAX_GAP no cuenta como sostenido."""
+    monkeypatch.setattr(cpu_check, "CORE_SATURATION", 95.0)
+    monkeypatch.setattr(cpu_check, "CORE_SATURATION_SECONDS", 30)
+    monkeypatch.setattr(cpu_check, "CORE_SATURATION_MAX_GAP", 300)
+    path = tmp_path / "cpu.cores.json"
+    path.write_text('{"updated": 1000.0, "since": {"0": 900.0}}')
+    
+    saturation = cpu_check.CoreSaturation(path=str(path))
+    saturation.load(now=2000.0)
+    
+    assert saturation.saturated(make_cores({"0": 99.0}), now=2000.0, elapsed=1) == []
+
+
+def test_core_saturation_tolerates_cron_jitter(tmp_path, monkeypatch):
+    """Verifica que con el MAX_GAP por defecto una ejecución de cron que llega tarde sigue acumulando."""
+    monkeypatch.setattr(cpu_check, "CORE_SATURATION", 95.0)
+    monkeypatch.setattr(cpu_check, "CORE_SATURATION_SECONDS", 30)
+    path = tmp_path / "cpu.cores.json"
+    path.write_text('{"updated": 1000.0, "since": {"0": 990.0}}')
+    
+    saturation = cpu_check.CoreSaturation(path=str(path))
+    saturation.load(now=1320.0)
+    
+    assert saturation.saturated(make_cores({"0": 99.0}), now=1320.0, elapsed=1) == [("0", 99.0)]
+
+
+def test_process_sampler_is_lazy(tmp_path, monkeypatch):
+    """
+    Verifica que crear el check no recorre /proc: los procesos solo se
+    leen al alertar, con la misma ventana que la muestra de CPU.
+    """
+    monkeypatch.setenv("STATE_DIR", str(tmp_path))
+    monkeypatch.setattr(cpu_check, "TOP_PROCESSES", 5)
+    scans = []
+    monkeypatch.setattr(cpu_check.ProcessSampler, "scan", lambda self: scans.append(1) or [])
+    
+    check = cpu_check.CpuCheck()
+    
+    assert scans == []
+    assert check.process_sampler.window == check.sampler.window
@@ -0,0 +1,111 @@
+"""
+Tests para la exposición pre-renderizada de /metrics (exposition.py).
+"""
+
+import gzip
+import threading
+
+import pytest
+import requests
+from prometheus_client import CollectorRegistry, Gauge
+
+from src.exposition import MetricsCache, make_server, negotiate
+
+
+@pytest.fixture
+def exporter():
+    registry = CollectorRegistry()
+    gauge = Gauge("sre_test_value", "Valor de prueba", registry=registry)
+    cache = MetricsCache(registry)
+    server = make_server(0, cache, host="127.0.0.1")
+    thread = threading.Thread(target=server.serve_forever, daemon=True)
+    thread.start()
+    yield gauge, cache, f"http://127.0.0.1:{server.server_address[1]}/metrics"
+    server.shutdown()
+    server.server_close()
+
+
+def test_negotiate():
+    assert negotiate("", "") == ("text", "")
+    assert negotiate("application/openmetrics-text; version=1.0.0", "gzip, deflate") == ("openmetrics", "gzip")
+    assert negotiate("text/plain", "deflate, gzip;q=0") == ("text", "")
+
+
+def test_served_from_render_until_refresh(exporter):
+    """
+    Verifica que los scrapes reciben el render del ciclo (no el valor
+    en vivo) y que If-None-Match con el ETag vigente da 304.
+    """
+    gauge, cache, url = exporter
+    gauge.set(1)
+    cache.refresh()
+
+    first = requests.get(url)
+    gauge.set(2)
+    second = requests.get(url, headers={"If-None-Match": first.headers["ETag"]})
+
+    assert "sre_test_value 1.0" in first.text
+    assert second.status_code == 304 and second.content == b""
+    assert cache.renders == 1
+
+    cache.refresh()
+    third = requests.get(url, headers={"If-None-Match": first.headers["ETag"]})
+    assert third.status_code == 200
+    assert "sre_test_value 2.0" in third.text
+
+
+def test_gzip_and_openmetrics_variants(exporter):
+    gauge, cache, url = exporter
+    gauge.set(3)
+    cache.refresh()
+
+    headers = {"Accept": "application/openmetrics-text", "Accept-Encoding": "gzip"}
+    response = requests.get(url, headers=headers, stream=True)
+    body = gzip.decompress(response.raw.read())
+
+    assert response.headers["Content-Encoding"] == "gzip"
+    assert response.headers["Content-Type"].startswith("application/openmetrics-text")
+    assert body.endswith(b"# EOF\n")
+    assert response.headers["ETag"].endswith('-gz"')
+
+
+class FakeSource:
+    """Collector ondemand mínimo: solo cuenta recolecciones."""
+    
+    def __init__(self):
+        self.collections = 1
+        self.refreshes = 0
+    
+    def refresh(self):
+        self.refreshes += 1
+
+
+def test_source_renders_once_for_concurrent_scrapes():
+    """En modo ondemand varias peticiones a la vez comparten un render."""
+    registry = CollectorRegistry()
+    Gauge("sre_test_value", "Valor de prueba", registry=registry)
+    cache = MetricsCache(registry, source=FakeSource())
+    
+    threads = [threading.Thread(target=cache.get) for _ in range(8)]
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+    
+    assert cache.renders == 1
+
+
+def test_source_renders_only_after_collection():
+    """El render se repite solo cuando el collector recolectó de nuevo."""
+    registry = CollectorRegistry()
+    Gauge("sre_test_value", "Valor de prueba", registry=registry)
+    source = FakeSource()
+    cache = MetricsCache(registry, source=source)
+    
+    cache.get()
+    cache.get()
+    assert (cache.renders, source.refreshes) == (1, 2)
+    
+    source.collections += 1
+    cache.get()
+    assert cache.renders == 2
@@ -0,0 +1,73 @@
+"""
+Tests para los checks de carga y espera en cola (load_check.py).
+"""
+
+import pytest
+
+import src.load_check as load_check
+from src.collectors import CounterRates, LoadAverage
+from src.state_store import FileStateBackend
+
+
+@pytest.fixture
+def alerts(tmp_path, monkeypatch):
+    monkeypatch.setenv("STATE_DIR", str(tmp_path))
+    monkeypatch.setattr(load_check, "TOP_PROCESSES", 0)
+    sent = []
+    monkeypatch.setattr("base_check.send_alert", lambda **kwargs: sent.append(kwargs))
+    return sent
+
+
+@pytest.mark.parametrize("cpus, state, exit_code", [(8, "OK", 0), (4, "WARNING", 1), (2, "CRITICAL", 2)])
+def test_load_normalized_per_cpu(tmp_path, alerts, monkeypatch, cpus, state, exit_code):
+    """
+    Verifica que la misma carga se evalúa por CPU online: load 6 es
+    normal en 8 cores y crítica en 2.
+    """
+    monkeypatch.setattr(load_check, "read_loadavg", lambda: LoadAverage(6.0, 4.0, 2.0, 7, 300))
+    monkeypatch.setattr(load_check, "online_cpus", lambda: cpus)
+    
+    check = load_check.LoadCheck()
+    check.state_backend = FileStateBackend(str(tmp_path))
+    
+    assert check.run() == exit_code
+    assert check.load_last_state() == state
+    if state != "OK":
+        assert alerts[-1]["message"].startswith(f"Carga: {6.0 / cpus} por CPU")
+
+
+def test_run_delay_rates_per_cpu(tmp_path, alerts):
+    """
+    Verifica que la espera en cola se evalúa como tasa por segundo y
+    por CPU, cada una con su propio estado.
+    """
+    schedstat = tmp_path / "schedstat"
+    check = load_check.RunDelayCheck()
+    check.state_backend = FileStateBackend(str(tmp_path))
+    check.sampler.path = str(schedstat)
+    check.sampler.window = 0
+    ticks = iter([0.0, 1.0, 3.0])
+    check.sampler.rates = CounterRates(clock=lambda: next(ticks))
+    
+    schedstat.write_text("cpu0 0 0 0 0 0 0 0 0 0\ncpu1 0 0 0 0 0 0 0 0 0\ncpu2 0 0 0 0 0 0 0 0 0\n")
+    assert check.run() == 0
+    
+    # En 2 s: cpu0 0.2 s de espera, cpu1 1.4 s y cpu2 3 s
+    schedstat.write_text(
+        "cpu0 0 0 0 0 0 0 0 400000000 10\n"
+        "cpu1 0 0 0 0 0 0 0 1400000000 10\n"
+        "cpu2 0 0 0 0 0 0 0 6000000000 10\n"
+    )
+    
+    assert check.run() == 2
+    assert [check.load_last_state(cpu) for cpu in ("0", "1", "2")] == ["OK", "WARNING", "CRITICAL"]
+    assert {a["level"] for a in alerts} == {"WARNING", "CRITICAL"}
+
+
+def test_run_delay_without_schedstat(tmp_path, alerts):
+    """Sin /proc/schedstat el check no hace nada."""
+    check = load_check.RunDelayCheck()
+    check.sampler.path = str(tmp_path / "missing")
+    
+    assert check.run() == 0
+    assert alerts == []
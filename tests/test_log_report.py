@@ -0,0 +1,129 @@
+"""
+Tests para el reporte de logs (log_report.py).
+"""
+
+import gzip
+import os
+
+from src.log_report import Histogram, LogReport
+
+
+def run_lines(day, check_marker, previous, current, metric, at="10:00:00"):
+    return (
+        f"{day} {at} - INFO - Chequeando {check_marker} (warning=80%, critical=90%)\n"
+        f"{day} {at} - INFO - Estado anterior: {previous}\n"
+        f"{day} {at} - INFO - Estado actual: {current}\n"
+        f"{day} {at} - INFO - {metric}\n"
+    )
+
+
+def test_aggregates_per_check_and_day(tmp_path):
+    """Verifica conteos, transiciones y valores por check y día."""
+    log = tmp_path / "disk_check.log"
+    log.write_text(
+        run_lines("2026-02-01", "disco en '/'", "OK", "OK", "Uso de disco: 50% en / (inodos 3%)")
+        + run_lines("2026-02-02", "disco en '/'", "OK", "WARNING", "Uso de disco: 85% en / (inodos 3%)")
+        + run_lines("2026-02-02", "disco en '/'", "WARNING", "OK", "Uso de disco: 60% en / (inodos 3%)")
+    )
+
+    report = LogReport()
+    report.scan(str(tmp_path))
+
+    day = report.days["2026-02-02"]["disk"]
+    assert day.runs == 2
+    assert day.states == {"WARNING": 1, "OK": 1}
+    assert day.transitions == {"OK -> WARNING": 1, "WARNING -> OK": 1}
+    assert (day.values.min, day.values.max) == (60, 85)
+    assert report.days["2026-02-01"]["disk"].states == {"OK": 1}
+
+    text = report.render(["2026-02-01", "2026-02-02"])
+    assert "Checks totales: 3" in text
+    assert "Warnings: 1" in text
+
+
+def test_runner_log_uses_check_markers(tmp_path):
+    """Verifica que en checks.log cada bloque se asigna a su check."""
+    (tmp_path / "checks.log").write_text(
+        run_lines("2026-02-02", "memoria", "OK", "CRITICAL", "Memoria disponible: 5% (100MB de 2000MB)")
+        + run_lines("2026-02-02", "presión de memoria", "OK", "WARNING", "Presión de memoria: some 30.0%, full 0.0% (avg10)")
+        + run_lines("2026-02-02", "CPU", "OK", "OK", "CPU idle: 80.5% idle (19.5% uso)")
+    )
+
+    report = LogReport()
+    report.scan(str(tmp_path))
+
+    assert report.days["2026-02-02"]["memory"].states == {"CRITICAL": 1}
+    assert report.days["2026-02-02"]["memory"].values.max == 5
+    assert report.days["2026-02-02"]["memory_pressure"].states == {"WARNING": 1}
+    assert report.days["2026-02-02"]["cpu"].values.max == 80.5
+
+
+def test_checkpoint_only_reads_new_lines(tmp_path):
+    """
+    Verifica que con el checkpoint solo se procesan líneas nuevas, y que
+    al comprimirse el log (cleanup_logs.sh) no se cuenta dos veces.
+    """
+    log = tmp_path / "cpu_check.log"
+    checkpoint = str(tmp_path / "checkpoint.json")
+    first = run_lines("2026-02-02", "CPU", "OK", "OK", "CPU idle: 90% idle")
+    log.write_text(first)
+
+    report = LogReport()
+    report.scan(str(tmp_path))
+    report.save(checkpoint)
+
+    # Línea nueva + una a medio escribir (sin salto de línea)
+    second = run_lines("2026-02-02", "CPU", "OK", "WARNING", "CPU idle: 15% idle")
+    with open(log, "a") as f:
+        f.write(second + "2026-02-02 10:05:00 - INFO - Chequeando CPU")
+
+    report = LogReport.load(checkpoint)
+    assert report.scan(str(tmp_path)) == len(second.encode())
+    assert report.days["2026-02-02"]["cpu"].runs == 2
+    report.save(checkpoint)
+
+    # cleanup_logs.sh comprime el log y empieza uno nuevo
+    with open(log, "rb") as src, gzip.open(f"{log}.gz", "wb") as dst:
+        dst.write(src.read())
+    os.remove(log)
+    log.write_text(run_lines("2026-02-02", "CPU", "OK", "OK", "CPU idle: 95% idle", at="11:00:00"))
+
+    report = LogReport.load(checkpoint)
+    report.scan(str(tmp_path))
+    stats = report.days["2026-02-02"]["cpu"]
+    assert stats.runs == 4  # 2 anteriores + la incompleta (ya terminada en el .gz) + la nueva
+    assert stats.states == {"OK": 2, "WARNING": 1}
+
+
+def test_histogram_percentiles():
+    hist = Histogram()
+    for value in range(1, 101):
+        hist.add(value)
+
+    assert hist.percentile(50) == 50
+    assert hist.percentile(95) == 95
+    assert Histogram.from_dict(hist.to_dict()).percentile(95) == 95
+
+
+def test_json_log_lines(tmp_path):
+    """Verifica que también se leen logs en formato JSON (LOG_FORMAT=json)."""
+    import json
+
+    events = [
+        {"ts": "2026-02-02T10:00:00.000+00:00", "level": "INFO", "msg": "Chequeando memoria (warning=20%)"},
+        {"ts": "2026-02-02T10:00:00.001+00:00", "level": "INFO", "msg": "Estado anterior: OK"},
+        {"ts": "2026-02-02T10:00:00.002+00:00", "level": "INFO", "msg": "Estado actual: WARNING",
+         "event": "state", "check": "memory", "state": "WARNING", "previous_state": "OK"},
+        {"ts": "2026-02-02T10:00:00.003+00:00", "level": "INFO", "msg": "Memoria disponible: 15% (300MB de 2000MB)"},
+    ]
+    (tmp_path / "memory_check.log").write_text(
+        "".join(json.dumps(e, ensure_ascii=False) + "\n" for e in events) + "{roto\n"
+    )
+
+    report = LogReport()
+    report.scan(str(tmp_path))
+
+    stats = report.days["2026-02-02"]["memory"]
+    assert stats.runs == 1
+    assert stats.transitions == {"OK -> WARNING": 1}
+    assert stats.values.max == 15
@@ -0,0 +1,55 @@
+"""
+Tests para la configuración de logging (texto / JSON vía cola).
+"""
+
+import json
+import logging
+
+from src import logging_setup
+
+
+def test_json_formatter_includes_structured_fields():
+    """Verifica que los campos de `extra` acaban en el JSON."""
+    record = logging.LogRecord("root", logging.INFO, __file__, 1, "Estado actual: %s", ("WARNING",), None)
+    record.check = "disk"
+    record.state = "WARNING"
+    record.previous_state = "OK"
+    record.value = "85% en /"
+    record.duration = 0.012
+
+    event = json.loads(logging_setup.JsonFormatter().format(record))
+
+    assert event["msg"] == "Estado actual: WARNING"
+    assert event["level"] == "INFO"
+    assert event["check"] == "disk"
+    assert event["previous_state"] == "OK"
+    assert event["value"] == "85% en /"
+    assert event["duration"] == 0.012
+    assert "key" not in event
+
+
+def test_setup_logging_writes_through_queue(tmp_path, monkeypatch):
+    """
+    Verifica que el logger raíz solo tiene un QueueHandler y que el
+    archivo lo escribe el listener.
+    """
+    root = logging.getLogger()
+    monkeypatch.setattr(root, "handlers", [])
+    monkeypatch.setattr(root, "level", root.level)
+
+    log_file = tmp_path / "check.log"
+    logging_setup.setup_logging(
+        handlers=[logging.FileHandler(log_file)], fmt="json"
+    )
+    try:
+        assert [type(h) for h in root.handlers] == [logging.handlers.QueueHandler]
+        # Ya configurado: una segunda llamada no añade handlers
+        assert logging_setup.setup_logging() is None
+
+        logging.info("Estado actual: OK", extra={"check": "cpu", "state": "OK"})
+    finally:
+        logging_setup.stop_logging()
+
+    event = json.loads(log_file.read_text().splitlines()[-1])
+    assert event["check"] == "cpu"
+    assert event["state"] == "OK"
@@ -0,0 +1,34 @@
+"""
+Tests para las reglas de presión (PSI) de memory_check.
+"""
+
+import src.memory_check as memory_check
+
+
+def pressure(some, full):
+    return {
+        "some": {"avg10": some, "avg60": 0.0, "avg300": 0.0, "total": 0},
+        "full": {"avg10": full, "avg60": 0.0, "avg300": 0.0, "total": 0},
+    }
+
+
+def test_check_pressure_levels(tmp_path, monkeypatch):
+    """
+    Verifica que some y full avg10 se evalúan por separado y gana el
+    estado más grave.
+    """
+    monkeypatch.setenv("STATE_DIR", str(tmp_path))
+    monkeypatch.setattr(memory_check, "TOP_PROCESSES", 0)
+    alerts = []
+    monkeypatch.setattr("base_check.send_alert", lambda **kwargs: alerts.append(kwargs))
+    
+    check = memory_check.MemoryPressureCheck()
+    
+    assert check.check_pressure(pressure(some=2.0, full=0.0)) == 0
+    assert check.check_pressure(pressure(some=15.0, full=0.0)) == 1
+    assert check.check_pressure(pressure(some=15.0, full=25.0)) == 2
+    
+    assert [a["level"] for a in alerts if a["level"] != "OK"] == ["WARNING", "CRITICAL"]
+    assert "Presión de memoria" in alerts[-1]["title"]
+    assert check.check_name == "memory_pressure"
+    assert check.load_last_state() == "CRITICAL"
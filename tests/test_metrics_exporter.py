@@ -0,0 +1,185 @@
+"""
+Tests para el exportador de métricas.
+"""
+
+import threading
+import time
+from prometheus_client import CollectorRegistry, generate_latest
+from src.collector_pool import CollectorPool
+from src.exposition import MetricsCache
+from src.collectors import DiskUsage, DiskIO, MemoryUsage, Mount, PerCoreCpu, ProcessUsage
+from src.metrics_exporter import (
+    OnDemandCollector,
+    update_mount_metrics,
+    disk_used_percent_metric,
+    update_process_metrics,
+    process_cpu_metric,
+    update_disk_io_metrics,
+    disk_iops_metric,
+    disk_util_metric,
+    update_core_metrics,
+    cpu_core_metric,
+    cpu_core_busy_metric,
+)
+
+
+def make_pool(calls, delay=0.0):
+    def disk():
+        calls.append(1)
+        time.sleep(delay)
+        return DiskUsage(100, 42, 58, 42)
+    return CollectorPool({
+        "disk": disk,
+        "memory": lambda: (MemoryUsage(1000, 800, 80.0), {"MemTotal": 1024000}),
+    })
+
+
+def test_ondemand_collects_on_scrape():
+    """Verifica que la recolección ocurre al scrapear y se expone."""
+    calls = []
+    registry = CollectorRegistry()
+    registry.register(OnDemandCollector(make_pool(calls), ttl=60))
+    
+    assert calls == []
+    
+    output = generate_latest(registry).decode()
+    
+    assert calls == [1]
+    assert "sre_disk_usage_percent 42.0" in output
+    assert "sre_memory_available_percent 80.0" in output
+
+
+def test_ondemand_ttl_cache():
+    """Verifica que dentro del TTL no se vuelve a recolectar."""
+    calls = []
+    collector = OnDemandCollector(make_pool(calls), ttl=60)
+    
+    collector.refresh()
+    collector.refresh()
+    assert len(calls) == 1
+    
+    collector.ttl = 0
+    collector.refresh()
+    assert len(calls) == 2
+
+
+def test_ondemand_prerender_follows_collection():
+    """
+    Verifica que en ondemand el render pre-renderizado no añade un
+    segundo TTL: se renderiza justo tras cada recolección.
+    """
+    calls = []
+    registry = CollectorRegistry()
+    collector = OnDemandCollector(make_pool(calls), ttl=60)
+    registry.register(collector)
+    cache = MetricsCache(registry, source=collector)
+    
+    cache.get()
+    cache.get()
+    assert (len(calls), cache.renders) == (1, 1)
+    
+    # Caduca la recolección: la siguiente petición recolecta y renderiza
+    collector._collected_at -= 60
+    assert b"sre_disk_usage_percent 42.0" in cache.get().body
+    assert len(calls) == cache.renders == 2
+
+
+def test_ondemand_single_flight():
+    """Verifica que scrapers concurrentes provocan una sola recolección."""
+    calls = []
+    collector = OnDemandCollector(make_pool(calls, delay=0.2), ttl=0)
+    
+    threads = [threading.Thread(target=collector.refresh) for _ in range(8)]
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+    
+    assert len(calls) == 1
+
+
+def test_update_mount_metrics_removes_unmounted():
+    """Verifica que un montaje desaparecido deja de exportarse."""
+    root = (Mount("/dev/sda1", "/", "ext4"), DiskUsage(100, 20, 80, 20, 10, 1, 10))
+    data = (Mount("/dev/sdb1", "/data", "xfs"), DiskUsage(100, 90, 10, 90, 10, 5, 50))
+    
+    update_mount_metrics([root, data])
+    assert len(disk_used_percent_metric.collect()[0].samples) == 2
+    
+    update_mount_metrics([root])
+    samples = disk_used_percent_metric.collect()[0].samples
+    assert [s.labels["mountpoint"] for s in samples] == ["/"]
+
+
+def test_update_process_metrics_bounded():
+    """Un proceso que sale del top deja de exportarse."""
+    update_process_metrics(process_cpu_metric, [ProcessUsage(1, "a", 50.0, 0), ProcessUsage(2, "b", 30.0, 0)],
+                           lambda p: p.cpu_percent)
+    update_process_metrics(process_cpu_metric, [ProcessUsage(2, "b", 60.0, 0)], lambda p: p.cpu_percent)
+    
+    samples = process_cpu_metric.collect()[0].samples
+    assert [(s.labels["pid"], s.value) for s in samples] == [("2", 60.0)]
+
+
+def test_update_disk_io_metrics_removes_unplugged():
+    """Un disco retirado (hot-plug) deja de exportarse en todas sus series."""
+    io = DiskIO(10.0, 5.0, 4096.0, 2048.0, 1.5, 3.0, 12.0, 0)
+    
+    update_disk_io_metrics({"sda": io, "sdb": io})
+    update_disk_io_metrics({"sda": io})
+    
+    assert {s.labels["device"] for s in disk_iops_metric.collect()[0].samples} == {"sda"}
+    assert [s.labels["device"] for s in disk_util_metric.collect()[0].samples] == ["sda"]
+
+
+def test_update_core_metrics_removes_offline_cpus():
+    """Un core retirado (hotplug) deja de exportarse por modo y ocupado."""
+    update_core_metrics(PerCoreCpu(("0", "1"), {"idle": [90.0, 10.0], "iowait": [0.0, 0.0]}))
+    update_core_metrics(PerCoreCpu(("0",), {"idle": [80.0], "iowait": [0.0]}))
+    
+    assert {s.labels["cpu"] for s in cpu_core_metric.collect()[0].samples} == {"0"}
+    assert [s.labels["cpu"] for s in cpu_core_busy_metric.collect()[0].samples] == ["0"]
+
+
+def test_self_metrics_exposed():
+    """
+    Verifica que el exporter expone su propio coste: duración por
+    collector, errores, timeouts y último éxito.
+    """
+    from src.metrics_exporter import PoolStatsCollector, collector_duration_metric
+
+    def hang():
+        time.sleep(0.3)
+        return 1
+
+    def observe(name, seconds):
+        collector_duration_metric.labels(collector=name).observe(seconds)
+
+    pool = CollectorPool(
+        {"disk": lambda: 42, "memory": lambda: -1, "slow": hang},
+        timeouts={"slow": 0.05},
+        on_duration=observe,
+    )
+    pool.collect()
+
+    registry = CollectorRegistry()
+    registry.register(collector_duration_metric)
+    registry.register(PoolStatsCollector(pool))
+    output = generate_latest(registry).decode()
+
+    assert 'sre_exporter_collector_duration_seconds_count{collector="disk"} 1.0' in output
+    assert 'sre_exporter_collector_errors_total{collector="memory"} 1.0' in output
+    assert 'sre_exporter_collector_timeouts_total{collector="slow"} 1.0' in output
+    assert 'sre_exporter_collector_last_success_timestamp_seconds{collector="disk"}' in output
+    assert 'sre_exporter_collector_last_success_timestamp_seconds{collector="memory"}' not in output
+    pool.shutdown()
+
+
+def test_process_metrics_in_default_registry():
+    """Verifica que CPU y RSS del proceso se exponen en el mismo /metrics."""
+    from prometheus_client import REGISTRY
+
+    output = generate_latest(REGISTRY).decode()
+
+    assert "process_cpu_seconds_total" in output
+    assert "process_resident_memory_bytes" in output
@@ -0,0 +1,200 @@
+"""
+Tests para el notificador de Discord (sin red).
+"""
+
+import json
+import threading
+import pytest
+import src.notifier as notifier_module
+from src.notifier import MAX_EMBEDS, Notifier, is_retryable
+from src.alert_spool import AlertSpool
+
+
+class FakeResponse:
+    def __init__(self, status_code, headers=None, body=None):
+        self.status_code = status_code
+        self.headers = headers or {}
+        self._body = body or {}
+    
+    def json(self):
+        return self._body
+
+
+class FakeSession:
+    """Sesión HTTP falsa que devuelve respuestas predefinidas."""
+    
+    def __init__(self, responses):
+        self.responses = list(responses)
+        self.payloads = []
+    
+    def post(self, url, data=None, headers=None, timeout=None):
+        self.payloads.append(json.loads(data))
+        return self.responses.pop(0)
+
+
+@pytest.fixture
+def notifier(monkeypatch):
+    monkeypatch.setenv("DISCORD_WEBHOOK", "https://discord.invalid/webhook")
+    monkeypatch.setenv("NOTIFICATIONS_ENABLED", "true")
+    monkeypatch.setattr(notifier_module.time, "sleep", lambda s: None)
+    monkeypatch.setattr(notifier_module, "SPOOL_ENABLED", False)
+    return Notifier()
+
+
+@pytest.fixture
+def spooled_notifier(notifier, tmp_path):
+    notifier.spool = AlertSpool(str(tmp_path / "alerts.spool"))
+    # Sin hilo drainer: los tests llaman a drain_once() directamente
+    notifier._start_drainer = lambda: None
+    return notifier
+
+
+def test_send_discord_builds_embed(notifier):
+    """Verifica el embed enviado y que 204 se considera éxito."""
+    notifier.session = FakeSession([FakeResponse(204)])
+    
+    assert notifier.send_discord("CRITICAL: Disco", "95% en /", "CRITICAL") is True
+    
+    embed = notifier.session.payloads[0]["embeds"][0]
+    assert embed["title"] == "🔥 CRITICAL: Disco"
+    assert embed["color"] == 15158332
+    assert embed["footer"]["text"] == "Monitor SRE | CRITICAL"
+
+
+def test_queued_alerts_are_batched(notifier):
+    """Verifica que las alertas de la misma ventana van en un solo POST."""
+    notifier.session = FakeSession([FakeResponse(204)])
+    notifier.coalesce_window = 60
+    
+    for name in ("disk", "memory", "cpu"):
+        notifier.send_alert(f"WARNING: {name}", "mensaje", "WARNING")
+    
+    assert notifier.session.payloads == []
+    assert notifier.flush() is True
+    assert len(notifier.session.payloads) == 1
+    assert len(notifier.session.payloads[0]["embeds"]) == 3
+
+
+def test_batches_split_at_ten_embeds(notifier):
+    """Verifica que nunca se envían más de 10 embeds por payload."""
+    notifier.session = FakeSession([FakeResponse(204)] * 2)
+    embeds = [notifier.build_embed(f"alerta {i}", "m") for i in range(12)]
+    
+    assert notifier.post_embeds(embeds) is True
+    assert [len(p["embeds"]) for p in notifier.session.payloads] == [10, 2]
+
+
+def test_rate_limit_retry_after(notifier, monkeypatch):
+    """Verifica que un 429 espera Retry-After y reintenta."""
+    sleeps = []
+    monkeypatch.setattr(notifier_module.time, "sleep", sleeps.append)
+    notifier.session = FakeSession([
+        FakeResponse(429, headers={"Retry-After": "1.5"}),
+        FakeResponse(429, body={"retry_after": 0.25}),
+        FakeResponse(204),
+    ])
+    
+    assert notifier.send_discord("t", "m") is True
+    assert sleeps == [1.5, 0.25]
+
+
+def test_error_status_fails(notifier):
+    """Verifica que un error distinto de 429 no se reintenta."""
+    notifier.session = FakeSession([FakeResponse(500)])
+    
+    assert notifier.send_discord("t", "m") is False
+    assert len(notifier.session.payloads) == 1
+
+
+def test_spool_keeps_alert_until_204(spooled_notifier):
+    """Verifica que una alerta fallida queda en el spool y se entrega después."""
+    spooled_notifier.session = FakeSession([FakeResponse(500), FakeResponse(204)])
+    
+    spooled_notifier.send_alert("CRITICAL: Disco", "95%", "CRITICAL")
+    assert len(spooled_notifier.spool) == 1
+    
+    assert spooled_notifier.drain_once() is False
+    assert len(spooled_notifier.spool) == 1
+    
+    assert spooled_notifier.drain_once() is True
+    assert len(spooled_notifier.spool) == 0
+    assert spooled_notifier.drain_once() is None
+
+
+def test_rejected_batch_does_not_block_spool(spooled_notifier, caplog):
+    """Verifica que un 400 descarta su lote y se entrega el siguiente."""
+    spooled_notifier.session = FakeSession([FakeResponse(400), FakeResponse(204)])
+    for i in range(MAX_EMBEDS + 1):
+        spooled_notifier.send_alert(f"alerta {i}", "m", "WARNING")
+    
+    with caplog.at_level("ERROR"):
+        assert spooled_notifier.drain_once() is True
+    
+    assert [len(p["embeds"]) for p in spooled_notifier.session.payloads] == [MAX_EMBEDS, 1]
+    assert len(spooled_notifier.spool) == 0
+    assert "rechazó el lote (400)" in caplog.text
+
+
+def test_retryable_status():
+    assert all(is_retryable(status) for status in (None, 408, 429, 500, 503))
+    assert not any(is_retryable(status) for status in (400, 401, 404))
+
+
+def test_spool_survives_restart(spooled_notifier, tmp_path):
+    """Verifica que las alertas pendientes sobreviven a un reinicio."""
+    spooled_notifier.send_alert("WARNING: Memoria", "15%", "WARNING")
+    
+    restarted = AlertSpool(str(tmp_path / "alerts.spool"))
+    
+    pending = restarted.pending()
+    assert len(pending) == 1
+    assert pending[0][1]["title"] == "⚠️ WARNING: Memoria"
+
+
+def test_spool_ignores_torn_line(tmp_path):
+    """Verifica que una escritura interrumpida no corrompe el journal."""
+    spool = AlertSpool(str(tmp_path / "alerts.spool"))
+    spool.append({"title": "a"})
+    with open(spool.path, "ab") as f:
+        f.write(b'{"op": "add", "id": "tor')
+    spool.append({"title": "b"})
+    
+    assert [embed["title"] for _, embed in spool.pending()] == ["a", "b"]
+
+
+def test_backoff_grows_with_jitter(notifier):
+    """Verifica el backoff exponencial acotado con jitter."""
+    notifier.failures = 1
+    assert 1 <= notifier.backoff_delay() <= 2
+    
+    notifier.failures = 4
+    assert 8 <= notifier.backoff_delay() <= 16
+    
+    notifier.failures = 50
+    assert notifier.backoff_delay() <= notifier_module.BACKOFF_MAX
+
+
+def test_flush_waits_for_drain_lock(spooled_notifier, monkeypatch):
+    """
+    Verifica que flush() al salir espera (acotado) a que el drainer
+    suelte el bloqueo de entrega en lugar de rendirse y dejar la alerta.
+    """
+    monkeypatch.setattr(notifier_module, "EXIT_TIMEOUT", 5)
+    spooled_notifier.session = FakeSession([FakeResponse(204)])
+    spooled_notifier.send_alert("CRITICAL: Disco", "95%", "CRITICAL")
+    
+    holding, release = threading.Event(), threading.Event()
+    
+    def drainer():
+        with spooled_notifier.spool.drain_lock():
+            holding.set()
+            release.wait(5)
+    
+    thread = threading.Thread(target=drainer)
+    thread.start()
+    holding.wait(5)
+    threading.Timer(0.2, release.set).start()
+    
+    assert spooled_notifier.flush() is True
+    thread.join()
+    assert len(spooled_notifier.spool) == 0
@@ -0,0 +1,117 @@
+"""
+Tests para el envío de resultados (result_sink.py) y el receptor
+central (result_receiver.py).
+"""
+
+import gzip
+import http.client
+import threading
+
+import pytest
+import requests
+
+from src.base_check import BaseCheck
+import src.result_receiver as result_receiver
+from src.result_receiver import FleetState, make_server
+from src.result_sink import ResultSink
+
+
+@pytest.fixture
+def receiver():
+    server = make_server(port=0, host="127.0.0.1")
+    thread = threading.Thread(target=server.serve_forever, daemon=True)
+    thread.start()
+    yield server, f"http://127.0.0.1:{server.server_address[1]}"
+    server.shutdown()
+    server.server_close()
+
+
+def test_sink_batches_to_receiver(receiver, tmp_path, monkeypatch):
+    """
+    Verifica que los resultados de handle_state_change llegan al
+    receptor en lotes y que este guarda el último estado por objetivo.
+    """
+    server, url = receiver
+    monkeypatch.setenv("STATE_DIR", str(tmp_path))
+
+    check = BaseCheck("test_sink")
+    check.result_sink = ResultSink(f"{url}/results", host="web-1", batch_size=2, interval=60)
+
+    check.handle_state_change("OK", "Uso de disco /", "20%", key="/")
+    assert server.fleet.batches_received == 0  # aún no se llenó el lote
+
+    check.handle_state_change("CRITICAL", "Uso de disco /data", "95%", key="/data")
+    check.handle_state_change("WARNING", "Uso de disco /data", "85%", key="/data")
+    assert check.result_sink.flush()
+
+    assert server.fleet.batches_received == 2
+    assert check.result_sink.sent == 3
+    assert server.fleet.latest[("web-1", "test_sink", "/data")][0] == "WARNING"
+    assert server.fleet.counts[("test_sink", "WARNING")] == 1
+    assert server.fleet.counts[("test_sink", "CRITICAL")] == 0
+
+    metrics = requests.get(f"{url}/metrics").text
+    assert "sre_fleet_hosts 1.0" in metrics
+    assert 'sre_fleet_checks{check="test_sink",state="OK"} 1.0' in metrics
+
+    state = requests.get(f"{url}/state", params={"host": "web-1"}).json()
+    assert {(s["key"], s["state"]) for s in state} == {("/", "OK"), ("/data", "WARNING")}
+
+
+def test_receiver_rejects_invalid_batches(receiver):
+    _, url = receiver
+
+    headers = {"Content-Encoding": "gzip"}
+    assert requests.post(f"{url}/results", data=b"no es gzip", headers=headers).status_code == 400
+    assert requests.post(f"{url}/results", data=gzip.compress(b"[1, 2]"), headers=headers).status_code == 400
+    assert requests.post(f"{url}/otra", data=b"{}").status_code == 404
+
+
+@pytest.mark.parametrize("length", ["abc", "-5", str(64 * 1024 * 1024)])
+def test_receiver_rejects_bad_content_length(receiver, length):
+    """Verifica que un Content-Length no numérico, negativo o enorme da 4xx."""
+    server, _ = receiver
+    conn = http.client.HTTPConnection("127.0.0.1", server.server_address[1], timeout=5)
+    conn.putrequest("POST", "/results")
+    conn.putheader("Content-Length", length)
+    conn.endheaders()
+
+    assert conn.getresponse().status in (400, 413)
+    conn.close()
+
+
+def test_sink_drops_when_receiver_down():
+    """Verifica que sin receptor el envío falla sin lanzar excepciones."""
+    sink = ResultSink("http://127.0.0.1:9/results", host="web-1", batch_size=10, interval=60)
+    sink.record("disk", "OK", "20%")
+
+    assert sink.flush() is False
+    assert sink.dropped == 1
+
+
+def test_fleet_ignores_out_of_order_results():
+    fleet = FleetState()
+    fleet.update("web-1", [{"check": "cpu", "state": "CRITICAL", "ts": 200}])
+    fleet.update("web-1", [{"check": "cpu", "state": "OK", "ts": 100}, "basura", {"check": "cpu"}])
+
+    assert fleet.latest[("web-1", "cpu", None)][0] == "CRITICAL"
+    assert fleet.counts[("cpu", "CRITICAL")] == 1
+    assert fleet.counts[("cpu", "OK")] == 0
+
+
+def test_fleet_expires_targets_not_seen(monkeypatch):
+    """
+    Verifica que los objetivos y hosts sin reportar desde hace más de
+    FLEET_EXPIRE_AFTER se olvidan y dejan de contar.
+    """
+    monkeypatch.setattr(result_receiver, "EXPIRE_AFTER", 1000)
+    fleet = FleetState()
+    fleet.update("web-1", [{"check": "disk", "key": "/", "state": "OK", "ts": 100},
+                           {"check": "disk", "key": "/old", "state": "WARNING", "ts": 100}], now=100)
+    fleet.update("web-2", [{"check": "cpu", "state": "CRITICAL", "ts": 100}], now=100)
+    fleet.update("web-1", [{"check": "disk", "key": "/", "state": "OK", "ts": 900}], now=900)
+
+    assert fleet.expire(now=1500) == 2
+    assert set(fleet.latest) == {("web-1", "disk", "/")}
+    assert set(fleet.last_seen) == {"web-1"}
+    assert dict(fleet.counts) == {("disk", "OK"): 1, ("disk", "WARNING"): 0}
@@ -0,0 +1,65 @@
+"""
+Tests para la ventana deslizante de muestras.
+"""
+
+import random
+
+import pytest
+from src.rolling_window import RollingWindow
+
+
+def test_rolling_stats_match_last_samples():
+    """Verifica min, max y media frente a las últimas M muestras."""
+    window = RollingWindow(5)
+    samples = [random.uniform(0, 100) for _ in range(200)]
+    
+    for i, value in enumerate(samples):
+        window.append(value)
+        recent = samples[max(0, i - 4):i + 1]
+        
+        assert len(window) == len(recent)
+        assert window.min == min(recent)
+        assert window.max == max(recent)
+        assert window.mean == pytest.approx(sum(recent) / len(recent))
+        assert window.last == value
+
+
+def test_sustained_level_n_of_m():
+    """Verifica la regla "N de las últimas M" por nivel de estado."""
+    window = RollingWindow(5)
+    
+    # Un pico aislado no basta con N=3
+    for level in (0, 2, 0, 0):
+        window.append(0, level)
+    assert window.sustained_level(3) == 0
+    assert window.sustained_level(1) == 2
+    
+    # Tres muestras malas de cinco (una WARNING cuenta para WARNING)
+    window.append(0, 2)
+    window.append(0, 1)
+    assert window.count_at_least(1) == 3
+    assert window.sustained_level(3) == 1
+    
+    # Las muestras viejas salen de la ventana
+    for _ in range(5):
+        window.append(0, 0)
+    assert window.count_at_least(1) == 0
+
+
+def test_int_samples_min_max():
+    """Verifica min y max con muestras enteras (ej: use_percent del disco)."""
+    window = RollingWindow(4)
+    for value in (50, 90, 30, 70):
+        window.append(value)
+    
+    assert (window.min, window.max) == (30, 90)
+    
+    # Salen el 50 y el 90
+    window.append(60)
+    window.append(80)
+    assert (window.min, window.max) == (30, 80)
+
+
+def test_window_requires_capacity():
+    with pytest.raises(ValueError):
+        RollingWindow(0)
@@ -0,0 +1,60 @@
+"""
+Tests para la cache de muestras en memoria compartida (sample_cache.py).
+"""
+
+import struct
+import time
+
+from src.collectors import DiskUsage, MemoryUsage, CPU_MODES
+from src.sample_cache import (
+    SampleCacheReader,
+    SampleCacheWriter,
+    SEQ_OFFSET,
+    cached_cpu,
+    cached_disk_usage,
+    cached_memory_usage,
+    open_reader,
+)
+
+
+def test_publish_and_read(tmp_path):
+    """Verifica que los checks leen lo que publica el exporter."""
+    path = str(tmp_path / "samples.cache")
+    writer = SampleCacheWriter(path, disk_path="/data")
+    now = time.time()
+    writer.publish({
+        "disk": (now, DiskUsage(1000, 850, 150, 85, 100, 10, 10)),
+        "memory": (now, MemoryUsage(2048, 512, 25.0)),
+        "cpu": (now - 5, [10.0 if mode == "idle" else 0.0 for mode in CPU_MODES]),
+    })
+    reader = SampleCacheReader(path)
+    
+    assert cached_disk_usage("/data", reader).use_percent == 85
+    assert cached_disk_usage("/", reader) is None
+    assert cached_memory_usage(reader).available_percent == 25.0
+    assert cached_cpu(reader)["idle"] == 10.0
+    assert reader.read("pressure") is None
+
+
+def test_stale_or_missing_falls_back(tmp_path):
+    """Una muestra vieja o una cache inexistente no se usan."""
+    assert open_reader(str(tmp_path / "nope")) is None
+    
+    path = str(tmp_path / "samples.cache")
+    writer = SampleCacheWriter(path)
+    writer.publish({"memory": (time.time() - 120, MemoryUsage(2048, 512, 25.0))})
+    
+    assert SampleCacheReader(path).read("memory", max_age=30) is None
+
+
+def test_reader_retries_during_write(tmp_path):
+    """Con la secuencia impar (escritura en curso) el lector no devuelve nada."""
+    path = str(tmp_path / "samples.cache")
+    writer = SampleCacheWriter(path)
+    writer.publish({"memory": (time.time(), MemoryUsage(2048, 512, 25.0))})
+    
+    struct.pack_into("<Q", writer._map, SEQ_OFFSET, 3)
+    assert SampleCacheReader(path).read("memory") is None
+    
+    struct.pack_into("<Q", writer._map, SEQ_OFFSET, 4)
+    assert SampleCacheReader(path).read("memory") is not None
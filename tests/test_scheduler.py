@@ -0,0 +1,34 @@
+"""
+Tests para la planificación con deadlines monotónicos (scheduler.py).
+"""
+
+from src.scheduler import Ticker, next_deadline
+
+
+def test_next_deadline_keeps_grid():
+    """Un ciclo que termina antes del deadline no desplaza la rejilla."""
+    assert next_deadline(100.0, 10, 103.7) == (110.0, 0)
+
+
+def test_next_deadline_skips_missed_ticks():
+    """Un ciclo atrasado salta al siguiente deadline y cuenta los perdidos."""
+    assert next_deadline(100.0, 10, 125.0) == (130.0, 2)
+
+
+def test_ticker_does_not_drift():
+    """
+    Verifica que la duración del trabajo no se acumula en el periodo
+    (antes: dormir SCRAPE_INTERVAL después de recolectar).
+    """
+    now = [0.0]
+    ticker = Ticker(15, clock=lambda: now[0])
+    
+    deadlines = []
+    for work in (0.4, 2.0, 0.1, 31.0, 0.2):
+        now[0] += work
+        missed = ticker.advance()
+        deadlines.append((ticker.deadline, missed))
+        now[0] = max(now[0], ticker.deadline)
+    
+    assert deadlines == [(15, 0), (30, 0), (45, 0), (90, 2), (105, 0)]
+    assert (ticker.ticks, ticker.missed) == (5, 2)
@@ -0,0 +1,102 @@
+"""
+Tests para los backends de estado (file y sqlite).
+"""
+
+import pytest
+from src.state_store import FileStateBackend, SQLiteStateBackend
+
+
+def test_file_backend_roundtrip(tmp_path):
+    """Verifica que el backend file guarda y lee el estado."""
+    backend = FileStateBackend(str(tmp_path))
+    
+    assert backend.load("disk") is None
+    
+    backend.save("disk", "WARNING")
+    backend.save("disk", "CRITICAL", key="/data")
+    
+    assert backend.load("disk") == "WARNING"
+    assert backend.load("disk", "/data") == "CRITICAL"
+    assert (tmp_path / "disk.state").read_text() == "WARNING"
+    assert not list(tmp_path.glob("*.tmp"))
+
+
+def test_file_backend_keys_do_not_collide(tmp_path):
+    """Claves que antes daban el mismo archivo ("/var/lib" y "/var_lib", "/" y "root") no se pisan."""
+    backend = FileStateBackend(str(tmp_path))
+    
+    for key, state in (("/var/lib", "WARNING"), ("/var_lib", "CRITICAL"), ("/", "OK"), ("root", "WARNING")):
+        backend.save("disk", state, key=key)
+    
+    assert [backend.load("disk", key) for key in ("/var/lib", "/var_lib", "/", "root")] == [
+        "WARNING", "CRITICAL", "OK", "WARNING"
+    ]
+
+
+def test_file_backend_reads_legacy_name(tmp_path):
+    """El estado guardado con el nombre antiguo se sigue leyendo."""
+    (tmp_path / "disk.var_lib.state").write_text("CRITICAL")
+    backend = FileStateBackend(str(tmp_path))
+    
+    assert backend.load("disk", "/var/lib") == "CRITICAL"
+    backend.save("disk", "OK", key="/var/lib")
+    assert backend.load("disk", "/var/lib") == "OK"
+
+
+def test_file_backend_invalid_content(tmp_path):
+    """Verifica que un archivo corrupto se trata como sin estado."""
+    (tmp_path / "disk.state").write_text("WARN")
+    
+    assert FileStateBackend(str(tmp_path)).load("disk") is None
+
+
+def test_sqlite_backend_transitions(tmp_path):
+    """Verifica el estado actual y el histórico de transiciones."""
+    backend = SQLiteStateBackend(str(tmp_path / "state.db"))
+    
+    backend.save("disk", "OK", value="20%")
+    backend.save("disk", "WARNING", value="85%")
+    backend.save("disk", "WARNING", value="86%")
+    backend.save("disk", "OK", value="40%")
+    backend.save("memory", "CRITICAL", value="5%")
+    
+    assert backend.load("disk") == "OK"
+    assert backend.load("cpu") is None
+    
+    history = backend.history("disk")
+    assert [(h["from"], h["to"], h["value"]) for h in history] == [
+        ("WARNING", "OK", "40%"),
+        ("OK", "WARNING", "85%"),
+    ]
+    assert len(backend.history()) == 3
+    
+    backend.close()
+
+
+def test_sqlite_backend_persists(tmp_path):
+    """Verifica que el estado sobrevive a reabrir la base de datos."""
+    path = str(tmp_path / "state.db")
+    backend = SQLiteStateBackend(path)
+    backend.save("cpu", "CRITICAL", key="cores")
+    backend.close()
+    
+    assert SQLiteStateBackend(path).load("cpu", "cores") == "CRITICAL"
+
+
+def test_sqlite_batch_is_atomic(tmp_path):
+    """Verifica que un batch que falla no deja escrituras a medias."""
+    backend = SQLiteStateBackend(str(tmp_path / "state.db"))
+    
+    with backend.batch():
+        backend.save("disk", "WARNING")
+        backend.save("memory", "WARNING")
+    
+    with pytest.raises(RuntimeError):
+        with backend.batch():
+            backend.save("disk", "CRITICAL")
+            raise RuntimeError("caída a mitad del ciclo")
+    
+    assert backend.load("disk") == "WARNING"
+    assert backend.load("memory") == "WARNING"
+    
+    backend.close()